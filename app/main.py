@@ -2,6 +2,15 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.database import engine, Base
 from app.utils.logger_config import get_logger
+from app.utils.search_index import ensure_search_index
+from app.utils.low_stock import ensure_low_stock_tracking
+from app.utils.stock_ledger import ensure_stock_ledger, stock_snapshots
+from app.utils.sales_rollup import ensure_sales_rollup
+from app.utils.audit_logger import audit_writer, ensure_audit_indexes
+from app.utils.audit_archive import audit_archiver
+from app.utils.export_jobs import export_jobs, export_purger
+from app.utils.audit_encoding import ensure_audit_changes_column
+from app.utils.table_versions import ensure_table_versions
 import os
 
 # Import all models to ensure they're registered with Base
@@ -13,6 +22,13 @@ logger = get_logger()
 # Create database tables
 Base.metadata.create_all(bind=engine)
 logger.info("Database tables created successfully")
+ensure_search_index(engine)
+ensure_low_stock_tracking(engine)
+ensure_stock_ledger(engine)
+ensure_sales_rollup(engine)
+ensure_audit_indexes(engine)
+ensure_audit_changes_column(engine)
+ensure_table_versions(engine)
 
 # Create FastAPI app
 app = FastAPI(
@@ -34,10 +50,18 @@ app.add_middleware(
 async def startup_event():
     logger.info("Application starting up...")
     logger.info(f"Database URL: {os.getenv('DATABASE_URL', 'sqlite:///./inventory.db')}")
+    stock_snapshots.start()
+    audit_archiver.start()
+    export_purger.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Application shutting down...")
+    export_jobs.shutdown()
+    export_purger.stop()
+    stock_snapshots.stop()
+    audit_archiver.stop()
+    audit_writer.stop()
 
 @app.get("/")
 async def root():
@@ -53,6 +77,20 @@ async def health_check():
     """Health check for monitoring"""
     return {"status": "healthy"}
 
+@app.get("/cache-stats")
+async def cache_stats():
+    """Hit/miss counters of the in-process caches"""
+    from app.utils.query_cache import count_cache, report_cache
+    from app.utils.taxonomy_cache import taxonomy_cache
+    from app.utils.category_matrix import category_matrix
+    return {
+        "taxonomy": taxonomy_cache.stats(),
+        "counts": count_cache.stats(),
+        "reports": report_cache.stats(),
+        "category_matrix": category_matrix.stats(),
+        "audit_writer": audit_writer.stats()
+    }
+
 # Import and include routers
 from app.routers import categories, qualities, sizes, items, suppliers, sales, purchases, invoices, settings
 
@@ -66,9 +104,8 @@ app.include_router(purchases.router, prefix="/api/purchases", tags=["purchases"]
 app.include_router(invoices.router, prefix="/api", tags=["invoices"])
 app.include_router(settings.router, prefix="/api/settings", tags=["settings"])
 
-# TODO: Add remaining routers
-from app.routers import audit # reports, audit
-# # app.include_router(reports.router, prefix="/api/reports", tags=["reports"])
+from app.routers import reports, audit
+app.include_router(reports.router, prefix="/api/reports", tags=["reports"])
 app.include_router(audit.router, prefix="/api/audit-logs", tags=["audit"])
 
 from app.routers import license
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Text
+from sqlalchemy import Column, Integer, String, Float, Boolean, Date, DateTime, ForeignKey, JSON, LargeBinary, Text, Computed, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -64,6 +64,8 @@ class Item(Base):
     gst_percentage = Column(Float, nullable=False, default=0.0)  # 0, 5, 9, 18
     stock_quantity = Column(Float, nullable=False, default=0.0, index=True)
     low_stock_threshold = Column(Float, nullable=False, default=10.0)
+    # Generated by the database, so every write path keeps it in step
+    is_low_stock = Column(Boolean, Computed("stock_quantity <= low_stock_threshold"))
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -75,6 +77,59 @@ class Item(Base):
     sale_items = relationship("SaleItem", back_populates="item")
     purchase_items = relationship("PurchaseItem", back_populates="item")
 
+    __table_args__ = (
+        # Partial index holding only the low-stock items, keyed for per-category lookups
+        Index(
+            "ix_items_low_stock", "category_id", "id",
+            sqlite_where=text("is_low_stock = 1"),
+            postgresql_where=text("is_low_stock")
+        ),
+    )
+
+
+class CategoryStockCount(Base):
+    """Per-category item and low-stock counts, maintained by triggers on items"""
+    __tablename__ = "category_stock_counts"
+
+    category_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True)
+    item_count = Column(Integer, nullable=False, default=0)
+    low_stock_count = Column(Integer, nullable=False, default=0)
+
+
+class StockMovement(Base):
+    """
+    Append-only stock ledger: one row per item per sale, purchase or adjustment.
+
+    `quantity` is the signed change (negative for sales); the movements of an
+    item add up to its current stock_quantity.
+    """
+    __tablename__ = "stock_movements"
+
+    id = Column(Integer, primary_key=True)
+    item_id = Column(Integer, ForeignKey("items.id", ondelete="CASCADE"), nullable=False)
+    ts = Column(DateTime, nullable=False)
+    quantity = Column(Float, nullable=False)
+    movement_type = Column(String(20), nullable=False)  # opening, sale, purchase, adjustment, ...
+    reference_id = Column(Integer, nullable=True)  # sale or purchase id
+
+    __table_args__ = (
+        Index("ix_stock_movements_item_ts", "item_id", "ts"),
+        Index("ix_stock_movements_ts", "ts"),
+    )
+
+
+class StockSnapshot(Base):
+    """Stock of an item at the end of a day, kept for the days the item moved"""
+    __tablename__ = "stock_snapshots"
+
+    item_id = Column(Integer, ForeignKey("items.id", ondelete="CASCADE"), primary_key=True)
+    snapshot_date = Column(Date, primary_key=True)
+    stock_quantity = Column(Float, nullable=False)
+
+    __table_args__ = (
+        Index("ix_stock_snapshots_date", "snapshot_date"),
+    )
+
 
 class Supplier(Base):
     __tablename__ = "suppliers"
@@ -155,18 +210,61 @@ class SaleItem(Base):
     item = relationship("Item", back_populates="sale_items")
 
 
+class SalesDailyTotal(Base):
+    """Per-day sale totals, maintained with every sale written or deleted"""
+    __tablename__ = "sales_daily_totals"
+
+    sale_day = Column(Date, primary_key=True)
+    sales_count = Column(Integer, nullable=False, default=0)
+    subtotal = Column(Float, nullable=False, default=0.0)
+    gst_amount = Column(Float, nullable=False, default=0.0)
+    discount = Column(Float, nullable=False, default=0.0)
+    total_amount = Column(Float, nullable=False, default=0.0)
+
+
+class SalesDailyRollup(Base):
+    """Per-day, per-item sold quantity and revenue (before GST)"""
+    __tablename__ = "sales_daily_rollup"
+
+    sale_day = Column(Date, primary_key=True)
+    item_id = Column(Integer, primary_key=True)
+    quantity = Column(Float, nullable=False, default=0.0)
+    revenue = Column(Float, nullable=False, default=0.0)
+    gst_amount = Column(Float, nullable=False, default=0.0)
+    line_count = Column(Integer, nullable=False, default=0)
+
+
+class SalesDailyGstRollup(Base):
+    """Per-day taxable amount and GST for each GST rate"""
+    __tablename__ = "sales_daily_gst_rollup"
+
+    sale_day = Column(Date, primary_key=True)
+    gst_percentage = Column(Float, primary_key=True)
+    taxable_amount = Column(Float, nullable=False, default=0.0)
+    gst_amount = Column(Float, nullable=False, default=0.0)
+    line_count = Column(Integer, nullable=False, default=0)
+
+
 class AuditLog(Base):
     __tablename__ = "audit_logs"
 
     id = Column(Integer, primary_key=True, index=True)
-    table_name = Column(String(100), nullable=False, index=True)
+    table_name = Column(String(100), nullable=False)
     record_id = Column(Integer, nullable=False)
     operation = Column(String(20), nullable=False, index=True)  # INSERT, UPDATE, DELETE
-    old_data = Column(JSON, nullable=True)
+    old_data = Column(JSON, nullable=True)  # rows written before `changes` existed
     new_data = Column(JSON, nullable=True)
+    changes = Column(LargeBinary, nullable=True)  # old record + new diff, see app/utils/audit_encoding.py
     user_id = Column(Integer, nullable=True)  # For future multi-user support
     ip_address = Column(String(50), nullable=True)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # History of one record, newest first
+        Index("ix_audit_logs_table_record_ts", "table_name", "record_id", "timestamp"),
+        # Keyset pages over the whole log, (timestamp, id) descending
+        Index("ix_audit_logs_ts_id", "timestamp", "id"),
+    )
 
 
 class Settings(Base):
@@ -1,13 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional, Union
 from datetime import datetime
 
 from app.database import get_db
-from app.utils.audit_logger import get_audit_logs as fetch_audit_logs
+from app.utils.audit_logger import get_audit_logs as fetch_audit_logs, get_audit_logs_page as fetch_audit_logs_page
+from app.utils.audit_encoding import audit_view
+from app.utils.audit_export import AUDIT_EXPORT_FORMATS, stream_audit_export
+from app.utils.pagination import InvalidCursorError, decode_cursor
+from app.schemas.common import CursorPaginatedResponse
 from app.models.models import AuditLog
+from app.utils.logger_config import get_logger
 from pydantic import BaseModel, ConfigDict
 
+logger = get_logger()
+
 router = APIRouter(
     tags=["Audit Logs"]
 )
@@ -26,22 +34,123 @@ class AuditLogSchema(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
-@router.get("/", response_model=List[AuditLogSchema])
+def _decode_position(cursor: Optional[str]) -> Optional[dict]:
+    if not cursor:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/", response_model=Union[List[AuditLogSchema], CursorPaginatedResponse[AuditLogSchema]])
 def get_audit_logs(
     table_name: Optional[str] = None,
+    record_id: Optional[int] = None,
     operation: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
     limit: int = 100,
     offset: int = 0,
+    pagination: str = "offset",  # offset, cursor
+    cursor: Optional[str] = None,
+    include_archived: bool = False,
+    db: Session = Depends(get_db)
+):
+    """
+    Get audit logs with optional filtering, newest first
+
+    With pagination=cursor (or any cursor supplied) the page is fetched by
+    keyset on (timestamp, id) and returned with next_cursor/prev_cursor;
+    deep pages cost the same as the first one. include_archived=true also
+    reads the monthly archive segments for rows past the retention period.
+    """
+    filters = dict(
+        table_name=table_name, record_id=record_id, operation=operation,
+        start_date=start_date, end_date=end_date, include_archived=include_archived
+    )
+    if pagination == "cursor" or cursor:
+        logs, next_cursor, prev_cursor = fetch_audit_logs_page(
+            db=db, position=_decode_position(cursor), limit=limit, **filters
+        )
+        return {
+            "items": [audit_view(log) for log in logs], "limit": limit,
+            "next_cursor": next_cursor, "prev_cursor": prev_cursor
+        }
+
+    logs = fetch_audit_logs(db=db, limit=limit, offset=offset, **filters)
+    return [audit_view(log) for log in logs]
+
+
+@router.get("/export")
+def export_audit_logs(
+    request: Request,
+    format: str = "ndjson",  # ndjson, csv
+    table_name: Optional[str] = None,
+    operation: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    include_archived: bool = False
+):
+    """
+    Export audit logs as NDJSON or CSV, oldest first.
+
+    Rows are streamed from the database in batches, so memory stays flat
+    however many rows match. Clients that send Accept-Encoding: gzip get a
+    gzip-compressed body. include_archived=true puts the archived rows
+    ahead of the live ones.
+    """
+    if format not in AUDIT_EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+
+    try:
+        extension, media_type = AUDIT_EXPORT_FORMATS[format]
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        gzip = "gzip" in request.headers.get("accept-encoding", "").lower()
+        response = StreamingResponse(
+            stream_audit_export(
+                format, table_name=table_name, operation=operation, start_date=start_date,
+                end_date=end_date, include_archived=include_archived, gzip=gzip
+            ),
+            media_type=media_type
+        )
+        response.headers["Content-Disposition"] = f"attachment; filename=audit_logs_{timestamp}{extension}"
+        response.headers["Vary"] = "Accept-Encoding"
+        if gzip:
+            response.headers["Content-Encoding"] = "gzip"
+        return response
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error exporting audit logs: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{table_name}/{record_id}", response_model=CursorPaginatedResponse[AuditLogSchema])
+def get_record_history(
+    table_name: str,
+    record_id: int,
+    operation: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    include_archived: bool = False,
     db: Session = Depends(get_db)
 ):
     """
-    Get audit logs with optional filtering
+    Audit history of one record, newest first, paged by cursor.
+
+    Served from ix_audit_logs_table_record_ts, so the cost depends on the
+    record's own history rather than on the size of the log.
+    include_archived=true continues into the archive segments.
     """
-    logs = fetch_audit_logs(
-        db=db,
-        table_name=table_name,
-        operation=operation,
-        limit=limit,
-        offset=offset
+    logs, next_cursor, prev_cursor = fetch_audit_logs_page(
+        db=db, position=_decode_position(cursor), limit=limit, table_name=table_name,
+        record_id=record_id, operation=operation, start_date=start_date, end_date=end_date,
+        include_archived=include_archived
     )
-    return logs
+    return {
+        "items": [audit_view(log) for log in logs], "limit": limit,
+        "next_cursor": next_cursor, "prev_cursor": prev_cursor
+    }
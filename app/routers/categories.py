@@ -1,11 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from typing import List
 from app.database import get_db
 from app.models.models import Category
 from app.schemas.category import CategoryCreate, CategoryUpdate, Category as CategorySchema
-from app.utils.audit_logger import log_operation
 from app.utils.logger_config import get_logger
+from app.utils.http_cache import conditional_get
 
 router = APIRouter()
 logger = get_logger()
@@ -13,11 +13,16 @@ logger = get_logger()
 
 @router.get("/", response_model=List[CategorySchema])
 def get_categories(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db)
 ):
     """Get all categories"""
+    not_modified = conditional_get(request, response, ("categories",))
+    if not_modified:
+        return not_modified
     try:
         categories = db.query(Category).offset(skip).limit(limit).all()
         logger.info(f"Retrieved {len(categories)} categories")
@@ -28,8 +33,11 @@ def get_categories(
 
 
 @router.get("/{category_id}", response_model=CategorySchema)
-def get_category(category_id: int, db: Session = Depends(get_db)):
+def get_category(category_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
     """Get a specific category by ID"""
+    not_modified = conditional_get(request, response, ("categories",))
+    if not_modified:
+        return not_modified
     category = db.query(Category).filter(Category.id == category_id).first()
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
@@ -50,15 +58,6 @@ def create_category(category: CategoryCreate, db: Session = Depends(get_db)):
         db.commit()
         db.refresh(db_category)
         
-        # Log the operation
-        log_operation(
-            db=db,
-            table_name="categories",
-            record_id=db_category.id,
-            operation="INSERT",
-            new_data=category.model_dump()
-        )
-        
         logger.info(f"Created category: {db_category.name} (ID: {db_category.id})")
         return db_category
         
@@ -82,12 +81,6 @@ def update_category(
         if not db_category:
             raise HTTPException(status_code=404, detail="Category not found")
         
-        # Store old data for audit
-        old_data = {
-            "name": db_category.name,
-            "description": db_category.description
-        }
-        
         # Update fields
         update_data = category.model_dump(exclude_unset=True)
         for field, value in update_data.items():
@@ -96,16 +89,6 @@ def update_category(
         db.commit()
         db.refresh(db_category)
         
-        # Log the operation
-        log_operation(
-            db=db,
-            table_name="categories",
-            record_id=db_category.id,
-            operation="UPDATE",
-            old_data=old_data,
-            new_data=update_data
-        )
-        
         logger.info(f"Updated category: {db_category.name} (ID: {db_category.id})")
         return db_category
         
@@ -125,25 +108,11 @@ def delete_category(category_id: int, db: Session = Depends(get_db)):
         if not db_category:
             raise HTTPException(status_code=404, detail="Category not found")
         
-        # Store data for audit
-        old_data = {
-            "name": db_category.name,
-            "description": db_category.description
-        }
-        
+        name = db_category.name
         db.delete(db_category)
         db.commit()
         
-        # Log the operation
-        log_operation(
-            db=db,
-            table_name="categories",
-            record_id=category_id,
-            operation="DELETE",
-            old_data=old_data
-        )
-        
-        logger.info(f"Deleted category: {old_data['name']} (ID: {category_id})")
+        logger.info(f"Deleted category: {name} (ID: {category_id})")
         
     except HTTPException:
         raise
@@ -6,9 +6,10 @@ from datetime import datetime
 import os
 
 from app.database import get_db
-from app.models.models import Sale, SaleItem, Item, Category, Quality, Size, Settings as SettingsModel
+from app.models.models import Sale, SaleItem, Item, Settings as SettingsModel
 from app.schemas.invoice import InvoiceResponse, InvoiceItemResponse, ShopInfo
 from app.utils.pdf_generator import generate_invoice_pdf
+from app.utils.taxonomy_cache import taxonomy_cache
 
 router = APIRouter(prefix="/invoices", tags=["invoices"])
 
@@ -46,8 +47,10 @@ def get_invoice_data(sale_id: int, db: Session = Depends(get_db)):
     if not sale:
         raise HTTPException(status_code=404, detail="Sale not found")
     
-    # Fetch sale items with related data
-    sale_items = db.query(SaleItem).filter(SaleItem.sale_id == sale_id).all()
+    # Fetch sale items with their item in one query; names come from the taxonomy cache
+    sale_items = db.query(SaleItem, Item).join(Item, Item.id == SaleItem.item_id).filter(
+        SaleItem.sale_id == sale_id
+    ).order_by(SaleItem.id).all()
     
     if not sale_items:
         raise HTTPException(status_code=404, detail="No items found for this sale")
@@ -57,19 +60,12 @@ def get_invoice_data(sale_id: int, db: Session = Depends(get_db)):
     subtotal = 0
     gst_breakdown: Dict[str, float] = {}
     
-    for sale_item in sale_items:
-        # Get item details
-        item = db.query(Item).filter(Item.id == sale_item.item_id).first()
-        if not item:
-            continue
-        
-        # Get category, quality, size
-        category = db.query(Category).filter(Category.id == item.category_id).first()
-        quality = db.query(Quality).filter(Quality.id == item.quality_id).first()
-        size = db.query(Size).filter(Size.id == item.size_id).first()
-        
+    for sale_item, item in sale_items:
         # Build description
-        description = f"{category.name} > {quality.name} > {size.size_display}"
+        category_name, quality_name, size_display = taxonomy_cache.names(
+            db, item.category_id, item.quality_id, item.size_id
+        )
+        description = f"{category_name} > {quality_name} > {size_display}"
         
         # Calculate amounts
         line_total = sale_item.quantity * sale_item.unit_price
@@ -1,10 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.orm import Session
+from typing import List, Optional, Union
 from app.database import get_db
 from app.models.models import Item, Category, Quality, Size
-from app.schemas.item import ItemCreate, ItemUpdate, ItemStockUpdate, Item as ItemSchema, ItemDetail, ItemBulkCreate
-from app.utils.audit_logger import log_operation
+from app.schemas.item import (
+    ItemCreate, ItemUpdate, ItemStockUpdate, Item as ItemSchema, ItemDetail, ItemBulkCreate, CategoryStockCounts
+)
+from app.utils import search_index
+from app.utils.taxonomy_cache import taxonomy_cache
+from app.utils.low_stock import category_stock_counts
+from app.utils.category_matrix import category_matrix
+from app.utils.item_export import (
+    EXPORT_FORMATS, ExportTable, item_rows, pivot_rows, stream_delimited, write_pdf, write_xlsx
+)
+from app.utils.export_jobs import ExportJob, ExportQueueFullError, export_jobs
+from app.utils.http_ranges import ranged_file_response
+from app.utils.http_cache import conditional_get, etag_matches
+from app.schemas.export import ExportJobCreate, ExportJobStatus
+from app.schemas.stock import StockHistory, StockLevel
+from app.utils import stock_ledger
 from app.utils.logger_config import get_logger
 
 router = APIRouter()
@@ -12,12 +26,20 @@ logger = get_logger()
 
 
 from sqlalchemy import or_, asc, desc
-from app.schemas.common import PaginatedResponse
-from fastapi.responses import StreamingResponse
+from app.schemas.common import PaginatedResponse, CursorPaginatedResponse
+from app.utils.pagination import InvalidCursorError, decode_cursor, keyset_filter, page_cursors
+from app.utils.query_cache import filter_signature, get_cached_count
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
 import io
-import pandas as pd
+import os
+import tempfile
+from dataclasses import asdict
 from datetime import datetime
 
+# Item filters join the taxonomy tables (search and sort), so counts depend on all four
+ITEM_COUNT_TABLES = ("items", "categories", "qualities", "sizes")
+
 def _build_items_query(
     db: Session,
     search: Optional[str] = None,
@@ -28,14 +50,46 @@ def _build_items_query(
     sort_by: str = "id",
     sort_order: str = "asc"
 ):
-    query = db.query(Item).join(Item.category).join(Item.quality).join(Item.size).options(
-        joinedload(Item.category),
-        joinedload(Item.quality),
-        joinedload(Item.size)
+    query, sort_column = _filtered_items_query(
+        db, search, category_id, quality_id, size_id, low_stock_only, sort_by
     )
-    
-    if search:
+    return _apply_items_order(query, sort_column, sort_order == 'desc')
+
+
+def _filtered_items_query(
+    db: Session,
+    search: Optional[str],
+    category_id: Optional[int],
+    quality_id: Optional[int],
+    size_id: Optional[int],
+    low_stock_only: bool,
+    sort_by: str
+):
+    """
+    Build the unordered items query and resolve the column it should be sorted by.
+
+    Taxonomy tables are only joined when the LIKE search or the sort needs
+    them; names for display come from the taxonomy cache instead.
+    """
+    query = db.query(Item)
+    joined = set()
+
+    def _join(relationship):
+        nonlocal query
+        if relationship.key not in joined:
+            query = query.join(relationship)
+            joined.add(relationship.key)
+
+    fts = None
+    match = search_index.build_match_query(search) if search and search_index.is_available() else None
+    if match:
+        fts = search_index.match_subquery(match)
+        query = query.join(fts, fts.c.item_id == Item.id)
+    elif search:
         search_term = f"%{search}%"
+        _join(Item.category)
+        _join(Item.quality)
+        _join(Item.size)
         query = query.filter(
             or_(
                 Item.sku.ilike(search_term),
@@ -53,7 +107,7 @@ def _build_items_query(
     if size_id:
         query = query.filter(Item.size_id == size_id)
     if low_stock_only:
-        query = query.filter(Item.stock_quantity <= Item.low_stock_threshold)
+        query = query.filter(Item.is_low_stock == True)
     
     # Sorting
     sort_column = Item.id  # Default
@@ -64,55 +118,166 @@ def _build_items_query(
     elif sort_by == 'price':
         sort_column = Item.selling_price
     elif sort_by == 'category':
+        _join(Item.category)
         sort_column = Category.name
     elif sort_by == 'quality':
+        _join(Item.quality)
         sort_column = Quality.name
     elif sort_by == 'size':
+        _join(Item.size)
         sort_column = Size.sort_order
-    
-    if sort_order == 'desc':
-        query = query.order_by(desc(sort_column))
-    else:
-        query = query.order_by(asc(sort_column))
-        
-    return query
+    elif sort_by == 'relevance' and fts is not None:
+        sort_column = fts.c.rank  # bm25: lower is a better match
+    return query, sort_column
+
+
+def _apply_items_order(query, sort_column, descending: bool):
+    # Item.id breaks ties so every ordering is total (required for keyset paging)
+    if descending:
+        return query.order_by(desc(sort_column), desc(Item.id))
+    return query.order_by(asc(sort_column), asc(Item.id))
+
+
+def _with_taxonomy(db: Session, items) -> List[dict]:
+    """Serialize items with their nested category/quality/size taken from the taxonomy cache"""
+    result = []
+    for item in items:
+        payload = {column.key: getattr(item, column.key) for column in Item.__table__.columns}
+        category = taxonomy_cache.category(db, item.category_id)
+        quality = taxonomy_cache.quality(db, item.quality_id)
+        size = taxonomy_cache.size(db, item.size_id)
+        payload["category"] = asdict(category) if category else None
+        payload["quality"] = asdict(quality) if quality else None
+        payload["size"] = asdict(size) if size else None
+        result.append(payload)
+    return result
 
-@router.get("/", response_model=PaginatedResponse[ItemSchema])
+
+@router.get("/", response_model=Union[PaginatedResponse[ItemSchema], CursorPaginatedResponse[ItemSchema]])
 def get_items(
+    request: Request,
+    response: Response,
     search: Optional[str] = None,
     category_id: Optional[int] = None,
     quality_id: Optional[int] = None,
     size_id: Optional[int] = None,
     low_stock_only: bool = False,
-    sort_by: str = "id",
+    sort_by: str = "id",  # id, sku, stock, price, category, quality, size, relevance
     sort_order: str = "asc",
     page: int = 1,
     limit: int = 50,
+    pagination: str = "offset",  # offset, cursor
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Get all items with optional filters, search, and sorting"""
+    """
+    Get all items with optional filters, search, and sorting.
+
+    With pagination=cursor (or any cursor supplied) the page is fetched by
+    keyset instead of offset: no total is counted and the response carries
+    next_cursor/prev_cursor, so deep pages cost the same as the first one.
+    """
+    not_modified = conditional_get(request, response, ITEM_COUNT_TABLES)
+    if not_modified:
+        return not_modified
     try:
-        query = _build_items_query(
-            db, search, category_id, quality_id, size_id, low_stock_only, sort_by, sort_order
+        query, sort_column = _filtered_items_query(
+            db, search, category_id, quality_id, size_id, low_stock_only, sort_by
+        )
+
+        if pagination == "cursor" or cursor:
+            return _get_items_page_by_cursor(db, query, sort_column, sort_by, sort_order, limit, cursor)
+
+        count_key = filter_signature(
+            "items", search=search, category_id=category_id, quality_id=quality_id,
+            size_id=size_id, low_stock_only=low_stock_only
         )
-            
-        total = query.count()
+        total, total_is_estimate = get_cached_count(count_key, ITEM_COUNT_TABLES, query.count)
+
+        query = _apply_items_order(query, sort_column, sort_order == 'desc')
         skip = (page - 1) * limit
         items = query.offset(skip).limit(limit).all()
         
         logger.info(f"Retrieved {len(items)} items (page {page}, total {total})")
         
         return {
-            "items": items,
+            "items": _with_taxonomy(db, items),
             "total": total,
             "page": page,
-            "limit": limit
+            "limit": limit,
+            "total_is_estimate": total_is_estimate
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error retrieving items: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _get_items_page_by_cursor(db: Session, query, sort_column, sort_by: str, sort_order: str, limit: int, cursor: Optional[str]):
+    """Fetch one keyset page of a filtered items query ordered by sort_column"""
+    descending = sort_order == 'desc'
+    cursor_scope = {"s": sort_by, "o": "desc" if descending else "asc"}
+
+    position = None
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if position.get("s") != cursor_scope["s"] or position.get("o") != cursor_scope["o"]:
+            raise HTTPException(status_code=400, detail="Cursor does not match sort_by/sort_order")
+
+    # A backwards walk runs the ordering in reverse and flips the page afterwards
+    walk_descending = descending != (position is not None and position.get("dir") == "prev")
+    query = _apply_items_order(query, sort_column, walk_descending)
+    if position is not None:
+        query = query.filter(
+            keyset_filter(sort_column, Item.id, position.get("v"), position["id"], walk_descending)
+        )
+
+    rows = query.add_columns(sort_column).limit(limit + 1).all()
+    rows, next_cursor, prev_cursor = page_cursors(
+        rows, limit, position, key=lambda row: (row[1], row[0].id), extra=cursor_scope
+    )
+    items = [row[0] for row in rows]
+
+    logger.info(f"Retrieved {len(items)} items by cursor (sort {sort_by} {sort_order})")
+
+    return {
+        "items": _with_taxonomy(db, items),
+        "limit": limit,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor
+    }
+
+
+def _export_builder(
+    search: Optional[str],
+    category_id: Optional[int],
+    quality_id: Optional[int],
+    size_id: Optional[int],
+    low_stock_only: bool,
+    sort_by: str,
+    sort_order: str,
+    view_mode: str
+):
+    """Return a callable that builds the export table for these filters from a session"""
+    def build(session: Session) -> ExportTable:
+        # Pivot makes sense usually within a category
+        if view_mode == 'table' and category_id:
+            query, _ = _filtered_items_query(
+                session, search, category_id, quality_id, size_id, low_stock_only, "size"
+            )
+            return pivot_rows(session, query)
+        query = _build_items_query(
+            session, search, category_id, quality_id, size_id, low_stock_only, sort_by, sort_order
+        )
+        return item_rows(session, query)
+
+    return build
+
+
 @router.get("/export")
 def export_items(
     search: Optional[str] = None,
@@ -126,197 +291,236 @@ def export_items(
     view_mode: str = "list", # list, table
     db: Session = Depends(get_db)
 ):
-    """Export inventory items based on filters"""
+    """
+    Export inventory items based on filters.
+
+    CSV and TSV are streamed straight from the database in batches, so memory
+    stays flat however many items are exported. Large Excel/PDF exports
+    should use POST /export/jobs instead of holding the request open.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+
     try:
-        # 1. Fetch Data
-        query = _build_items_query(
-            db, search, category_id, quality_id, size_id, low_stock_only, sort_by, sort_order
+        build_export = _export_builder(
+            search, category_id, quality_id, size_id, low_stock_only, sort_by, sort_order, view_mode
         )
-        items = query.all()
-        
-        # 2. Perpare Data for DataFrame
-        data = []
-        for item in items:
-            row = {
-                "Item ID": item.id,
-                "SKU": item.sku,
-                "Category": item.category.name if item.category else "",
-                "Quality": item.quality.name if item.quality else "",
-                "Size": item.size.size_display if item.size else "",
-                "Stock": item.stock_quantity,
-                "Unit": item.unit,
-                "Price": item.selling_price,
-                "GST %": item.gst_percentage,
-                "Low Stock Threshold": item.low_stock_threshold
-            }
-            data.append(row)
-            
-        df = pd.DataFrame(data)
-        
-        # 3. Handle Table View Transformation (Pivot)
-        if view_mode == 'table' and not df.empty:
-            # Pivot logic: Index=Size, Columns=Quality, Values=Stock
-            # Note: This is complex if we want both stock and price. 
-            # For simplicity, let's export the List view data mostly, 
-            # OR we can create a pivot for Stock.
-            # Let's stick to List view data for consistency unless explicitly cleaner.
-            # User request: "follow UI ... view mode".
-            # If table mode, maybe they want the matrix.
-            # Let's try simple pivot on Stock first.
-            if category_id: # Pivot makes sense usually within a category
-                try:
-                    pivot_df = df.pivot_table(
-                        index='Size', 
-                        columns='Quality', 
-                        values='Stock', 
-                        aggfunc='first'
-                    )
-                    df = pivot_df
-                except Exception as e:
-                    logger.warning(f"Pivot failed: {e}")
-                    # Fallback to list
-
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"inventory_export_{timestamp}"
+        extension, media_type = EXPORT_FORMATS[format]
 
-        # 4. Generate Output
-        if format == "csv":
-            stream = io.StringIO()
-            df.to_csv(stream, index=False)
-            response = StreamingResponse(iter([stream.getvalue()]), media_type="text/csv")
-            response.headers["Content-Disposition"] = f"attachment; filename={filename}.csv"
-            return response
-            
-        elif format == "tsv":
-            stream = io.StringIO()
-            df.to_csv(stream, sep="\t", index=False)
-            response = StreamingResponse(iter([stream.getvalue()]), media_type="text/tab-separated-values")
-            response.headers["Content-Disposition"] = f"attachment; filename={filename}.tsv"
-            return response
-
-        elif format == "excel":
-            stream = io.BytesIO()
-            df.to_excel(stream, index=False, engine='openpyxl')
-            stream.seek(0)
-            response = StreamingResponse(iter([stream.getvalue()]), media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-            response.headers["Content-Disposition"] = f"attachment; filename={filename}.xlsx"
+        if format in ("csv", "tsv"):
+            delimiter = "," if format == "csv" else "\t"
+            response = StreamingResponse(stream_delimited(build_export, delimiter), media_type=media_type)
+            response.headers["Content-Disposition"] = f"attachment; filename={filename}{extension}"
             return response
 
-        elif format == "pdf":
-            # PDF Generation using ReportLab
+        if format == "pdf":
             buffer = io.BytesIO()
-            from reportlab.lib import colors
-            from reportlab.lib.pagesizes import letter, landscape
-            from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-            from reportlab.lib.styles import getSampleStyleSheet
-            
-            doc = SimpleDocTemplate(buffer, pagesize=landscape(letter))
-            elements = []
-            styles = getSampleStyleSheet()
-            
-            elements.append(Paragraph(f"Inventory Export - {datetime.now().strftime('%Y-%m-%d %H:%M')}", styles['Title']))
-            elements.append(Spacer(1, 12))
-            
-            # Convert DF to list of lists [Header] + [Rows]
-            # Handle potential index if it was pivoted
-            if view_mode == 'table' and not isinstance(df.index, pd.RangeIndex):
-                # Reset index to make Size a column again if pivoted
-                 df_reset = df.reset_index()
-                 data_list = [df_reset.columns.tolist()] + df_reset.values.tolist()
-            else:
-                 data_list = [df.columns.tolist()] + df.values.tolist()
-
-            # Create Table
-            t = Table(data_list)
-            t.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ]))
-            elements.append(t)
-            
-            doc.build(elements)
-            buffer.seek(0)
-            
-            response = StreamingResponse(iter([buffer.getvalue()]), media_type="application/pdf")
-            response.headers["Content-Disposition"] = f"attachment; filename={filename}.pdf"
+            write_pdf(buffer, build_export(db))
+            response = StreamingResponse(iter([buffer.getvalue()]), media_type=media_type)
+            response.headers["Content-Disposition"] = f"attachment; filename={filename}{extension}"
             return response
-            
-        else:
-            raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+
+        # Excel: write-only workbook on disk; rows stream in from the database
+        # in batches and the finished file goes out with a known Content-Length
+        handle, path = tempfile.mkstemp(prefix=f"{filename}_", suffix=extension)
+        os.close(handle)
+        try:
+            write_xlsx(path, build_export(db))
+        except Exception:
+            os.remove(path)
+            raise
+        return FileResponse(
+            path,
+            media_type=media_type,
+            filename=f"{filename}{extension}",
+            background=BackgroundTask(os.remove, path)
+        )
 
     except Exception as e:
         logger.error(f"Export failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _export_job_status(job: ExportJob) -> dict:
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "phase": job.phase,
+        "format": job.format,
+        "rows_processed": job.rows_processed,
+        "total_rows": job.total_rows,
+        "file_size": job.file_size,
+        "error": job.error,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+        "expires_at": job.expires_at,
+        "download_url": f"/api/items/export/jobs/{job.id}/download" if job.status == "completed" else None
+    }
+
+
+@router.post("/export/jobs", response_model=ExportJobStatus, status_code=status.HTTP_202_ACCEPTED)
+def create_export_job(job_request: ExportJobCreate):
+    """Start an export in the background; poll the returned job for progress"""
+    build_export = _export_builder(
+        job_request.search, job_request.category_id, job_request.quality_id, job_request.size_id,
+        job_request.low_stock_only, job_request.sort_by, job_request.sort_order, job_request.view_mode
+    )
+
+    count_export = None
+    if not (job_request.view_mode == 'table' and job_request.category_id):
+        def count_export(session: Session) -> int:
+            query, _ = _filtered_items_query(
+                session, job_request.search, job_request.category_id, job_request.quality_id,
+                job_request.size_id, job_request.low_stock_only, "id"
+            )
+            return query.count()
+
+    filename = f"inventory_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    try:
+        job = export_jobs.submit(job_request.format, filename, build_export, count_export)
+    except ExportQueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+    return _export_job_status(job)
+
+
+@router.get("/export/jobs/{job_id}", response_model=ExportJobStatus)
+def get_export_job(job_id: str):
+    """Get the status and progress of an export job"""
+    job = export_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found or expired")
+    return _export_job_status(job)
+
+
+@router.get("/export/jobs/{job_id}/download")
+def download_export_job(job_id: str, request: Request):
+    """Download a finished export; supports Range requests to resume"""
+    job = export_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found or expired")
+    if job.status != "completed" or not job.path or not os.path.exists(job.path):
+        raise HTTPException(status_code=409, detail=f"Export job is {job.status}")
+
+    return ranged_file_response(
+        request, job.path, job.media_type, job.download_name, etag=f'"{job.id}-{job.file_size}"'
+    )
+
+
 @router.get("/category/{category_id}/table")
-def get_items_table(category_id: int, db: Session = Depends(get_db)):
-    """Get items in table format (qualities x sizes) for a category"""
+def get_items_table(
+    category_id: int,
+    request: Request,
+    layout: str = "map",  # map, columnar
+    db: Session = Depends(get_db)
+):
+    """
+    Get items in table format (qualities x sizes) for a category.
+
+    `layout=map` keys cells by "{quality_id}_{size_id}"; `layout=columnar`
+    returns dense [quality][size] arrays of item ids, stock, price and
+    low-stock flags. Responses carry an ETag, and a matching If-None-Match
+    gets 304 without querying the database.
+    """
+    if layout not in ("map", "columnar"):
+        raise HTTPException(status_code=400, detail=f"Unsupported layout: {layout}")
+
+    etag = category_matrix.current_etag(category_id, layout)
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
     try:
-        # Get all qualities and sizes for this category
-        qualities = db.query(Quality).filter(Quality.category_id == category_id).all()
-        sizes = db.query(Size).filter(Size.category_id == category_id).order_by(Size.sort_order).all()
-        
-        # Get all items for this category
-        items = db.query(Item).filter(Item.category_id == category_id).all()
-        
-        # Create a lookup dictionary
-        item_lookup = {}
-        for item in items:
-            key = f"{item.quality_id}_{item.size_id}"
-            item_lookup[key] = {
-                "id": item.id,
-                "sku": item.sku,
-                "stock_quantity": item.stock_quantity,
-                "selling_price": item.selling_price,
-                "unit": item.unit,
-                "gst_percentage": item.gst_percentage,
-                "low_stock_threshold": item.low_stock_threshold,
-                "is_low_stock": item.stock_quantity <= item.low_stock_threshold
-            }
-        
-        # Build table structure
-        table_data = {
-            "category_id": category_id,
-            "qualities": [{"id": q.id, "name": q.name} for q in qualities],
-            "sizes": [{"id": s.id, "size_value": s.size_value, "size_display": s.size_display} for s in sizes],
-            "items": item_lookup
-        }
-        
-        return table_data
+        table_data, etag = category_matrix.render(db, category_id, layout)
+        return JSONResponse(table_data, headers={"ETag": etag, "Cache-Control": "no-cache"})
     except Exception as e:
         logger.error(f"Error getting items table: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/low-stock", response_model=List[ItemSchema])
-def get_low_stock_items(db: Session = Depends(get_db)):
+def get_low_stock_items(request: Request, response: Response, db: Session = Depends(get_db)):
     """Get all items with stock below threshold"""
+    not_modified = conditional_get(request, response, ITEM_COUNT_TABLES)
+    if not_modified:
+        return not_modified
     try:
-        items = db.query(Item).options(
-            joinedload(Item.category),
-            joinedload(Item.quality),
-            joinedload(Item.size)
-        ).filter(Item.stock_quantity <= Item.low_stock_threshold).all()
+        # Served from the partial index on the generated is_low_stock column
+        items = db.query(Item).filter(Item.is_low_stock == True).all()
         logger.info(f"Found {len(items)} low stock items")
-        return items
+        return _with_taxonomy(db, items)
     except Exception as e:
         logger.error(f"Error retrieving low stock items: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/low-stock/counts", response_model=List[CategoryStockCounts])
+def get_low_stock_counts(
+    request: Request,
+    response: Response,
+    category_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """Item and low-stock counts per category, read from the trigger-maintained counts table"""
+    not_modified = conditional_get(request, response, ("items", "categories"))
+    if not_modified:
+        return not_modified
+    try:
+        result = []
+        for counts in category_stock_counts(db, category_id):
+            category = taxonomy_cache.category(db, counts["category_id"])
+            result.append({**counts, "category_name": category.name if category else None})
+        return result
+    except Exception as e:
+        logger.error(f"Error retrieving low stock counts: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/{item_id}", response_model=ItemSchema)
-def get_item(item_id: int, db: Session = Depends(get_db)):
+def get_item(item_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
     """Get a specific item by ID"""
+    not_modified = conditional_get(request, response, ITEM_COUNT_TABLES)
+    if not_modified:
+        return not_modified
     item = db.query(Item).filter(Item.id == item_id).first()
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
-    return item
+    return _with_taxonomy(db, [item])[0]
+
+
+@router.get("/{item_id}/stock-at", response_model=StockLevel)
+def get_item_stock_at(item_id: int, at: datetime, request: Request, response: Response, db: Session = Depends(get_db)):
+    """Stock of an item at a past moment, from the nearest daily snapshot and the stock ledger"""
+    not_modified = conditional_get(request, response, ("items",))
+    if not_modified:
+        return not_modified
+    if not db.query(Item.id).filter(Item.id == item_id).first():
+        raise HTTPException(status_code=404, detail="Item not found")
+    return stock_ledger.stock_at(db, item_id, at)
+
+
+@router.get("/{item_id}/movements", response_model=StockHistory)
+def get_item_movements(
+    item_id: int,
+    request: Request,
+    response: Response,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db)
+):
+    """
+    Stock movements of an item after start_date up to end_date (default now),
+    oldest first, with the stock before and after the period. has_more is set
+    when the period holds more than `limit` movements.
+    """
+    not_modified = conditional_get(request, response, ("items",))
+    if not_modified:
+        return not_modified
+    if not db.query(Item.id).filter(Item.id == item_id).first():
+        raise HTTPException(status_code=404, detail="Item not found")
+    return stock_ledger.stock_history(db, item_id, start_date, end_date, limit)
 
 
 @router.post("/", response_model=ItemSchema, status_code=status.HTTP_201_CREATED)
@@ -325,17 +529,13 @@ def create_item(item: ItemCreate, db: Session = Depends(get_db)):
     try:
         db_item = Item(**item.model_dump())
         db.add(db_item)
+        db.flush()  # Get the item ID
+        stock_ledger.record_movements(
+            db, stock_ledger.movement_rows(stock_ledger.OPENING, {db_item.id: db_item.stock_quantity})
+        )
         db.commit()
         db.refresh(db_item)
         
-        log_operation(
-            db=db,
-            table_name="items",
-            record_id=db_item.id,
-            operation="INSERT",
-            new_data=item.model_dump()
-        )
-        
         logger.info(f"Created item: {db_item.sku} (ID: {db_item.id})")
         return db_item
     except Exception as e:
@@ -349,21 +549,25 @@ def create_items_bulk(bulk_data: ItemBulkCreate, db: Session = Depends(get_db)):
     """Create multiple items (all combinations of qualities and sizes)"""
     try:
         items = []
+        # Existing (quality, size) combinations in this category, fetched once
+        existing = set(
+            db.query(Item.quality_id, Item.size_id).filter(
+                Item.category_id == bulk_data.category_id,
+                Item.quality_id.in_(bulk_data.quality_ids),
+                Item.size_id.in_(bulk_data.size_ids)
+            ).all()
+        )
+        
         for quality_id in bulk_data.quality_ids:
             for size_id in bulk_data.size_ids:
-                # Check if item already exists
-                existing = db.query(Item).filter(
-                    Item.category_id == bulk_data.category_id,
-                    Item.quality_id == quality_id,
-                    Item.size_id == size_id
-                ).first()
-                
-                if existing:
+                if (quality_id, size_id) in existing:
                     continue  # Skip if already exists
                 
                 # Get quality and size for SKU generation
-                quality = db.query(Quality).filter(Quality.id == quality_id).first()
-                size = db.query(Size).filter(Size.id == size_id).first()
+                quality = taxonomy_cache.quality(db, quality_id)
+                size = taxonomy_cache.size(db, size_id)
+                if not quality or not size:
+                    raise HTTPException(status_code=404, detail=f"Quality {quality_id} or size {size_id} not found")
                 
                 sku = f"ITM-{quality.name[:3].upper()}-{size.size_value}"
                 
@@ -388,6 +592,8 @@ def create_items_bulk(bulk_data: ItemBulkCreate, db: Session = Depends(get_db)):
         
         logger.info(f"Created {len(items)} items in bulk for category {bulk_data.category_id}")
         return items
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         logger.error(f"Error creating items in bulk: {str(e)}")
@@ -402,31 +608,18 @@ def update_item(item_id: int, item: ItemUpdate, db: Session = Depends(get_db)):
         if not db_item:
             raise HTTPException(status_code=404, detail="Item not found")
         
-        old_data = {
-            "sku": db_item.sku,
-            "unit": db_item.unit,
-            "selling_price": db_item.selling_price,
-            "gst_percentage": db_item.gst_percentage,
-            "stock_quantity": db_item.stock_quantity,
-            "low_stock_threshold": db_item.low_stock_threshold
-        }
-        
+        old_stock = db_item.stock_quantity
         update_data = item.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_item, field, value)
+        if "stock_quantity" in update_data:
+            stock_ledger.record_movements(db, stock_ledger.movement_rows(
+                stock_ledger.ADJUSTMENT, {db_item.id: db_item.stock_quantity - old_stock}
+            ))
         
         db.commit()
         db.refresh(db_item)
         
-        log_operation(
-            db=db,
-            table_name="items",
-            record_id=db_item.id,
-            operation="UPDATE",
-            old_data=old_data,
-            new_data=update_data
-        )
-        
         logger.info(f"Updated item: {db_item.sku} (ID: {db_item.id})")
         return db_item
     except HTTPException:
@@ -447,19 +640,13 @@ def update_item_stock(item_id: int, stock_update: ItemStockUpdate, db: Session =
         
         old_stock = db_item.stock_quantity
         db_item.stock_quantity = stock_update.stock_quantity
+        stock_ledger.record_movements(db, stock_ledger.movement_rows(
+            stock_ledger.ADJUSTMENT, {db_item.id: stock_update.stock_quantity - old_stock}
+        ))
         
         db.commit()
         db.refresh(db_item)
         
-        log_operation(
-            db=db,
-            table_name="items",
-            record_id=db_item.id,
-            operation="UPDATE",
-            old_data={"stock_quantity": old_stock},
-            new_data={"stock_quantity": stock_update.stock_quantity}
-        )
-        
         logger.info(f"Updated stock for item {db_item.sku}: {old_stock} -> {stock_update.stock_quantity}")
         return db_item
     except HTTPException:
@@ -478,19 +665,11 @@ def delete_item(item_id: int, db: Session = Depends(get_db)):
         if not db_item:
             raise HTTPException(status_code=404, detail="Item not found")
         
-        old_data = {"sku": db_item.sku, "stock_quantity": db_item.stock_quantity}
+        sku = db_item.sku
         db.delete(db_item)
         db.commit()
         
-        log_operation(
-            db=db,
-            table_name="items",
-            record_id=item_id,
-            operation="DELETE",
-            old_data=old_data
-        )
-        
-        logger.info(f"Deleted item: {old_data['sku']} (ID: {item_id})")
+        logger.info(f"Deleted item: {sku} (ID: {item_id})")
     except HTTPException:
         raise
     except Exception as e:
@@ -1,28 +1,71 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Response, UploadFile, status
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session, joinedload, selectinload
+from typing import Dict, List, Optional, Tuple, Union
 from datetime import datetime
 from app.database import get_db
 from app.models.models import Purchase, PurchaseItem, Item
-from app.schemas.purchase import PurchaseCreate, PurchaseUpdate, Purchase as PurchaseSchema, PurchaseDetail
+from app.schemas.purchase import (
+    PurchaseCreate, PurchaseUpdate, Purchase as PurchaseSchema, PurchaseDetail, PurchaseHeader, PurchaseWithLines,
+    PurchaseImportResult
+)
 from app.schemas.common import PaginatedResponse
-from app.utils.audit_logger import log_operation
+from app.utils.audit_logger import log_operations
 from app.utils.logger_config import get_logger
+from app.utils.query_cache import filter_signature, get_cached_count
+from app.utils.purchase_import import InvoiceFormatError, parse_invoice
+from app.utils.stock import StockConflictError, apply_stock_deltas, deduct_stock, items_by_sku, load_items, quantities_by_item
+from app.utils import stock_ledger
 
 router = APIRouter()
 logger = get_logger()
 
+# Row errors returned in an import report; the counts always cover all of them
+IMPORT_MAX_ERRORS = 500
 
-@router.get("/", response_model=PaginatedResponse[PurchaseSchema])
+# Everything the fully nested Purchase schema serialises, fetched with one query per level
+_PURCHASE_LINES_WITH_ITEMS = selectinload(Purchase.purchase_items).selectinload(PurchaseItem.item).options(
+    joinedload(Item.category), joinedload(Item.quality), joinedload(Item.size)
+)
+
+# expand= value -> (response schema, loader options for exactly what it serialises)
+PURCHASE_EXPANSIONS = {
+    "none": (PurchaseHeader, (joinedload(Purchase.supplier),)),
+    "lines": (PurchaseWithLines, (joinedload(Purchase.supplier), selectinload(Purchase.purchase_items))),
+    "lines.item": (PurchaseSchema, (joinedload(Purchase.supplier), _PURCHASE_LINES_WITH_ITEMS)),
+}
+
+
+def _purchase_expansion(expand: str):
+    if expand not in PURCHASE_EXPANSIONS:
+        raise HTTPException(status_code=400, detail=f"Invalid expand: {expand} (use none, lines or lines.item)")
+    return PURCHASE_EXPANSIONS[expand]
+
+
+@router.get(
+    "/",
+    response_model=Union[
+        PaginatedResponse[PurchaseSchema], PaginatedResponse[PurchaseWithLines], PaginatedResponse[PurchaseHeader]
+    ]
+)
 def get_purchases(
     supplier_id: Optional[int] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     page: int = 1,
     limit: int = 20,
+    expand: str = "lines.item",
     db: Session = Depends(get_db)
 ):
-    """Get all purchases with optional filters and pagination"""
+    """
+    Get all purchases with optional filters and pagination.
+
+    expand picks the shape of each purchase: "none" (header and supplier),
+    "lines" (with its lines) or "lines.item" (lines with their items, the
+    default). The related rows are eager-loaded, so a page costs the same few
+    queries whatever its size.
+    """
+    schema, options = _purchase_expansion(expand)
     try:
         query = db.query(Purchase)
         
@@ -34,98 +77,121 @@ def get_purchases(
             query = query.filter(Purchase.purchase_date <= end_date)
         
         # Calculate total
-        total = query.count()
+        count_key = filter_signature("purchases", supplier_id=supplier_id, start_date=start_date, end_date=end_date)
+        total, total_is_estimate = get_cached_count(count_key, ("purchases",), query.count)
         
         # Apply pagination
         skip = (page - 1) * limit
-        purchases = query.order_by(Purchase.purchase_date.desc()).offset(skip).limit(limit).all()
+        purchases = query.options(*options).order_by(Purchase.purchase_date.desc()).offset(skip).limit(limit).all()
         
-        return {
-            "items": purchases,
-            "total": total,
-            "page": page,
-            "limit": limit
-        }
+        page_body = PaginatedResponse[schema](
+            items=purchases,
+            total=total,
+            page=page,
+            limit=limit,
+            total_is_estimate=total_is_estimate
+        )
+        return Response(content=page_body.model_dump_json(), media_type="application/json")
     except Exception as e:
         logger.error(f"Error retrieving purchases: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/{purchase_id}", response_model=PurchaseDetail)
-def get_purchase(purchase_id: int, db: Session = Depends(get_db)):
-    """Get a specific purchase by ID with items"""
-    purchase = db.query(Purchase).filter(Purchase.id == purchase_id).first()
+@router.get("/{purchase_id}", response_model=Union[PurchaseDetail, PurchaseWithLines, PurchaseHeader])
+def get_purchase(purchase_id: int, expand: str = "lines.item", db: Session = Depends(get_db)):
+    """Get a specific purchase by ID, with items unless expand says otherwise"""
+    schema, options = _purchase_expansion(expand)
+    purchase = db.query(Purchase).options(*options).filter(Purchase.id == purchase_id).first()
     if not purchase:
         raise HTTPException(status_code=404, detail="Purchase not found")
-    return purchase
+    return Response(content=schema.model_validate(purchase).model_dump_json(), media_type="application/json")
+
+
+def _insert_purchase(
+    db: Session,
+    header: dict,
+    lines: List[Tuple[int, float, float]],
+    items: Dict[int, Item]
+) -> Tuple[int, float]:
+    """
+    Write a purchase, its lines, the stock increments and audit entries (not committed).
+
+    `header` holds the Purchase columns other than the total, `lines` are
+    validated (item_id, quantity, purchase_price) tuples and `items` the
+    loaded items they refer to. Lines go in with one executemany INSERT and
+    stock with one UPDATE. Returns (purchase id, total amount).
+    """
+    total_amount = sum(quantity * purchase_price for _, quantity, purchase_price in lines)
+    
+    # Create purchase
+    db_purchase = Purchase(total_amount=total_amount, **header)
+    db.add(db_purchase)
+    db.flush()  # Get the purchase ID
+    
+    # Create purchase items and add stock
+    db.execute(insert(PurchaseItem), [
+        {
+            "purchase_id": db_purchase.id,
+            "item_id": item_id,
+            "quantity": quantity,
+            "purchase_price": purchase_price
+        }
+        for item_id, quantity, purchase_price in lines
+    ])
+    added = quantities_by_item((item_id, quantity) for item_id, quantity, _ in lines)
+    apply_stock_deltas(db, added)
+    stock_ledger.record_movements(db, stock_ledger.movement_rows(
+        stock_ledger.PURCHASE, added, db_purchase.id, db_purchase.purchase_date
+    ))
+    
+    # Stock changes and the purchase itself are audited in the same transaction
+    audit_entries = [
+        {
+            "table_name": "items",
+            "record_id": item_id,
+            "operation": "UPDATE",
+            "old_data": {"stock_quantity": items[item_id].stock_quantity},
+            "new_data": {"stock_quantity": items[item_id].stock_quantity + quantity}
+        }
+        for item_id, quantity in added.items()
+    ]
+    audit_entries.append({
+        "table_name": "purchases",
+        "record_id": db_purchase.id,
+        "operation": "INSERT",
+        "new_data": {
+            "total_amount": total_amount,
+            "items_count": len(lines)
+        }
+    })
+    log_operations(db, audit_entries, commit=False)
+    
+    return db_purchase.id, total_amount
 
 
 @router.post("/", response_model=PurchaseSchema, status_code=status.HTTP_201_CREATED)
 def create_purchase(purchase: PurchaseCreate, db: Session = Depends(get_db)):
     """Create a new purchase and add stock"""
     try:
-        # Calculate total
-        total_amount = sum(item.quantity * item.purchase_price for item in purchase.items)
-        
         # Validate items exist
+        items = load_items(db, (item_data.item_id for item_data in purchase.items))
         for item_data in purchase.items:
-            item = db.query(Item).filter(Item.id == item_data.item_id).first()
-            if not item:
+            if item_data.item_id not in items:
                 raise HTTPException(status_code=404, detail=f"Item {item_data.item_id} not found")
         
-        # Create purchase
-        db_purchase = Purchase(
-            supplier_id=purchase.supplier_id,
-            invoice_number=purchase.invoice_number,
-            purchase_date=purchase.purchase_date,
-            total_amount=total_amount,
-            notes=purchase.notes
+        purchase_id, total_amount = _insert_purchase(
+            db,
+            purchase.model_dump(exclude={"items"}),
+            [(item_data.item_id, item_data.quantity, item_data.purchase_price) for item_data in purchase.items],
+            items
         )
-        db.add(db_purchase)
-        db.flush()  # Get the purchase ID
-        
-        # Create purchase items and add stock
-        for item_data in purchase.items:
-            item = db.query(Item).filter(Item.id == item_data.item_id).first()
-            
-            purchase_item = PurchaseItem(
-                purchase_id=db_purchase.id,
-                item_id=item_data.item_id,
-                quantity=item_data.quantity,
-                purchase_price=item_data.purchase_price
-            )
-            db.add(purchase_item)
-            
-            # Add stock
-            old_stock = item.stock_quantity
-            item.stock_quantity += item_data.quantity
-            
-            # Log stock change
-            log_operation(
-                db=db,
-                table_name="items",
-                record_id=item.id,
-                operation="UPDATE",
-                old_data={"stock_quantity": old_stock},
-                new_data={"stock_quantity": item.stock_quantity}
-            )
-        
         db.commit()
-        db.refresh(db_purchase)
-        
-        # Log purchase creation
-        log_operation(
-            db=db,
-            table_name="purchases",
-            record_id=db_purchase.id,
-            operation="INSERT",
-            new_data={
-                "total_amount": total_amount,
-                "items_count": len(purchase.items)
-            }
-        )
         
-        logger.info(f"Created purchase ID: {db_purchase.id}, Total: ₹{total_amount:.2f}")
+        db_purchase = db.query(Purchase).options(
+            *PURCHASE_EXPANSIONS["lines.item"][1]
+        ).filter(Purchase.id == purchase_id).one()
+        
+        logger.info(f"Created purchase ID: {purchase_id}, Total: ₹{total_amount:.2f}")
         return db_purchase
         
     except HTTPException:
@@ -136,47 +202,156 @@ def create_purchase(purchase: PurchaseCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/import", response_model=PurchaseImportResult, status_code=status.HTTP_201_CREATED)
+def import_purchase(
+    file: UploadFile = File(...),
+    supplier_id: Optional[int] = Form(None),
+    invoice_number: Optional[str] = Form(None, max_length=100),
+    purchase_date: Optional[datetime] = Form(None),
+    notes: Optional[str] = Form(None),
+    skip_invalid: bool = Form(False),
+    db: Session = Depends(get_db)
+):
+    """
+    Create a purchase from a supplier invoice file (.csv, .tsv or .xlsx).
+
+    The file needs a header row with SKU, quantity and price columns (common
+    spellings such as "Qty" or "Rate" are recognised). Rows are streamed,
+    all SKUs are resolved with bulk lookups, and the purchase, its lines and
+    the stock increments are written set-wise in one transaction.
+
+    Any bad row (unknown SKU, missing or invalid quantity/price) rejects the
+    whole invoice with 422 and the row-level error report, unless
+    skip_invalid is set, in which case the valid rows are imported and the
+    errors returned alongside the new purchase.
+    """
+    try:
+        try:
+            lines, errors, rows_total = parse_invoice(file.file, file.filename)
+        except InvoiceFormatError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        items = items_by_sku(db, (line.sku for line in lines))
+        resolved = []
+        for line in lines:
+            item = items.get(line.sku)
+            if item is None:
+                errors.append({"row": line.row, "sku": line.sku, "error": "Unknown SKU"})
+            else:
+                resolved.append((item.id, line.quantity, line.purchase_price))
+        errors.sort(key=lambda error: error["row"])
+        
+        report = {
+            "rows_total": rows_total,
+            "rows_imported": 0,
+            "rows_failed": len(errors),
+            "errors": errors[:IMPORT_MAX_ERRORS]
+        }
+        if errors and not skip_invalid:
+            raise HTTPException(status_code=422, detail={"message": "Invoice has invalid rows; nothing was imported", **report})
+        if not resolved:
+            raise HTTPException(status_code=422, detail={"message": "Invoice has no importable rows", **report})
+        
+        header = {
+            "supplier_id": supplier_id,
+            "invoice_number": invoice_number,
+            "purchase_date": purchase_date or datetime.now(),
+            "notes": notes
+        }
+        purchase_id, total_amount = _insert_purchase(
+            db, header, resolved, {item.id: item for item in items.values()}
+        )
+        db.commit()
+        
+        logger.info(
+            f"Imported purchase ID: {purchase_id} from {file.filename}: "
+            f"{len(resolved)} rows, {len(errors)} skipped, Total: ₹{total_amount:.2f}"
+        )
+        return {
+            **report,
+            "purchase_id": purchase_id,
+            "total_amount": total_amount,
+            "rows_imported": len(resolved)
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error importing purchase: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.delete("/{purchase_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_purchase(purchase_id: int, db: Session = Depends(get_db)):
-    """Delete a purchase and deduct stock"""
+    """
+    Delete a purchase and deduct its stock again.
+
+    Every line is checked for negative stock up front, before anything is
+    changed. The deduction is then a single conditional UPDATE, so a sale
+    taking the stock in between fails the whole deletion (409) instead of
+    leaving it half done. Ledger and audit entries are written in bulk.
+    """
     try:
-        db_purchase = db.query(Purchase).filter(Purchase.id == purchase_id).first()
+        db_purchase = db.query(Purchase).options(
+            selectinload(Purchase.purchase_items)
+        ).filter(Purchase.id == purchase_id).first()
         if not db_purchase:
             raise HTTPException(status_code=404, detail="Purchase not found")
         
-        # Deduct stock for all items
-        for purchase_item in db_purchase.purchase_items:
-            item = db.query(Item).filter(Item.id == purchase_item.item_id).first()
-            if item:
-                old_stock = item.stock_quantity
-                item.stock_quantity -= purchase_item.quantity
-                
-                # Prevent negative stock
-                if item.stock_quantity < 0:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Cannot delete purchase: would result in negative stock for item {item.sku}"
-                    )
-                
-                log_operation(
-                    db=db,
-                    table_name="items",
-                    record_id=item.id,
-                    operation="UPDATE",
-                    old_data={"stock_quantity": old_stock},
-                    new_data={"stock_quantity": item.stock_quantity}
-                )
-        
-        db.delete(db_purchase)
-        db.commit()
+        # Deduct stock for all items that still exist
+        items = load_items(db, (line.item_id for line in db_purchase.purchase_items))
+        deducted = {
+            item_id: quantity
+            for item_id, quantity in quantities_by_item(
+                (line.item_id, line.quantity) for line in db_purchase.purchase_items
+            ).items()
+            if item_id in items
+        }
         
-        log_operation(
-            db=db,
-            table_name="purchases",
-            record_id=purchase_id,
-            operation="DELETE",
-            old_data={"total_amount": db_purchase.total_amount}
-        )
+        # Prevent negative stock
+        short = [items[item_id].sku for item_id, quantity in deducted.items() if items[item_id].stock_quantity < quantity]
+        if short:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Cannot delete purchase: would result in negative stock for item {', '.join(str(sku) for sku in short)}"
+            )
+        
+        try:
+            deduct_stock(db, deducted)
+        except StockConflictError as e:
+            db.rollback()
+            logger.warning(f"Purchase {purchase_id} deletion lost a stock race: {str(e)}")
+            raise HTTPException(
+                status_code=409,
+                detail="Stock was changed by a sale while this purchase was being deleted. Please try again."
+            )
+        stock_ledger.record_movements(db, stock_ledger.movement_rows(
+            stock_ledger.PURCHASE_REVERSAL, {item_id: -quantity for item_id, quantity in deducted.items()}, purchase_id,
+            db_purchase.purchase_date
+        ))
+        
+        audit_entries = [
+            {
+                "table_name": "items",
+                "record_id": item_id,
+                "operation": "UPDATE",
+                "old_data": {"stock_quantity": items[item_id].stock_quantity},
+                "new_data": {"stock_quantity": items[item_id].stock_quantity - quantity}
+            }
+            for item_id, quantity in deducted.items()
+        ]
+        audit_entries.append({
+            "table_name": "purchases",
+            "record_id": purchase_id,
+            "operation": "DELETE",
+            "old_data": {"total_amount": db_purchase.total_amount}
+        })
+        log_operations(db, audit_entries, commit=False)
+        
+        db.execute(delete(PurchaseItem).where(PurchaseItem.purchase_id == purchase_id))
+        db.execute(delete(Purchase).where(Purchase.id == purchase_id))
+        db.commit()
         
         logger.info(f"Deleted purchase ID: {purchase_id} and deducted stock")
         
@@ -1,11 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.database import get_db
 from app.models.models import Quality
 from app.schemas.category import QualityCreate, QualityUpdate, Quality as QualitySchema
-from app.utils.audit_logger import log_operation
 from app.utils.logger_config import get_logger
+from app.utils.http_cache import conditional_get
 
 router = APIRouter()
 logger = get_logger()
@@ -13,12 +13,17 @@ logger = get_logger()
 
 @router.get("/", response_model=List[QualitySchema])
 def get_qualities(
+    request: Request,
+    response: Response,
     category_id: Optional[int] = None,
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db)
 ):
     """Get all qualities, optionally filtered by category"""
+    not_modified = conditional_get(request, response, ("qualities",))
+    if not_modified:
+        return not_modified
     try:
         query = db.query(Quality)
         if category_id:
@@ -32,8 +37,11 @@ def get_qualities(
 
 
 @router.get("/{quality_id}", response_model=QualitySchema)
-def get_quality(quality_id: int, db: Session = Depends(get_db)):
+def get_quality(quality_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
     """Get a specific quality by ID"""
+    not_modified = conditional_get(request, response, ("qualities",))
+    if not_modified:
+        return not_modified
     quality = db.query(Quality).filter(Quality.id == quality_id).first()
     if not quality:
         raise HTTPException(status_code=404, detail="Quality not found")
@@ -49,14 +57,6 @@ def create_quality(quality: QualityCreate, db: Session = Depends(get_db)):
         db.commit()
         db.refresh(db_quality)
         
-        log_operation(
-            db=db,
-            table_name="qualities",
-            record_id=db_quality.id,
-            operation="INSERT",
-            new_data=quality.model_dump()
-        )
-        
         logger.info(f"Created quality: {db_quality.name} (ID: {db_quality.id})")
         return db_quality
         
@@ -78,7 +78,6 @@ def update_quality(
         if not db_quality:
             raise HTTPException(status_code=404, detail="Quality not found")
         
-        old_data = {"name": db_quality.name, "description": db_quality.description}
         update_data = quality.model_dump(exclude_unset=True)
         
         for field, value in update_data.items():
@@ -87,15 +86,6 @@ def update_quality(
         db.commit()
         db.refresh(db_quality)
         
-        log_operation(
-            db=db,
-            table_name="qualities",
-            record_id=db_quality.id,
-            operation="UPDATE",
-            old_data=old_data,
-            new_data=update_data
-        )
-        
         logger.info(f"Updated quality: {db_quality.name} (ID: {db_quality.id})")
         return db_quality
         
@@ -113,19 +103,11 @@ def delete_quality(quality_id: int, db: Session = Depends(get_db)):
         if not db_quality:
             raise HTTPException(status_code=404, detail="Quality not found")
         
-        old_data = {"name": db_quality.name, "description": db_quality.description}
+        name = db_quality.name
         db.delete(db_quality)
         db.commit()
         
-        log_operation(
-            db=db,
-            table_name="qualities",
-            record_id=quality_id,
-            operation="DELETE",
-            old_data=old_data
-        )
-        
-        logger.info(f"Deleted quality: {old_data['name']} (ID: {quality_id})")
+        logger.info(f"Deleted quality: {name} (ID: {quality_id})")
         
     except Exception as e:
         db.rollback()
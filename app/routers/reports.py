@@ -0,0 +1,283 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import Date, case, cast, func, select
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import date, datetime, time, timedelta
+from app.database import get_db
+from app.models.models import (
+    Category, Quality, Size, Item, Supplier, Purchase, PurchaseItem,
+    SalesDailyTotal, SalesDailyRollup, SalesDailyGstRollup
+)
+from app.schemas.report import (
+    SalesPeriodReport, TopItemsReport, GstReport, SupplierPurchasesReport, StockValuationReport
+)
+from app.utils.http_cache import conditional_get
+from app.utils.logger_config import get_logger
+from app.utils.query_cache import filter_signature, report_cache
+
+router = APIRouter()
+logger = get_logger()
+
+# Each report is one aggregated query; results are cached per parameters in
+# report_cache and go stale when any of the tables listed here is written.
+# Sales reports read the daily rollups, which are versioned through
+# "sales_daily_totals", so a rollup rebuild invalidates them too; purchase
+# lines are versioned through "purchases".
+SALES_REPORT_TABLES = ("sales_daily_totals",)
+TOP_ITEMS_TABLES = ("sales_daily_totals", "items", "categories", "qualities", "sizes")
+SUPPLIER_REPORT_TABLES = ("purchases", "suppliers")
+STOCK_VALUATION_TABLES = ("items", "purchases", "categories")
+
+PERIODS = ("day", "week", "month")
+
+
+def _period_start(db: Session, column, period: str):
+    """First day of the day/week (Monday)/month containing `column`"""
+    if period == "day":
+        return column
+    if db.get_bind().dialect.name == "postgresql":
+        return cast(func.date_trunc(period, column), Date)
+    if period == "week":
+        return func.date(column, "weekday 0", "-6 days")
+    return func.date(column, "start of month")
+
+
+def _in_period(column, start_date: Optional[date], end_date: Optional[date]):
+    conditions = []
+    if start_date:
+        conditions.append(column >= start_date)
+    if end_date:
+        conditions.append(column <= end_date)
+    return conditions
+
+
+@router.get("/sales", response_model=SalesPeriodReport)
+def sales_by_period(
+    request: Request,
+    response: Response,
+    period: str = "day",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db)
+):
+    """Sale count and amounts per day, week (starting Monday) or month; both dates inclusive"""
+    if period not in PERIODS:
+        raise HTTPException(status_code=400, detail=f"Invalid period: {period} (use day, week or month)")
+    not_modified = conditional_get(request, response, SALES_REPORT_TABLES)
+    if not_modified:
+        return not_modified
+
+    def compute():
+        period_start = _period_start(db, SalesDailyTotal.sale_day, period).label("period_start")
+        rows = db.execute(
+            select(
+                period_start,
+                func.sum(SalesDailyTotal.sales_count).label("sales_count"),
+                func.sum(SalesDailyTotal.subtotal).label("subtotal"),
+                func.sum(SalesDailyTotal.gst_amount).label("gst_amount"),
+                func.sum(SalesDailyTotal.discount).label("discount"),
+                func.sum(SalesDailyTotal.total_amount).label("total_amount")
+            ).where(
+                *_in_period(SalesDailyTotal.sale_day, start_date, end_date)
+            ).group_by(period_start).order_by(period_start)
+        ).mappings().all()
+        return {
+            "period": period,
+            "start_date": start_date,
+            "end_date": end_date,
+            "rows": [dict(row) for row in rows]
+        }
+
+    try:
+        key = filter_signature("report-sales", period=period, start_date=start_date, end_date=end_date)
+        return report_cache.get_or_compute(key, SALES_REPORT_TABLES, compute)
+    except Exception as e:
+        logger.error(f"Error building sales report: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/top-items", response_model=TopItemsReport)
+def top_items(
+    request: Request,
+    response: Response,
+    by: str = "revenue",
+    limit: int = Query(10, ge=1, le=100),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db)
+):
+    """Best-selling items by revenue (before GST) or by quantity; both dates inclusive"""
+    if by not in ("revenue", "quantity"):
+        raise HTTPException(status_code=400, detail=f"Invalid by: {by} (use revenue or quantity)")
+    not_modified = conditional_get(request, response, TOP_ITEMS_TABLES)
+    if not_modified:
+        return not_modified
+
+    def compute():
+        # Rank on the rollup alone, then look up names for the top rows only
+        quantity = func.sum(SalesDailyRollup.quantity).label("quantity")
+        revenue = func.sum(SalesDailyRollup.revenue).label("revenue")
+        ranked = select(
+            SalesDailyRollup.item_id,
+            quantity,
+            revenue,
+            func.sum(SalesDailyRollup.gst_amount).label("gst_amount")
+        ).where(
+            *_in_period(SalesDailyRollup.sale_day, start_date, end_date)
+        ).group_by(SalesDailyRollup.item_id).order_by(
+            (revenue if by == "revenue" else quantity).desc(), SalesDailyRollup.item_id
+        ).limit(limit).subquery()
+        rows = db.execute(
+            select(
+                ranked.c.item_id,
+                Item.sku,
+                Category.name.label("category_name"),
+                Quality.name.label("quality_name"),
+                Size.size_display,
+                ranked.c.quantity,
+                ranked.c.revenue,
+                ranked.c.gst_amount
+            ).select_from(ranked).outerjoin(Item, Item.id == ranked.c.item_id).outerjoin(
+                Category, Category.id == Item.category_id
+            ).outerjoin(Quality, Quality.id == Item.quality_id).outerjoin(
+                Size, Size.id == Item.size_id
+            ).order_by(ranked.c[by].desc(), ranked.c.item_id)
+        ).mappings().all()
+        return {"by": by, "start_date": start_date, "end_date": end_date, "rows": [dict(row) for row in rows]}
+
+    try:
+        key = filter_signature("report-top-items", by=by, limit=limit, start_date=start_date, end_date=end_date)
+        return report_cache.get_or_compute(key, TOP_ITEMS_TABLES, compute)
+    except Exception as e:
+        logger.error(f"Error building top items report: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/gst", response_model=GstReport)
+def gst_collected(
+    request: Request,
+    response: Response,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db)
+):
+    """Taxable amount and GST collected per GST rate; both dates inclusive"""
+    not_modified = conditional_get(request, response, SALES_REPORT_TABLES)
+    if not_modified:
+        return not_modified
+
+    def compute():
+        rows = db.execute(
+            select(
+                SalesDailyGstRollup.gst_percentage,
+                func.sum(SalesDailyGstRollup.taxable_amount).label("taxable_amount"),
+                func.sum(SalesDailyGstRollup.gst_amount).label("gst_amount"),
+                func.sum(SalesDailyGstRollup.line_count).label("line_count")
+            ).where(
+                *_in_period(SalesDailyGstRollup.sale_day, start_date, end_date)
+            ).group_by(SalesDailyGstRollup.gst_percentage).order_by(SalesDailyGstRollup.gst_percentage)
+        ).mappings().all()
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "taxable_amount": sum(row["taxable_amount"] for row in rows),
+            "gst_amount": sum(row["gst_amount"] for row in rows),
+            "rows": [dict(row) for row in rows]
+        }
+
+    try:
+        key = filter_signature("report-gst", start_date=start_date, end_date=end_date)
+        return report_cache.get_or_compute(key, SALES_REPORT_TABLES, compute)
+    except Exception as e:
+        logger.error(f"Error building GST report: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/purchases-by-supplier", response_model=SupplierPurchasesReport)
+def purchases_by_supplier(
+    request: Request,
+    response: Response,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db)
+):
+    """Number and value of purchases per supplier, largest first; both dates inclusive"""
+    not_modified = conditional_get(request, response, SUPPLIER_REPORT_TABLES)
+    if not_modified:
+        return not_modified
+
+    def compute():
+        conditions = []
+        if start_date:
+            conditions.append(Purchase.purchase_date >= datetime.combine(start_date, time.min))
+        if end_date:
+            conditions.append(Purchase.purchase_date < datetime.combine(end_date + timedelta(days=1), time.min))
+        total_amount = func.sum(Purchase.total_amount).label("total_amount")
+        rows = db.execute(
+            select(
+                Purchase.supplier_id,
+                Supplier.name.label("supplier_name"),
+                func.count(Purchase.id).label("purchase_count"),
+                total_amount
+            ).select_from(Purchase).outerjoin(Supplier, Supplier.id == Purchase.supplier_id).where(
+                *conditions
+            ).group_by(Purchase.supplier_id, Supplier.name).order_by(total_amount.desc())
+        ).mappings().all()
+        return {"start_date": start_date, "end_date": end_date, "rows": [dict(row) for row in rows]}
+
+    try:
+        key = filter_signature("report-suppliers", start_date=start_date, end_date=end_date)
+        return report_cache.get_or_compute(key, SUPPLIER_REPORT_TABLES, compute)
+    except Exception as e:
+        logger.error(f"Error building supplier purchases report: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/stock-valuation", response_model=StockValuationReport)
+def stock_valuation(
+    request: Request,
+    response: Response,
+    category_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Current stock per category valued at selling price and at the weighted
+    average purchase price of each item.
+    """
+    not_modified = conditional_get(request, response, STOCK_VALUATION_TABLES)
+    if not_modified:
+        return not_modified
+
+    def compute():
+        average_cost = select(
+            PurchaseItem.item_id,
+            (func.sum(PurchaseItem.quantity * PurchaseItem.purchase_price) / func.sum(PurchaseItem.quantity)).label("cost")
+        ).group_by(PurchaseItem.item_id).subquery()
+        query = select(
+            Item.category_id,
+            Category.name.label("category_name"),
+            func.count(Item.id).label("item_count"),
+            func.sum(Item.stock_quantity).label("stock_quantity"),
+            func.sum(Item.stock_quantity * Item.selling_price).label("selling_value"),
+            func.sum(Item.stock_quantity * func.coalesce(average_cost.c.cost, 0.0)).label("cost_value"),
+            func.sum(case((average_cost.c.cost.is_(None), 1), else_=0)).label("items_without_cost")
+        ).select_from(Item).join(Category, Category.id == Item.category_id).outerjoin(
+            average_cost, average_cost.c.item_id == Item.id
+        ).group_by(Item.category_id, Category.name).order_by(Category.name)
+        if category_id is not None:
+            query = query.where(Item.category_id == category_id)
+        rows = db.execute(query).mappings().all()
+        return {
+            "item_count": sum(row["item_count"] for row in rows),
+            "stock_quantity": sum(row["stock_quantity"] for row in rows),
+            "selling_value": sum(row["selling_value"] for row in rows),
+            "cost_value": sum(row["cost_value"] for row in rows),
+            "rows": [dict(row) for row in rows]
+        }
+
+    try:
+        key = filter_signature("report-stock-valuation", category_id=category_id)
+        return report_cache.get_or_compute(key, STOCK_VALUATION_TABLES, compute)
+    except Exception as e:
+        logger.error(f"Error building stock valuation report: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,27 +1,64 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session, joinedload, selectinload
+from typing import Dict, List, Optional, Tuple, Union
+from datetime import date, datetime
 from app.database import get_db
 from app.models.models import Sale, SaleItem, Item
-from app.schemas.sale import SaleCreate, SaleUpdate, Sale as SaleSchema, SaleDetail
+from app.schemas.sale import (
+    SaleCreate, SaleUpdate, Sale as SaleSchema, SaleDetail, SaleHeader, SaleWithLines,
+    SaleBatchCreate, SaleBatchResponse, SalesSummary
+)
 from app.schemas.common import PaginatedResponse
-from app.utils.audit_logger import log_operation
+from app.utils.audit_logger import log_operations
 from app.utils.logger_config import get_logger
+from app.utils.query_cache import filter_signature, get_cached_count
+from app.utils.stock import StockConflictError, apply_stock_deltas, deduct_stock, load_items, quantities_by_item
+from app.utils import sales_rollup, stock_ledger
 
 router = APIRouter()
 logger = get_logger()
 
+# Everything the fully nested Sale schema serialises, fetched with one query per level
+_SALE_LINES_WITH_ITEMS = selectinload(Sale.sale_items).selectinload(SaleItem.item).options(
+    joinedload(Item.category), joinedload(Item.quality), joinedload(Item.size)
+)
 
-@router.get("/", response_model=PaginatedResponse[SaleSchema])
+# expand= value -> (response schema, loader options for exactly what it serialises)
+SALE_EXPANSIONS = {
+    "none": (SaleHeader, ()),
+    "lines": (SaleWithLines, (selectinload(Sale.sale_items),)),
+    "lines.item": (SaleSchema, (_SALE_LINES_WITH_ITEMS,)),
+}
+
+
+def _sale_expansion(expand: str):
+    if expand not in SALE_EXPANSIONS:
+        raise HTTPException(status_code=400, detail=f"Invalid expand: {expand} (use none, lines or lines.item)")
+    return SALE_EXPANSIONS[expand]
+
+
+@router.get(
+    "/",
+    response_model=Union[PaginatedResponse[SaleSchema], PaginatedResponse[SaleWithLines], PaginatedResponse[SaleHeader]]
+)
 def get_sales(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     page: int = 1,
     limit: int = 20,
+    expand: str = "lines.item",
     db: Session = Depends(get_db)
 ):
-    """Get all sales with optional date filters and pagination"""
+    """
+    Get all sales with optional date filters and pagination.
+
+    expand picks the shape of each sale: "none" (header only), "lines" (with
+    its lines) or "lines.item" (lines with their items, the default). The
+    related rows are eager-loaded, so a page costs the same few queries
+    whatever its size.
+    """
+    schema, options = _sale_expansion(expand)
     try:
         query = db.query(Sale)
         
@@ -34,165 +71,386 @@ def get_sales(
              query = query.filter(Sale.sale_date <= end_date)
         
         # Calculate total before pagination
-        total = query.count()
+        count_key = filter_signature("sales", start_date=start_date, end_date=end_date)
+        total, total_is_estimate = get_cached_count(count_key, ("sales",), query.count)
         
         # Apply pagination
         skip = (page - 1) * limit
-        sales = query.order_by(Sale.sale_date.desc()).offset(skip).limit(limit).all()
+        sales = query.options(*options).order_by(Sale.sale_date.desc()).offset(skip).limit(limit).all()
         
-        return {
-            "items": sales,
-            "total": total,
-            "page": page,
-            "limit": limit
-        }
+        page_body = PaginatedResponse[schema](
+            items=sales,
+            total=total,
+            page=page,
+            limit=limit,
+            total_is_estimate=total_is_estimate
+        )
+        return Response(content=page_body.model_dump_json(), media_type="application/json")
     except Exception as e:
         logger.error(f"Error retrieving sales: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/{sale_id}", response_model=SaleDetail)
-def get_sale(sale_id: int, db: Session = Depends(get_db)):
-    """Get a specific sale by ID with items"""
-    sale = db.query(Sale).filter(Sale.id == sale_id).first()
+@router.get("/summary", response_model=SalesSummary)
+def get_sales_summary(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    top_items: int = 10,
+    db: Session = Depends(get_db)
+):
+    """
+    Sales totals for a period of days (both ends inclusive), with per-day
+    totals, per-GST-rate totals and the best-selling items by revenue.
+    Read from the daily rollups, so the cost grows with the number of days,
+    not the number of sales.
+    """
+    try:
+        return sales_rollup.sales_summary(db, start_date, end_date, top_items)
+    except Exception as e:
+        logger.error(f"Error retrieving sales summary: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{sale_id}", response_model=Union[SaleDetail, SaleWithLines, SaleHeader])
+def get_sale(sale_id: int, expand: str = "lines.item", db: Session = Depends(get_db)):
+    """Get a specific sale by ID, with items unless expand says otherwise"""
+    schema, options = _sale_expansion(expand)
+    sale = db.query(Sale).options(*options).filter(Sale.id == sale_id).first()
     if not sale:
         raise HTTPException(status_code=404, detail="Sale not found")
-    return sale
+    return Response(content=schema.model_validate(sale).model_dump_json(), media_type="application/json")
+
+
+# Attempts at a sale whose conditional stock deduction lost a race with another counter
+SALE_STOCK_ATTEMPTS = 3
+
+EMPTY_SALE_ERROR = "A sale needs at least one item"
+
+
+def _stock_problem(items: Dict[int, Item], requested: Dict[int, float], available: Dict[int, float]):
+    """(status code, message) for the first line that cannot be served from `available`, else None"""
+    for item_id, quantity in requested.items():
+        item = items.get(item_id)
+        if not item:
+            return 404, f"Item {item_id} not found"
+        
+        # Check stock availability
+        if available[item_id] < quantity:
+            return 400, f"Insufficient stock for item {item.sku}. Available: {available[item_id]}, Requested: {quantity}"
+    return None
+
+
+def _price_sale(sale: SaleCreate) -> Tuple[float, float, float, List[dict]]:
+    """(subtotal, gst amount, total amount, sale_items rows without sale_id) for a sale"""
+    subtotal = 0.0
+    gst_amount = 0.0
+    line_rows = []
+    for item_data in sale.items:
+        line_total = item_data.quantity * item_data.unit_price
+        gst = line_total * (item_data.gst_percentage / 100)
+        
+        subtotal += line_total
+        gst_amount += gst
+        line_rows.append({
+            "item_id": item_data.item_id,
+            "quantity": item_data.quantity,
+            "unit_price": item_data.unit_price,
+            "gst_percentage": item_data.gst_percentage,
+            "line_total": line_total + gst
+        })
+    
+    # Apply discount
+    total_amount = subtotal + gst_amount - sale.discount
+    return subtotal, gst_amount, total_amount, line_rows
+
+
+def _stock_audit_entries(items: Dict[int, Item], deducted: Dict[int, float]) -> List[dict]:
+    """Audit entries for stock deductions; old values are as validated (a race would have failed the deduction)"""
+    return [
+        {
+            "table_name": "items",
+            "record_id": item_id,
+            "operation": "UPDATE",
+            "old_data": {"stock_quantity": items[item_id].stock_quantity},
+            "new_data": {"stock_quantity": items[item_id].stock_quantity - quantity}
+        }
+        for item_id, quantity in deducted.items()
+    ]
+
+
+def _insert_sale(db: Session, sale: SaleCreate) -> Tuple[int, float]:
+    """
+    Validate stock and write one sale in the current transaction (not committed).
+
+    Returns (sale id, total amount).
+    Raises StockConflictError when another transaction took the stock after
+    validation; the caller rolls back and may retry.
+    """
+    if not sale.items:
+        raise HTTPException(status_code=400, detail=EMPTY_SALE_ERROR)
+    
+    items = load_items(db, (line.item_id for line in sale.items))
+    requested = quantities_by_item((line.item_id, line.quantity) for line in sale.items)
+    
+    # Validate items and check stock
+    problem = _stock_problem(items, requested, {item.id: item.stock_quantity for item in items.values()})
+    if problem:
+        raise HTTPException(status_code=problem[0], detail=problem[1])
+    
+    subtotal, gst_amount, total_amount, line_rows = _price_sale(sale)
+    
+    # Deduct stock first: the conditional UPDATE re-checks availability in
+    # the database, and takes the write lock before anything else is written
+    deduct_stock(db, requested)
+    
+    # Create sale
+    db_sale = Sale(
+        sale_date=sale.sale_date,
+        subtotal=subtotal,
+        gst_amount=gst_amount,
+        discount=sale.discount,
+        total_amount=total_amount
+    )
+    db.add(db_sale)
+    db.flush()  # Get the sale ID
+    
+    # Create sale items
+    for row in line_rows:
+        row["sale_id"] = db_sale.id
+    db.execute(insert(SaleItem), line_rows)
+    stock_ledger.record_movements(db, stock_ledger.movement_rows(
+        stock_ledger.SALE, {item_id: -quantity for item_id, quantity in requested.items()}, db_sale.id, sale.sale_date
+    ))
+    sales_rollup.apply_sales(db, [(sale.sale_date, sale.discount, line_rows)])
+    
+    # Stock changes and the sale itself are audited in the same transaction
+    audit_entries = _stock_audit_entries(items, requested)
+    audit_entries.append({
+        "table_name": "sales",
+        "record_id": db_sale.id,
+        "operation": "INSERT",
+        "new_data": {
+            "total_amount": total_amount,
+            "items_count": len(sale.items)
+        }
+    })
+    log_operations(db, audit_entries, commit=False)
+    
+    return db_sale.id, total_amount
 
 
 @router.post("/", response_model=SaleSchema, status_code=status.HTTP_201_CREATED)
 def create_sale(sale: SaleCreate, db: Session = Depends(get_db)):
-    """Create a new sale and deduct stock"""
+    """
+    Create a new sale and deduct stock.
+
+    All referenced items are loaded with one query and validated in memory
+    (repeated lines of an item are checked against its stock together). Stock
+    is deducted with one conditional UPDATE that only succeeds while enough
+    is left, so concurrent counters can never oversell. A sale that loses
+    that race is rolled back and re-validated against fresh stock, up to
+    SALE_STOCK_ATTEMPTS times, before giving up with 409.
+    """
     try:
-        # Calculate totals
-        subtotal = 0.0
-        gst_amount = 0.0
-        
-        # Validate items and check stock
-        for item_data in sale.items:
-            item = db.query(Item).filter(Item.id == item_data.item_id).first()
-            if not item:
-                raise HTTPException(status_code=404, detail=f"Item {item_data.item_id} not found")
-            
-            # Check stock availability
-            if item.stock_quantity < item_data.quantity:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Insufficient stock for item {item.sku}. Available: {item.stock_quantity}, Requested: {item_data.quantity}"
-                )
-            
-            # Calculate line total
-            line_total = item_data.quantity * item_data.unit_price
-            gst = line_total * (item_data.gst_percentage / 100)
-            
-            subtotal += line_total
-            gst_amount += gst
-        
-        # Apply discount
-        total_amount = subtotal + gst_amount - sale.discount
-        
-        # Create sale
-        db_sale = Sale(
-            sale_date=sale.sale_date,
-            subtotal=subtotal,
-            gst_amount=gst_amount,
-            discount=sale.discount,
-            total_amount=total_amount
-        )
-        db.add(db_sale)
-        db.flush()  # Get the sale ID
-        
-        # Create sale items and deduct stock
-        for item_data in sale.items:
-            item = db.query(Item).filter(Item.id == item_data.item_id).first()
-            
-            line_total = item_data.quantity * item_data.unit_price
-            gst = line_total * (item_data.gst_percentage / 100)
-            
-            sale_item = SaleItem(
-                sale_id=db_sale.id,
-                item_id=item_data.item_id,
-                quantity=item_data.quantity,
-                unit_price=item_data.unit_price,
-                gst_percentage=item_data.gst_percentage,
-                line_total=line_total + gst
-            )
-            db.add(sale_item)
-            
-            # Deduct stock
-            old_stock = item.stock_quantity
-            item.stock_quantity -= item_data.quantity
-            
-            # Log stock change
-            log_operation(
-                db=db,
-                table_name="items",
-                record_id=item.id,
-                operation="UPDATE",
-                old_data={"stock_quantity": old_stock},
-                new_data={"stock_quantity": item.stock_quantity}
+        for attempt in range(1, SALE_STOCK_ATTEMPTS + 1):
+            try:
+                sale_id, total_amount = _insert_sale(db, sale)
+                db.commit()
+                break
+            except StockConflictError as e:
+                db.rollback()
+                logger.warning(f"Sale stock conflict (attempt {attempt}/{SALE_STOCK_ATTEMPTS}): {str(e)}")
+        else:
+            raise HTTPException(
+                status_code=409,
+                detail="Stock was changed by another sale while this one was being saved. Please try again."
             )
         
-        db.commit()
-        db.refresh(db_sale)
-        
-        # Log sale creation
-        log_operation(
-            db=db,
-            table_name="sales",
-            record_id=db_sale.id,
-            operation="INSERT",
-            new_data={
+        db_sale = db.query(Sale).options(_SALE_LINES_WITH_ITEMS).filter(Sale.id == sale_id).one()
+        
+        logger.info(f"Created sale ID: {sale_id}, Total: ₹{total_amount:.2f}")
+        return db_sale
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error creating sale: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _insert_sales_batch(db: Session, sales: List[SaleCreate]) -> List[dict]:
+    """
+    Validate and write a batch of sales in the current transaction (not committed).
+
+    Sales are checked in order against a running copy of the stock, so an
+    earlier sale in the batch can use up what a later one needs; sales that
+    fail are reported and skipped. Returns the per-sale results. Raises
+    StockConflictError like _insert_sale.
+    """
+    items = load_items(db, (line.item_id for sale in sales for line in sale.items))
+    available = {item.id: item.stock_quantity for item in items.values()}
+    results: List[dict] = []
+    accepted = []
+    
+    for index, sale in enumerate(sales):
+        if not sale.items:
+            results.append({"index": index, "status": "failed", "status_code": 400, "error": EMPTY_SALE_ERROR})
+            continue
+        requested = quantities_by_item((line.item_id, line.quantity) for line in sale.items)
+        problem = _stock_problem(items, requested, available)
+        if problem:
+            results.append({"index": index, "status": "failed", "status_code": problem[0], "error": problem[1]})
+            continue
+        for item_id, quantity in requested.items():
+            available[item_id] -= quantity
+        result = {"index": index, "status": "created"}
+        results.append(result)
+        accepted.append((result, sale, _price_sale(sale)))
+    
+    if not accepted:
+        return results
+    
+    deducted = quantities_by_item(
+        (line.item_id, line.quantity) for _, sale, _ in accepted for line in sale.items
+    )
+    deduct_stock(db, deducted)
+    
+    sale_ids = db.scalars(
+        insert(Sale).returning(Sale.id, sort_by_parameter_order=True),
+        [
+            {
+                "sale_date": sale.sale_date,
+                "subtotal": subtotal,
+                "gst_amount": gst_amount,
+                "discount": sale.discount,
+                "total_amount": total_amount
+            }
+            for _, sale, (subtotal, gst_amount, total_amount, _) in accepted
+        ]
+    ).all()
+    
+    line_rows = []
+    movements = []
+    audit_entries = _stock_audit_entries(items, deducted)
+    for sale_id, (result, sale, (_, _, total_amount, rows)) in zip(sale_ids, accepted):
+        result["sale_id"] = sale_id
+        result["total_amount"] = total_amount
+        for row in rows:
+            row["sale_id"] = sale_id
+        line_rows.extend(rows)
+        movements.extend(stock_ledger.movement_rows(
+            stock_ledger.SALE,
+            {item_id: -quantity for item_id, quantity in quantities_by_item(
+                (line.item_id, line.quantity) for line in sale.items
+            ).items()},
+            sale_id,
+            sale.sale_date
+        ))
+        audit_entries.append({
+            "table_name": "sales",
+            "record_id": sale_id,
+            "operation": "INSERT",
+            "new_data": {
                 "total_amount": total_amount,
                 "items_count": len(sale.items)
             }
-        )
+        })
+    if line_rows:
+        db.execute(insert(SaleItem), line_rows)
+    stock_ledger.record_movements(db, movements)
+    sales_rollup.apply_sales(db, [(sale.sale_date, sale.discount, rows) for _, sale, (_, _, _, rows) in accepted])
+    log_operations(db, audit_entries, commit=False)
+    
+    return results
+
+
+@router.post("/batch", response_model=SaleBatchResponse)
+def create_sales_batch(batch: SaleBatchCreate, db: Session = Depends(get_db)):
+    """
+    Create many sales at once, e.g. when a counter syncs sales queued offline.
+
+    Sales are applied in the order given. Each is validated against the stock
+    left after the ones before it; a sale without lines, with a missing item
+    or with not enough stock is reported as failed and the rest still go through. All accepted
+    sales, their lines, the stock deductions and the audit entries are
+    written with bulk statements in a single transaction.
+    """
+    try:
+        for attempt in range(1, SALE_STOCK_ATTEMPTS + 1):
+            try:
+                results = _insert_sales_batch(db, batch.sales)
+                db.commit()
+                break
+            except StockConflictError as e:
+                db.rollback()
+                logger.warning(f"Sale batch stock conflict (attempt {attempt}/{SALE_STOCK_ATTEMPTS}): {str(e)}")
+        else:
+            raise HTTPException(
+                status_code=409,
+                detail="Stock was changed by another sale while this batch was being saved. Please try again."
+            )
         
-        logger.info(f"Created sale ID: {db_sale.id}, Total: ₹{total_amount:.2f}")
-        return db_sale
+        created = sum(1 for result in results if result["status"] == "created")
+        logger.info(f"Sale batch: {created} created, {len(results) - created} failed")
+        return {"created": created, "failed": len(results) - created, "results": results}
         
     except HTTPException:
         raise
     except Exception as e:
         db.rollback()
-        logger.error(f"Error creating sale: {str(e)}")
+        logger.error(f"Error creating sale batch: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.delete("/{sale_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_sale(sale_id: int, db: Session = Depends(get_db)):
-    """Delete a sale and restore stock"""
+    """
+    Delete a sale and restore stock.
+
+    Stock for all lines is put back with one UPDATE, and the stock ledger,
+    daily rollups and audit entries are written in bulk, all committed
+    together with the deletion.
+    """
     try:
-        db_sale = db.query(Sale).filter(Sale.id == sale_id).first()
+        db_sale = db.query(Sale).options(selectinload(Sale.sale_items)).filter(Sale.id == sale_id).first()
         if not db_sale:
             raise HTTPException(status_code=404, detail="Sale not found")
         
-        # Restore stock for all items
-        for sale_item in db_sale.sale_items:
-            item = db.query(Item).filter(Item.id == sale_item.item_id).first()
-            if item:
-                old_stock = item.stock_quantity
-                item.stock_quantity += sale_item.quantity
-                
-                log_operation(
-                    db=db,
-                    table_name="items",
-                    record_id=item.id,
-                    operation="UPDATE",
-                    old_data={"stock_quantity": old_stock},
-                    new_data={"stock_quantity": item.stock_quantity}
-                )
-        
-        db.delete(db_sale)
-        db.commit()
+        lines = [
+            {
+                "item_id": line.item_id,
+                "quantity": line.quantity,
+                "unit_price": line.unit_price,
+                "gst_percentage": line.gst_percentage
+            }
+            for line in db_sale.sale_items
+        ]
+        # Restore stock for all items that still exist
+        items = load_items(db, (line["item_id"] for line in lines))
+        restored = {
+            item_id: quantity
+            for item_id, quantity in quantities_by_item((line["item_id"], line["quantity"]) for line in lines).items()
+            if item_id in items
+        }
+        apply_stock_deltas(db, restored)
+        stock_ledger.record_movements(db, stock_ledger.movement_rows(
+            stock_ledger.SALE_REVERSAL, restored, sale_id, db_sale.sale_date
+        ))
+        sales_rollup.apply_sales(db, [(db_sale.sale_date, db_sale.discount, lines)], sign=-1)
         
-        log_operation(
-            db=db,
-            table_name="sales",
-            record_id=sale_id,
-            operation="DELETE",
-            old_data={"total_amount": db_sale.total_amount}
-        )
+        audit_entries = _stock_audit_entries(items, {item_id: -quantity for item_id, quantity in restored.items()})
+        audit_entries.append({
+            "table_name": "sales",
+            "record_id": sale_id,
+            "operation": "DELETE",
+            "old_data": {"total_amount": db_sale.total_amount}
+        })
+        log_operations(db, audit_entries, commit=False)
+        
+        db.execute(delete(SaleItem).where(SaleItem.sale_id == sale_id))
+        db.execute(delete(Sale).where(Sale.id == sale_id))
+        db.commit()
         
         logger.info(f"Deleted sale ID: {sale_id} and restored stock")
         
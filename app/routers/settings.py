@@ -1,20 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.models.models import Settings as SettingsModel
 from app.schemas.settings import Settings, SettingsCreate, SettingsUpdate
 from app.utils.logger_config import get_logger
+from app.utils.http_cache import conditional_get
 
 router = APIRouter()
 logger = get_logger()
 
 
 @router.get("/", response_model=Settings)
-def get_settings(db: Session = Depends(get_db)):
+def get_settings(request: Request, response: Response, db: Session = Depends(get_db)):
     """
     Get shop settings. Creates default settings if none exist.
     """
+    not_modified = conditional_get(request, response, ("settings",))
+    if not_modified:
+        return not_modified
     settings = db.query(SettingsModel).first()
     
     if not settings:
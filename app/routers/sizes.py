@@ -1,11 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.database import get_db
 from app.models.models import Size
 from app.schemas.category import SizeCreate, SizeUpdate, Size as SizeSchema, SizeBulkCreate
-from app.utils.audit_logger import log_operation
 from app.utils.logger_config import get_logger
+from app.utils.http_cache import conditional_get
 
 router = APIRouter()
 logger = get_logger()
@@ -13,12 +13,17 @@ logger = get_logger()
 
 @router.get("/", response_model=List[SizeSchema])
 def get_sizes(
+    request: Request,
+    response: Response,
     category_id: Optional[int] = None,
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db)
 ):
     """Get all sizes, optionally filtered by category"""
+    not_modified = conditional_get(request, response, ("sizes",))
+    if not_modified:
+        return not_modified
     try:
         query = db.query(Size)
         if category_id:
@@ -32,8 +37,11 @@ def get_sizes(
 
 
 @router.get("/{size_id}", response_model=SizeSchema)
-def get_size(size_id: int, db: Session = Depends(get_db)):
+def get_size(size_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
     """Get a specific size by ID"""
+    not_modified = conditional_get(request, response, ("sizes",))
+    if not_modified:
+        return not_modified
     size = db.query(Size).filter(Size.id == size_id).first()
     if not size:
         raise HTTPException(status_code=404, detail="Size not found")
@@ -49,14 +57,6 @@ def create_size(size: SizeCreate, db: Session = Depends(get_db)):
         db.commit()
         db.refresh(db_size)
         
-        log_operation(
-            db=db,
-            table_name="sizes",
-            record_id=db_size.id,
-            operation="INSERT",
-            new_data=size.model_dump()
-        )
-        
         logger.info(f"Created size: {db_size.size_display} (ID: {db_size.id})")
         return db_size
         
@@ -116,11 +116,6 @@ def update_size(
         if not db_size:
             raise HTTPException(status_code=404, detail="Size not found")
         
-        old_data = {
-            "size_value": db_size.size_value,
-            "size_display": db_size.size_display,
-            "sort_order": db_size.sort_order
-        }
         update_data = size.model_dump(exclude_unset=True)
         
         for field, value in update_data.items():
@@ -129,15 +124,6 @@ def update_size(
         db.commit()
         db.refresh(db_size)
         
-        log_operation(
-            db=db,
-            table_name="sizes",
-            record_id=db_size.id,
-            operation="UPDATE",
-            old_data=old_data,
-            new_data=update_data
-        )
-        
         logger.info(f"Updated size: {db_size.size_display} (ID: {db_size.id})")
         return db_size
         
@@ -155,22 +141,11 @@ def delete_size(size_id: int, db: Session = Depends(get_db)):
         if not db_size:
             raise HTTPException(status_code=404, detail="Size not found")
         
-        old_data = {
-            "size_value": db_size.size_value,
-            "size_display": db_size.size_display
-        }
+        size_display = db_size.size_display
         db.delete(db_size)
         db.commit()
         
-        log_operation(
-            db=db,
-            table_name="sizes",
-            record_id=size_id,
-            operation="DELETE",
-            old_data=old_data
-        )
-        
-        logger.info(f"Deleted size: {old_data['size_display']} (ID: {size_id})")
+        logger.info(f"Deleted size: {size_display} (ID: {size_id})")
         
     except Exception as e:
         db.rollback()
@@ -1,19 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from typing import List
 from app.database import get_db
 from app.models.models import Supplier
 from app.schemas.purchase import SupplierCreate, SupplierUpdate, Supplier as SupplierSchema
-from app.utils.audit_logger import log_operation
 from app.utils.logger_config import get_logger
+from app.utils.http_cache import conditional_get
 
 router = APIRouter()
 logger = get_logger()
 
 
 @router.get("/", response_model=List[SupplierSchema])
-def get_suppliers(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_suppliers(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db)
+):
     """Get all suppliers"""
+    not_modified = conditional_get(request, response, ("suppliers",))
+    if not_modified:
+        return not_modified
     try:
         suppliers = db.query(Supplier).offset(skip).limit(limit).all()
         logger.info(f"Retrieved {len(suppliers)} suppliers")
@@ -24,8 +33,11 @@ def get_suppliers(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
 
 
 @router.get("/{supplier_id}", response_model=SupplierSchema)
-def get_supplier(supplier_id: int, db: Session = Depends(get_db)):
+def get_supplier(supplier_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
     """Get a specific supplier by ID"""
+    not_modified = conditional_get(request, response, ("suppliers",))
+    if not_modified:
+        return not_modified
     supplier = db.query(Supplier).filter(Supplier.id == supplier_id).first()
     if not supplier:
         raise HTTPException(status_code=404, detail="Supplier not found")
@@ -41,14 +53,6 @@ def create_supplier(supplier: SupplierCreate, db: Session = Depends(get_db)):
         db.commit()
         db.refresh(db_supplier)
         
-        log_operation(
-            db=db,
-            table_name="suppliers",
-            record_id=db_supplier.id,
-            operation="INSERT",
-            new_data=supplier.model_dump()
-        )
-        
         logger.info(f"Created supplier: {db_supplier.name} (ID: {db_supplier.id})")
         return db_supplier
     except Exception as e:
@@ -65,14 +69,6 @@ def update_supplier(supplier_id: int, supplier: SupplierUpdate, db: Session = De
         if not db_supplier:
             raise HTTPException(status_code=404, detail="Supplier not found")
         
-        old_data = {
-            "name": db_supplier.name,
-            "contact_person": db_supplier.contact_person,
-            "phone": db_supplier.phone,
-            "email": db_supplier.email,
-            "address": db_supplier.address
-        }
-        
         update_data = supplier.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_supplier, field, value)
@@ -80,15 +76,6 @@ def update_supplier(supplier_id: int, supplier: SupplierUpdate, db: Session = De
         db.commit()
         db.refresh(db_supplier)
         
-        log_operation(
-            db=db,
-            table_name="suppliers",
-            record_id=db_supplier.id,
-            operation="UPDATE",
-            old_data=old_data,
-            new_data=update_data
-        )
-        
         logger.info(f"Updated supplier: {db_supplier.name} (ID: {db_supplier.id})")
         return db_supplier
     except HTTPException:
@@ -107,19 +94,11 @@ def delete_supplier(supplier_id: int, db: Session = Depends(get_db)):
         if not db_supplier:
             raise HTTPException(status_code=404, detail="Supplier not found")
         
-        old_data = {"name": db_supplier.name}
+        name = db_supplier.name
         db.delete(db_supplier)
         db.commit()
         
-        log_operation(
-            db=db,
-            table_name="suppliers",
-            record_id=supplier_id,
-            operation="DELETE",
-            old_data=old_data
-        )
-        
-        logger.info(f"Deleted supplier: {old_data['name']} (ID: {supplier_id})")
+        logger.info(f"Deleted supplier: {name} (ID: {supplier_id})")
     except HTTPException:
         raise
     except Exception as e:
@@ -1,4 +1,4 @@
-from typing import Generic, TypeVar, List
+from typing import Generic, TypeVar, List, Optional
 from pydantic import BaseModel
 
 T = TypeVar("T")
@@ -8,3 +8,12 @@ class PaginatedResponse(BaseModel, Generic[T]):
     total: int
     page: int
     limit: int
+    total_is_estimate: bool = False
+
+
+class CursorPaginatedResponse(BaseModel, Generic[T]):
+    """Keyset page: no total count, navigation through opaque cursors"""
+    items: List[T]
+    limit: int
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
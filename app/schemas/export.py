@@ -0,0 +1,31 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+
+
+# Export Job Schemas
+class ExportJobCreate(BaseModel):
+    search: Optional[str] = None
+    category_id: Optional[int] = None
+    quality_id: Optional[int] = None
+    size_id: Optional[int] = None
+    low_stock_only: bool = False
+    sort_by: str = "id"
+    sort_order: str = "asc"
+    format: str = Field("excel", pattern="^(csv|tsv|excel|pdf)$")
+    view_mode: str = Field("list", pattern="^(list|table)$")
+
+
+class ExportJobStatus(BaseModel):
+    job_id: str
+    status: str
+    phase: str
+    format: str
+    rows_processed: int
+    total_rows: Optional[int] = None
+    file_size: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+    download_url: Optional[str] = None
@@ -58,6 +58,7 @@ class ItemStockUpdate(BaseModel):
 
 class Item(ItemBase):
     id: int
+    is_low_stock: bool = False
     created_at: datetime
     updated_at: datetime
     category: Optional[CategoryNested] = None
@@ -83,3 +84,11 @@ class ItemBulkCreate(BaseModel):
     default_price: float = 0.0
     default_gst: float = 0.0
     default_threshold: float = 10.0
+
+
+# Per-category stock counts
+class CategoryStockCounts(BaseModel):
+    category_id: int
+    category_name: Optional[str] = None
+    item_count: int
+    low_stock_count: int
@@ -43,15 +43,18 @@ class PurchaseItemCreate(PurchaseItemBase):
     pass
 
 
-class PurchaseItem(PurchaseItemBase):
+class PurchaseItemLine(PurchaseItemBase):
     id: int
     purchase_id: int
     created_at: datetime
-    item: Optional[Item] = None
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class PurchaseItem(PurchaseItemLine):
+    item: Optional[Item] = None
+
+
 # Purchase Schemas
 class PurchaseBase(BaseModel):
     supplier_id: Optional[int] = None
@@ -61,7 +64,7 @@ class PurchaseBase(BaseModel):
 
 
 class PurchaseCreate(PurchaseBase):
-    items: List[PurchaseItemCreate]
+    items: List[PurchaseItemCreate] = Field(..., min_length=1)
 
 
 class PurchaseUpdate(BaseModel):
@@ -71,15 +74,39 @@ class PurchaseUpdate(BaseModel):
     notes: Optional[str] = None
 
 
-class Purchase(PurchaseBase):
+# Response shapes for expand=none, expand=lines and expand=lines.item
+class PurchaseHeader(PurchaseBase):
     id: int
     total_amount: float
     created_at: datetime
     supplier: Optional[Supplier] = None
-    items: List[PurchaseItem] = Field(default=[], validation_alias="purchase_items")
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class PurchaseWithLines(PurchaseHeader):
+    items: List[PurchaseItemLine] = Field(default=[], validation_alias="purchase_items")
+
+
+class Purchase(PurchaseHeader):
+    items: List[PurchaseItem] = Field(default=[], validation_alias="purchase_items")
+
+
 class PurchaseDetail(Purchase):
     pass
+
+
+# Invoice Import Schemas
+class PurchaseImportError(BaseModel):
+    row: int  # 1-based row number in the uploaded file
+    sku: Optional[str] = None
+    error: str
+
+
+class PurchaseImportResult(BaseModel):
+    purchase_id: Optional[int] = None
+    total_amount: float = 0.0
+    rows_total: int
+    rows_imported: int
+    rows_failed: int
+    errors: List[PurchaseImportError] = []
@@ -0,0 +1,88 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import date
+
+
+# Sales by Period
+class SalesPeriodRow(BaseModel):
+    period_start: date
+    sales_count: int
+    subtotal: float
+    gst_amount: float
+    discount: float
+    total_amount: float
+
+
+class SalesPeriodReport(BaseModel):
+    period: str  # day, week, month
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    rows: List[SalesPeriodRow]
+
+
+# Top Items
+class TopItemRow(BaseModel):
+    item_id: int
+    sku: Optional[str] = None
+    category_name: Optional[str] = None
+    quality_name: Optional[str] = None
+    size_display: Optional[str] = None
+    quantity: float
+    revenue: float  # before GST
+    gst_amount: float
+
+
+class TopItemsReport(BaseModel):
+    by: str  # revenue, quantity
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    rows: List[TopItemRow]
+
+
+# GST Collected
+class GstRateRow(BaseModel):
+    gst_percentage: float
+    taxable_amount: float
+    gst_amount: float
+    line_count: int
+
+
+class GstReport(BaseModel):
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    taxable_amount: float
+    gst_amount: float
+    rows: List[GstRateRow]
+
+
+# Purchases per Supplier
+class SupplierPurchaseRow(BaseModel):
+    supplier_id: Optional[int] = None  # None for purchases without a supplier
+    supplier_name: Optional[str] = None
+    purchase_count: int
+    total_amount: float
+
+
+class SupplierPurchasesReport(BaseModel):
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    rows: List[SupplierPurchaseRow]
+
+
+# Stock Valuation
+class StockValuationRow(BaseModel):
+    category_id: int
+    category_name: Optional[str] = None
+    item_count: int
+    stock_quantity: float
+    selling_value: float  # stock at selling price
+    cost_value: float  # stock at weighted average purchase price; items never purchased count as 0
+    items_without_cost: int
+
+
+class StockValuationReport(BaseModel):
+    item_count: int
+    stock_quantity: float
+    selling_value: float
+    cost_value: float
+    rows: List[StockValuationRow]
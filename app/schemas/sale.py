@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, ConfigDict
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
 from app.schemas.item import Item
 
 # Sale Item Schemas
@@ -15,16 +15,19 @@ class SaleItemCreate(SaleItemBase):
     pass
 
 
-class SaleItem(SaleItemBase):
+class SaleItemLine(SaleItemBase):
     id: int
     sale_id: int
     line_total: float
     created_at: datetime
-    item: Optional[Item] = None
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class SaleItem(SaleItemLine):
+    item: Optional[Item] = None
+
+
 # Sale Schemas
 class SaleBase(BaseModel):
     sale_date: datetime
@@ -40,16 +43,83 @@ class SaleUpdate(BaseModel):
     discount: Optional[float] = Field(None, ge=0)
 
 
-class Sale(SaleBase):
+# Response shapes for expand=none, expand=lines and expand=lines.item
+class SaleHeader(SaleBase):
     id: int
     subtotal: float
     gst_amount: float
     total_amount: float
     created_at: datetime
-    items: List[SaleItem] = Field(default=[], validation_alias="sale_items")
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class SaleWithLines(SaleHeader):
+    items: List[SaleItemLine] = Field(default=[], validation_alias="sale_items")
+
+
+class Sale(SaleHeader):
+    items: List[SaleItem] = Field(default=[], validation_alias="sale_items")
+
+
 class SaleDetail(Sale):
     pass
+
+
+# Batch Sale Schemas
+class SaleBatchCreate(BaseModel):
+    sales: List[SaleCreate] = Field(..., min_length=1, max_length=1000)
+
+
+class SaleBatchResult(BaseModel):
+    index: int  # position in the submitted batch
+    status: str  # created, failed
+    sale_id: Optional[int] = None
+    total_amount: Optional[float] = None
+    status_code: Optional[int] = None  # what POST /api/sales would have answered for a failed sale
+    error: Optional[str] = None
+
+
+class SaleBatchResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[SaleBatchResult]
+
+
+# Sales Summary Schemas (from the daily rollups)
+class SalesSummaryDay(BaseModel):
+    sale_day: date
+    sales_count: int
+    subtotal: float
+    gst_amount: float
+    discount: float
+    total_amount: float
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SalesSummaryGstRate(BaseModel):
+    gst_percentage: float
+    taxable_amount: float
+    gst_amount: float
+
+
+class SalesSummaryItem(BaseModel):
+    item_id: int
+    sku: Optional[str] = None
+    quantity: float
+    revenue: float  # before GST
+    gst_amount: float
+
+
+class SalesSummary(BaseModel):
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    sales_count: int
+    subtotal: float
+    gst_amount: float
+    discount: float
+    total_amount: float
+    days: List[SalesSummaryDay]
+    gst_rates: List[SalesSummaryGstRate]
+    top_items: List[SalesSummaryItem]
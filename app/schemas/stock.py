@@ -0,0 +1,33 @@
+from pydantic import BaseModel, ConfigDict
+from typing import List, Optional
+from datetime import date, datetime
+
+
+# Stock Ledger Schemas
+class StockMovement(BaseModel):
+    id: int
+    item_id: int
+    ts: datetime
+    quantity: float  # signed change, negative for sales
+    movement_type: str
+    reference_id: Optional[int] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class StockLevel(BaseModel):
+    item_id: int
+    at: datetime
+    stock_quantity: float
+    snapshot_date: Optional[date] = None  # snapshot the value was computed from
+    movements_scanned: int
+
+
+class StockHistory(BaseModel):
+    item_id: int
+    start: Optional[datetime] = None
+    end: datetime
+    opening_stock: float
+    closing_stock: float
+    movements: List[StockMovement]
+    has_more: bool = False
@@ -0,0 +1,371 @@
+"""
+Archival of old audit rows into compressed monthly segments.
+
+archive_audit_logs() moves audit rows older than AUDIT_RETENTION_DAYS out of
+`audit_logs` into one segment file per month, `audit-YYYY-MM.jsonl.gz`:
+gzip-compressed JSON lines (old_data/new_data decoded), only ever appended to, one gzip member per
+archived chunk. Next to each segment, `audit-YYYY-MM.index.json` lists the
+members (byte range, row count, id and timestamp range, rows per table), so
+readers can skip members and whole months that cannot match a query.
+
+A chunk is appended and indexed before its rows are deleted from the
+database. Bytes past the last indexed member (an interrupted append) are
+ignored by readers and cut off by the next archive run, and rows already in
+a segment are not archived twice: only rows at or below the index's max_id
+are looked up in the segment, and only in the members that can hold them.
+Rows are matched on (id, timestamp), since SQLite hands out the ids of
+deleted rows again once the table has been emptied.
+
+read_archived_logs() serves the query API for ranges that reach into the
+archive.
+"""
+import gzip
+import json
+import os
+import sys
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import String, delete, func, select, type_coerce
+
+from app.database import engine
+from app.models.models import AuditLog
+from app.utils.audit_encoding import decode_changes
+from app.utils.logger_config import get_logger
+
+logger = get_logger()
+
+
+def _default_archive_dir() -> str:
+    """
+    audit_archive/ next to the database file, so the archive does not depend
+    on the directory the server or manage.py was started from
+    """
+    if getattr(sys, 'frozen', False):
+        return os.path.join(os.getenv('APPDATA'), "InventoryPro", "audit_archive")
+    database = engine.url.database if engine.dialect.name == "sqlite" else None
+    if not database or database == ":memory:":
+        raise RuntimeError("AUDIT_ARCHIVE_DIR must be set when the database is not a SQLite file")
+    return os.path.join(os.path.dirname(os.path.abspath(database)), "audit_archive")
+
+
+ARCHIVE_DIR = os.path.abspath(os.getenv("AUDIT_ARCHIVE_DIR") or _default_archive_dir())
+
+RETENTION_DAYS = int(os.getenv("AUDIT_RETENTION_DAYS", "365"))
+ARCHIVE_INTERVAL = int(os.getenv("AUDIT_ARCHIVE_INTERVAL", "86400"))  # seconds, 0 turns it off
+ARCHIVE_CHUNK = 50000
+
+_COLUMNS = ("id", "table_name", "record_id", "operation", "user_id", "ip_address")
+_JSON_COLUMNS = ("old_data", "new_data")
+
+# Timestamps as stored, so archived rows sort and page exactly like live ones
+_RAW_TIMESTAMP = type_coerce(AuditLog.timestamp, String)
+
+
+def _segment_path(month: str) -> str:
+    return os.path.join(ARCHIVE_DIR, f"audit-{month}.jsonl.gz")
+
+
+def _index_path(month: str) -> str:
+    return os.path.join(ARCHIVE_DIR, f"audit-{month}.index.json")
+
+
+def load_index(month: str) -> dict:
+    """Index of one monthly segment (empty when the month has no segment)"""
+    try:
+        with open(_index_path(month)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"month": month, "rows": 0, "members": []}
+
+
+def _write_index(index: dict):
+    path = _index_path(index["month"])
+    with open(path + ".tmp", "w") as f:
+        json.dump(index, f, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + ".tmp", path)
+
+
+def archived_months() -> List[str]:
+    """Months that have a segment, oldest first"""
+    if not os.path.isdir(ARCHIVE_DIR):
+        return []
+    return sorted(
+        name[len("audit-"):-len(".index.json")]
+        for name in os.listdir(ARCHIVE_DIR)
+        if name.startswith("audit-") and name.endswith(".index.json")
+    )
+
+
+def _read_member(month: str, member: dict) -> List[dict]:
+    with open(_segment_path(month), "rb") as f:
+        f.seek(member["offset"])
+        data = gzip.decompress(f.read(member["length"]))
+    return [json.loads(line) for line in data.splitlines()]
+
+
+def _archived_keys(month: str, index: dict, low: int) -> set:
+    """(id, timestamp) of archived rows in members holding ids of at least `low`"""
+    return {
+        (row["id"], row["timestamp"])
+        for member in index["members"] if member["max_id"] >= low
+        for row in _read_member(month, member)
+    }
+
+
+def _json_line(row) -> str:
+    """One JSON line; JSON old_data/new_data are copied as stored instead of decoded and re-encoded"""
+    head = json.dumps({column: row[column] for column in (*_COLUMNS, "timestamp")}, separators=(",", ":"))
+    if row["changes"] is not None:
+        old_data, new_data = decode_changes(row["changes"])
+        return f'{head[:-1]},"old_data":{json.dumps(old_data)},"new_data":{json.dumps(new_data)}}}\n'
+    return f'{head[:-1]},"old_data":{row["old_data"] or "null"},"new_data":{row["new_data"] or "null"}}}\n'
+
+
+def _append_member(month: str, index: dict, rows: List[dict]):
+    """Compress rows into one gzip member at the end of the segment, then index it"""
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    offset = sum(member["length"] for member in index["members"])
+    payload = gzip.compress("".join(_json_line(row) for row in rows).encode(), compresslevel=6)
+    with open(_segment_path(month), "ab") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+
+    tables: Dict[str, int] = {}
+    for row in rows:
+        tables[row["table_name"]] = tables.get(row["table_name"], 0) + 1
+    index["members"].append({
+        "offset": offset,
+        "length": len(payload),
+        "rows": len(rows),
+        "min_id": min(row["id"] for row in rows),
+        "max_id": max(row["id"] for row in rows),
+        "min_ts": min(row["timestamp"] for row in rows),
+        "max_ts": max(row["timestamp"] for row in rows),
+        "tables": tables
+    })
+    index["rows"] += len(rows)
+    index["max_id"] = max(member["max_id"] for member in index["members"])
+    index["min_ts"] = min(member["min_ts"] for member in index["members"])
+    index["max_ts"] = max(member["max_ts"] for member in index["members"])
+    _write_index(index)
+
+
+def _trim_segment(month: str, index: dict):
+    """Cut off bytes past the last indexed member, left by an interrupted append"""
+    path = _segment_path(month)
+    indexed = sum(member["length"] for member in index["members"])
+    if os.path.exists(path) and os.path.getsize(path) > indexed:
+        with open(path, "r+b") as f:
+            f.truncate(indexed)
+        logger.warning(f"Dropped an incomplete append from {path}")
+
+
+def _next_month(month: str) -> str:
+    year, number = int(month[:4]), int(month[5:7])
+    return f"{year + number // 12}-{number % 12 + 1:02d}"
+
+
+def archive_audit_logs(engine, retention_days: int = RETENTION_DAYS, today: Optional[date] = None) -> int:
+    """
+    Move audit rows older than `retention_days` into their monthly segments.
+
+    Works a month and ARCHIVE_CHUNK rows at a time; each chunk is appended,
+    indexed and then deleted in its own transaction. Returns the number of
+    rows archived.
+    """
+    cutoff = ((today or date.today()) - timedelta(days=retention_days)).isoformat()
+    archived = 0
+    with engine.connect() as conn:
+        first = conn.execute(select(_RAW_TIMESTAMP).where(_RAW_TIMESTAMP < cutoff).order_by(_RAW_TIMESTAMP).limit(1)).scalar()
+    if first is None:
+        return 0
+
+    month = first[:7]
+    while month <= cutoff[:7]:
+        start, end = f"{month}-01", min(f"{_next_month(month)}-01", cutoff)
+        in_month = (_RAW_TIMESTAMP >= start, _RAW_TIMESTAMP < end)
+        index = load_index(month)
+        _trim_segment(month, index)
+        # Rows of an earlier run that stopped between appending and deleting
+        # are the only ones left at or below max_id; rows above it are new
+        already = set()
+        archived_max = index.get("max_id", max((member["max_id"] for member in index["members"]), default=0))
+        with engine.connect() as conn:
+            low = conn.execute(
+                select(func.min(AuditLog.id)).where(*in_month, AuditLog.id <= archived_max)
+            ).scalar()
+        if low is not None:
+            already = _archived_keys(month, index, low)
+        while True:
+            with engine.begin() as conn:
+                rows = conn.execute(
+                    select(
+                        *(getattr(AuditLog, column) for column in _COLUMNS),
+                        *(type_coerce(getattr(AuditLog, column), String).label(column) for column in _JSON_COLUMNS),
+                        AuditLog.changes,
+                        _RAW_TIMESTAMP.label("timestamp")
+                    )
+                    .where(*in_month).order_by(AuditLog.id).limit(ARCHIVE_CHUNK)
+                ).mappings().all()
+                if not rows:
+                    break
+                fresh = [row for row in rows if (row["id"], row["timestamp"]) not in already]
+                if fresh:
+                    _append_member(month, index, fresh)
+                conn.execute(delete(AuditLog).where(*in_month, AuditLog.id <= rows[-1]["id"]))
+            archived += len(fresh)
+            if len(rows) < ARCHIVE_CHUNK:
+                break
+        month = _next_month(month)
+
+    logger.info(f"Archived {archived} audit logs older than {cutoff}")
+    return archived
+
+
+def _row_matches(row: dict, filters: dict) -> bool:
+    if filters.get("table_name") and row["table_name"] != filters["table_name"]:
+        return False
+    if filters.get("record_id") is not None and row["record_id"] != filters["record_id"]:
+        return False
+    if filters.get("operation") and row["operation"] != filters["operation"]:
+        return False
+    if filters.get("start") and row["timestamp"] < filters["start"]:
+        return False
+    if filters.get("end") and row["timestamp"] > filters["end"]:
+        return False
+    return True
+
+
+def read_archived_logs(
+    limit: int,
+    position: Optional[dict] = None,
+    newest_first: bool = True,
+    table_name: str = None,
+    record_id: int = None,
+    operation: str = None,
+    start_date: datetime = None,
+    end_date: datetime = None
+) -> List[dict]:
+    """
+    Up to `limit` archived rows matching the filters, in (timestamp, id)
+    order and continuing after `position` (a decoded keyset cursor).
+
+    Months and members whose index rules them out are not decompressed, and
+    reading stops at the first month that cannot beat the rows found so far.
+    """
+    filters = {
+        "table_name": table_name,
+        "record_id": record_id,
+        "operation": operation,
+        "start": start_date.isoformat(sep=" ") if start_date else None,
+        "end": end_date.isoformat(sep=" ") if end_date else None
+    }
+
+    def after_position(row: dict) -> bool:
+        if position is None:
+            return True
+        key, bound = (row["timestamp"], row["id"]), (position["v"], position["id"])
+        return key < bound if newest_first else key > bound
+
+    def member_may_match(member: dict) -> bool:
+        if table_name and table_name not in member["tables"]:
+            return False
+        low, high = member["min_ts"], member["max_ts"]
+        if filters["start"] and high < filters["start"]:
+            return False
+        if filters["end"] and low > filters["end"]:
+            return False
+        if position is not None:
+            return low <= position["v"] if newest_first else high >= position["v"]
+        return True
+
+    found: List[dict] = []
+    for month in sorted(archived_months(), reverse=newest_first):
+        index = load_index(month)
+        if not index["members"]:
+            continue
+        if len(found) >= limit:
+            # Every row of this month sorts after the ones already found
+            edge = found[limit - 1]["timestamp"]
+            if (index["max_ts"] < edge) if newest_first else (index["min_ts"] > edge):
+                break
+        for member in index["members"]:
+            if member_may_match(member):
+                found.extend(
+                    row for row in _read_member(month, member)
+                    if _row_matches(row, filters) and after_position(row)
+                )
+        found.sort(key=lambda row: (row["timestamp"], row["id"]), reverse=newest_first)
+        del found[limit:]
+    return found
+
+
+def iter_archived_logs(
+    table_name: str = None,
+    operation: str = None,
+    start_date: datetime = None,
+    end_date: datetime = None
+) -> Iterator[dict]:
+    """
+    Archived rows matching the filters, oldest month first; one member
+    (at most ARCHIVE_CHUNK rows) is held in memory at a time
+    """
+    filters = {
+        "table_name": table_name,
+        "operation": operation,
+        "start": start_date.isoformat(sep=" ") if start_date else None,
+        "end": end_date.isoformat(sep=" ") if end_date else None
+    }
+    for month in archived_months():
+        for member in load_index(month)["members"]:
+            if table_name and table_name not in member["tables"]:
+                continue
+            if (filters["start"] and member["max_ts"] < filters["start"]) or (
+                filters["end"] and member["min_ts"] > filters["end"]
+            ):
+                continue
+            rows = [row for row in _read_member(month, member) if _row_matches(row, filters)]
+            rows.sort(key=lambda row: (row["timestamp"], row["id"]))
+            yield from rows
+
+
+class AuditArchiveScheduler:
+    """Background thread that archives old audit rows every `interval` seconds"""
+
+    def __init__(self, interval: int):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self.interval <= 0:
+            logger.info("Audit archival disabled (AUDIT_ARCHIVE_INTERVAL=0)")
+            return
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-archive", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=30)
+            self._thread = None
+
+    def _run(self):
+        while True:
+            try:
+                archive_audit_logs(engine)
+            except Exception as e:
+                logger.error(f"Audit archival failed: {str(e)}")
+            if self._stop.wait(self.interval):
+                return
+
+
+audit_archiver = AuditArchiveScheduler(ARCHIVE_INTERVAL)
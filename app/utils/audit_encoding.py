@@ -0,0 +1,178 @@
+"""
+Compact encoding of audit log changes.
+
+Instead of two JSON blobs, an audit row keeps one msgpack map in
+`audit_logs.changes`: {"o": the whole old record, "n": the new values of the
+fields that differ from it, "d": fields the new record no longer has},
+prefixed by one format byte and zlib-compressed when the packed map is
+larger than AUDIT_COMPRESS_THRESHOLD bytes. The old record is stored once
+and the new one is rebuilt from it, so decode_changes() returns both sides
+exactly as they were logged. INSERT rows have no "o" and keep the whole
+new record in "n"; DELETE rows have no "n".
+
+Maps written by the first version of this encoding hold only the changed
+fields on both sides ({"o": changed old, "n": changed new}) and decode to
+those. Rows written before the column existed keep old_data/new_data until
+reencode_audit_logs() moves them over; audit_view() reads either kind.
+"""
+import json
+import os
+import zlib
+from typing import Optional, Tuple
+
+import msgpack
+from sqlalchemy import LargeBinary, String, bindparam, inspect, null, select, type_coerce, update
+
+from app.models.models import AuditLog
+from app.utils.logger_config import get_logger
+
+logger = get_logger()
+
+COMPRESS_THRESHOLD = int(os.getenv("AUDIT_COMPRESS_THRESHOLD", "512"))  # bytes
+
+_PLAIN = b"\x00"
+_ZLIB = b"\x01"
+_REENCODE_CHUNK = 5000
+
+
+def encode_changes(old_data: Optional[dict], new_data: Optional[dict]) -> Optional[bytes]:
+    """Encoded old_data/new_data, or None when neither is given"""
+    if old_data is None and new_data is None:
+        return None
+    payload = {}
+    if old_data is not None:
+        payload["o"] = old_data
+    if new_data is not None:
+        if old_data is None:
+            payload["n"] = new_data
+        else:
+            payload["n"] = {
+                key: value for key, value in new_data.items()
+                if key not in old_data or old_data[key] != value
+            }
+            dropped = [key for key in old_data if key not in new_data]
+            if dropped:
+                payload["d"] = dropped
+    packed = msgpack.packb(payload, use_bin_type=True, default=str)
+    if len(packed) > COMPRESS_THRESHOLD:
+        compressed = zlib.compress(packed)
+        if len(compressed) < len(packed):
+            return _ZLIB + compressed
+    return _PLAIN + packed
+
+
+def decode_changes(changes: Optional[bytes]) -> Tuple[Optional[dict], Optional[dict]]:
+    """(old_data, new_data) from encoded changes"""
+    if not changes:
+        return None, None
+    packed = zlib.decompress(changes[1:]) if changes[:1] == _ZLIB else changes[1:]
+    payload = msgpack.unpackb(packed, raw=False)
+    old_data, new_data = payload.get("o"), payload.get("n")
+    if old_data is not None and new_data is not None:
+        dropped = set(payload.get("d", ()))
+        new_data = {
+            key: value for key, value in {**old_data, **new_data}.items() if key not in dropped
+        }
+    return old_data, new_data
+
+
+def audit_view(log) -> dict:
+    """API view of an AuditLog row, old_data/new_data decoded from whichever form it was stored in"""
+    old_data, new_data = log.old_data, log.new_data
+    if getattr(log, "changes", None) is not None:
+        old_data, new_data = decode_changes(log.changes)
+    return {
+        "id": log.id,
+        "table_name": log.table_name,
+        "record_id": log.record_id,
+        "operation": log.operation,
+        "old_data": old_data,
+        "new_data": new_data,
+        "user_id": log.user_id,
+        "ip_address": log.ip_address,
+        "timestamp": log.timestamp
+    }
+
+
+def ensure_audit_changes_column(engine) -> bool:
+    """Add audit_logs.changes to databases created before it existed"""
+    try:
+        columns = {column["name"] for column in inspect(engine).get_columns("audit_logs")}
+        if "changes" not in columns:
+            with engine.begin() as conn:
+                blob = LargeBinary().compile(dialect=engine.dialect)
+                conn.exec_driver_sql(f"ALTER TABLE audit_logs ADD COLUMN changes {blob}")
+            logger.info("Added audit_logs.changes column")
+    except Exception as e:
+        logger.warning(f"Audit changes column unavailable: {str(e)}")
+        return False
+    return True
+
+
+def _json_value(text: Optional[str]) -> Optional[dict]:
+    """The JSON object in `text`; ValueError when it holds anything else"""
+    if text is None:
+        return None
+    value = json.loads(text)
+    if isinstance(value, str):
+        # Some early rows hold the JSON document as a string
+        value = json.loads(value)
+    if value is not None and not isinstance(value, dict):
+        raise ValueError(f"expected a JSON object, got {type(value).__name__}")
+    return value
+
+
+def _reencoded(old_text: Optional[str], new_text: Optional[str]) -> Optional[bytes]:
+    """Encoded changes for a JSON row, or None when they would not decode back to the same data"""
+    try:
+        old_data, new_data = _json_value(old_text), _json_value(new_text)
+        encoded = encode_changes(old_data, new_data)
+    except (ValueError, TypeError, OverflowError):
+        return None
+    if encoded is None or decode_changes(encoded) != (old_data, new_data):
+        return None
+    return encoded
+
+
+def reencode_audit_logs(engine) -> dict:
+    """
+    Move old_data/new_data of older rows into the encoded `changes` column,
+    _REENCODE_CHUNK rows per transaction. Rows whose JSON is not an object,
+    or would not survive the round trip unchanged, keep their JSON and are
+    counted as skipped. Returns row, skipped and byte counts.
+    """
+    stats = {"rows": 0, "skipped": 0, "json_bytes": 0, "encoded_bytes": 0}
+    raw_old = type_coerce(AuditLog.old_data, String)
+    raw_new = type_coerce(AuditLog.new_data, String)
+    statement = update(AuditLog).where(AuditLog.id == bindparam("row_id")).values(
+        changes=bindparam("encoded"), old_data=null(), new_data=null()
+    )
+    last_id = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                select(AuditLog.id, raw_old, raw_new).where(
+                    AuditLog.id > last_id, AuditLog.changes.is_(None),
+                    (AuditLog.old_data.isnot(None)) | (AuditLog.new_data.isnot(None))
+                ).order_by(AuditLog.id).limit(_REENCODE_CHUNK)
+            ).all()
+            if not rows:
+                break
+            params = []
+            for row_id, old_text, new_text in rows:
+                encoded = _reencoded(old_text, new_text)
+                if encoded is None:
+                    stats["skipped"] += 1
+                    continue
+                params.append({"row_id": row_id, "encoded": encoded})
+                stats["json_bytes"] += len(old_text or "") + len(new_text or "")
+                stats["encoded_bytes"] += len(encoded)
+            if params:
+                conn.execute(statement, params)
+            stats["rows"] += len(params)
+            last_id = rows[-1][0]
+    logger.info(
+        f"Re-encoded {stats['rows']} audit logs: {stats['json_bytes']} bytes of JSON "
+        f"to {stats['encoded_bytes']} bytes ({stats['skipped']} skipped)"
+    )
+    return stats
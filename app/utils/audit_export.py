@@ -0,0 +1,126 @@
+"""
+Streaming export of audit logs as NDJSON or CSV.
+
+stream_audit_export() walks audit_logs in (timestamp, id) order with
+yield_per, so rows come off the SQLite cursor a batch at a time and are
+encoded into chunks of about EXPORT_CHUNK_SIZE bytes; memory stays flat
+however many rows match. With gzip=True the chunks are compressed on the fly
+into a single gzip stream. Archived months can be included ahead of the live
+rows.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Iterator, Optional
+
+from sqlalchemy import String, type_coerce
+
+from app.database import SessionLocal
+from app.models.models import AuditLog
+from app.utils.audit_archive import iter_archived_logs
+from app.utils.audit_encoding import decode_changes
+from app.utils.audit_logger import audit_logs_query, RAW_TIMESTAMP
+from app.utils.item_export import EXPORT_BATCH_SIZE, EXPORT_CHUNK_SIZE
+from app.utils.logger_config import get_logger
+
+logger = get_logger()
+
+# format -> (file extension, media type)
+AUDIT_EXPORT_FORMATS = {
+    "ndjson": (".ndjson", "application/x-ndjson"),
+    "csv": (".csv", "text/csv"),
+}
+
+CSV_COLUMNS = ["id", "timestamp", "table_name", "record_id", "operation", "old_data", "new_data", "user_id", "ip_address"]
+
+_FIELDS = ("id", "timestamp", "table_name", "record_id", "operation", "user_id", "ip_address")
+
+
+def _live_rows(db, table_name, operation, start_date, end_date) -> Iterator[tuple]:
+    """(fields dict, old JSON text, new JSON text) per live row, oldest first"""
+    query = audit_logs_query(db, table_name, None, operation, start_date, end_date).with_entities(
+        AuditLog.id, RAW_TIMESTAMP, AuditLog.table_name, AuditLog.record_id, AuditLog.operation,
+        AuditLog.user_id, AuditLog.ip_address,
+        type_coerce(AuditLog.old_data, String), type_coerce(AuditLog.new_data, String), AuditLog.changes
+    ).order_by(RAW_TIMESTAMP, AuditLog.id)
+    for row in query.yield_per(EXPORT_BATCH_SIZE):
+        fields = dict(zip(_FIELDS, row[:7]))
+        old_text, new_text, changes = row[7:]
+        if changes is not None:
+            old_data, new_data = decode_changes(changes)
+            old_text, new_text = json.dumps(old_data), json.dumps(new_data)
+        yield fields, old_text or "null", new_text or "null"
+
+
+def _archived_rows(table_name, operation, start_date, end_date) -> Iterator[tuple]:
+    for row in iter_archived_logs(table_name, operation, start_date, end_date):
+        yield {field: row[field] for field in _FIELDS}, json.dumps(row["old_data"]), json.dumps(row["new_data"])
+
+
+def _ndjson_line(fields: dict, old_text: str, new_text: str) -> str:
+    head = json.dumps(fields, separators=(",", ":"))
+    return f'{head[:-1]},"old_data":{old_text},"new_data":{new_text}}}\n'
+
+
+def stream_audit_export(
+    format: str = "ndjson",
+    table_name: Optional[str] = None,
+    operation: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    include_archived: bool = False,
+    gzip: bool = False
+) -> Iterator[bytes]:
+    """
+    Encode matching audit logs as NDJSON or CSV chunks for a StreamingResponse.
+
+    Like stream_delimited, the generator runs after the handler has returned
+    and opens its own session.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None
+    db = SessionLocal()
+    try:
+        buffer = io.StringIO()
+        writer = None
+        if format == "csv":
+            writer = csv.writer(buffer, lineterminator="\n")
+            writer.writerow(CSV_COLUMNS)
+
+        sources = [_live_rows(db, table_name, operation, start_date, end_date)]
+        if include_archived:
+            sources.insert(0, _archived_rows(table_name, operation, start_date, end_date))
+
+        row_count = 0
+        for source in sources:
+            for fields, old_text, new_text in source:
+                if writer is None:
+                    buffer.write(_ndjson_line(fields, old_text, new_text))
+                else:
+                    writer.writerow([
+                        fields["id"], fields["timestamp"], fields["table_name"], fields["record_id"],
+                        fields["operation"], old_text, new_text, fields["user_id"], fields["ip_address"]
+                    ])
+                row_count += 1
+                if buffer.tell() >= EXPORT_CHUNK_SIZE:
+                    chunk = buffer.getvalue().encode("utf-8")
+                    buffer.seek(0)
+                    buffer.truncate()
+                    if compressor is None:
+                        yield chunk
+                    else:
+                        compressed = compressor.compress(chunk)
+                        if compressed:
+                            yield compressed
+        chunk = buffer.getvalue().encode("utf-8")
+        if compressor is not None:
+            chunk = compressor.compress(chunk) + compressor.flush()
+        if chunk:
+            yield chunk
+        logger.info(f"Streamed audit export of {row_count} rows")
+    except Exception as e:
+        logger.error(f"Audit export stream failed: {str(e)}")
+        raise
+    finally:
+        db.close()
@@ -1,11 +1,194 @@
+from sqlalchemy import String, event, inspect, insert, or_, type_coerce
 from sqlalchemy.orm import Session
-from app.models.models import AuditLog
+from app.database import SessionLocal, engine
+from app.models.models import AuditLog, Category, Quality, Size, Item, Supplier
+from app.utils.audit_archive import read_archived_logs
+from app.utils.audit_encoding import encode_changes
 from app.utils.logger_config import get_logger
-from datetime import datetime
-import json
+from app.utils.pagination import page_cursors
+from datetime import date, datetime, timezone
+from typing import List, Optional
+import atexit
+import os
+import queue
+import threading
+import time
 
 logger = get_logger()
 
+# How audit rows reach the database: "transaction" inserts them in the
+# transaction of the change they describe, "queued" hands them to the
+# background AuditWriter once that transaction has committed
+AUDIT_WRITE_MODES = ("transaction", "queued")
+AUDIT_WRITE_MODE = os.getenv("AUDIT_WRITE_MODE", "transaction")
+if AUDIT_WRITE_MODE not in AUDIT_WRITE_MODES:
+    logger.warning(f"Unknown AUDIT_WRITE_MODE {AUDIT_WRITE_MODE!r}, using 'transaction'")
+    AUDIT_WRITE_MODE = "transaction"
+
+# Audit writer tuning
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "0.5"))  # seconds
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_ENQUEUE_TIMEOUT = float(os.getenv("AUDIT_ENQUEUE_TIMEOUT", "5"))  # seconds
+
+_STOP = object()
+_FLUSH = object()
+
+
+class AuditWriter:
+    """
+    Writes audit rows from an in-process queue on a background thread.
+
+    Records are collected until `batch_size` are waiting or `flush_interval`
+    seconds have passed since the first one, then inserted with a single
+    executemany on the writer's own connection. A full queue blocks the
+    caller for up to `enqueue_timeout` seconds (back-pressure); after that
+    the record is written synchronously rather than dropped. The thread is
+    started by the first enqueue(); stop() writes everything still queued
+    before returning.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, queue_size: int, enqueue_timeout: float):
+        self.batch_size = max(batch_size, 1)
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self._enqueued = 0
+        self._written = 0
+        self._batches = 0
+        self._direct = 0
+        self._failed = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 30):
+        """Write every queued record, then stop the writer thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._stopped = True
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout=timeout)
+        if thread.is_alive():
+            logger.error(f"Audit writer did not drain within {timeout}s ({self._queue.qsize()} records queued)")
+
+    def enqueue(self, rows: List[dict]):
+        """Queue audit rows (AuditLog column values) for the writer thread"""
+        if self._stopped or not rows:
+            self._write(rows, direct=True)
+            return
+        if self._thread is None:
+            self.start()
+        for index, row in enumerate(rows):
+            try:
+                self._queue.put(row, timeout=self.enqueue_timeout)
+            except queue.Full:
+                logger.warning(f"Audit queue full for {self.enqueue_timeout}s, writing {len(rows) - index} records directly")
+                self._write(rows[index:], direct=True)
+                return
+            self._enqueued += 1
+
+    def flush(self, timeout: float = 10) -> bool:
+        """Wait until everything queued so far is written; False on timeout"""
+        if self._thread is None:
+            return True
+        deadline = time.monotonic() + timeout
+        try:
+            self._queue.put(_FLUSH, timeout=min(timeout, self.enqueue_timeout))
+        except queue.Full:
+            return False
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "enqueued": self._enqueued,
+            "written": self._written,
+            "batches": self._batches,
+            "written_directly": self._direct,
+            "failed": self._failed,
+            "batch_size": self.batch_size,
+            "flush_interval": self.flush_interval
+        }
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            record = self._queue.get()
+            batch, markers = [], 0
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if record is _STOP:
+                    stopping = True
+                    markers += 1
+                    break
+                if record is _FLUSH:
+                    markers += 1
+                    break
+                batch.append(record)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    record = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+            if stopping:
+                # Producers that lost the race with stop() may still have queued rows
+                while True:
+                    try:
+                        record = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if record is _STOP or record is _FLUSH:
+                        markers += 1
+                    else:
+                        batch.append(record)
+            self._write(batch)
+            for _ in range(len(batch) + markers):
+                self._queue.task_done()
+
+    def _write(self, rows: List[dict], direct: bool = False):
+        if not rows:
+            return
+        for attempt in range(3):
+            try:
+                with engine.begin() as conn:
+                    conn.execute(insert(AuditLog), rows)
+                break
+            except Exception as e:
+                logger.error(f"Failed to write {len(rows)} audit logs (attempt {attempt + 1}): {str(e)}")
+                time.sleep(0.5 * (attempt + 1))
+        else:
+            self._failed += len(rows)
+            for row in rows:
+                logger.error(f"Audit log lost: {row}")
+            return
+        self._written += len(rows)
+        if direct:
+            self._direct += len(rows)
+        else:
+            self._batches += 1
+
+
+audit_writer = AuditWriter(AUDIT_BATCH_SIZE, AUDIT_FLUSH_INTERVAL, AUDIT_QUEUE_SIZE, AUDIT_ENQUEUE_TIMEOUT)
+atexit.register(audit_writer.stop)
+
 
 def log_operation(
     db: Session,
@@ -15,11 +198,20 @@ def log_operation(
     old_data: dict = None,
     new_data: dict = None,
     user_id: int = None,
-    ip_address: str = None
+    ip_address: str = None,
+    commit: bool = True
 ):
     """
-    Log database operations to audit_logs table
-    
+    Log a database operation to the audit_logs table
+
+    The row is staged on `db` (see stage_audit_rows) and, by default, `db`
+    is committed before this returns. With commit=False the caller's next
+    commit stores it together with the change it describes.
+
+    Changes to the models in AUDITED_MODELS made through the ORM are logged
+    automatically on flush (see _stage_flushed_changes); log_operation is
+    for everything else.
+
     Args:
         db: Database session
         table_name: Name of the table being modified
@@ -29,39 +221,185 @@ def log_operation(
         new_data: New state of the record (for INSERT/UPDATE)
         user_id: ID of the user performing the operation (optional)
         ip_address: IP address of the request (optional)
+        commit: Commit `db` after staging the row; pass False to leave it
+            to the caller's unit of work
     """
+    log_operations(db, [{
+        "table_name": table_name,
+        "record_id": record_id,
+        "operation": operation,
+        "old_data": old_data,
+        "new_data": new_data,
+        "user_id": user_id,
+        "ip_address": ip_address
+    }], commit=commit)
+
+
+def log_operations(db: Session, entries: List[dict], commit: bool = True):
+    """
+    Log several operations in one batch instead of one commit per entry
+
+    Args:
+        db: Database session
+        entries: Dicts with the keyword arguments of log_operation
+            (table_name, record_id, operation, old_data, new_data, ...)
+        commit: Commit `db` after staging the rows; pass False to have
+            them committed together with the caller's own changes
+    """
+    if not entries:
+        return
     try:
-        # Convert datetime objects to strings for JSON serialization
-        if old_data:
-            old_data = _serialize_data(old_data)
-        if new_data:
-            new_data = _serialize_data(new_data)
-        
-        audit_log = AuditLog(
-            table_name=table_name,
-            record_id=record_id,
-            operation=operation,
-            old_data=old_data,
-            new_data=new_data,
-            user_id=user_id,
-            ip_address=ip_address
-        )
-        
-        db.add(audit_log)
-        db.commit()
-        
-        logger.info(f"Audit log created: {operation} on {table_name} (ID: {record_id})")
-        
+        stage_audit_rows(db, [_audit_row(entry) for entry in entries])
+        if commit:
+            db.commit()
+
+        logger.info(f"Audit logs created: {len(entries)} entries")
+
     except Exception as e:
-        logger.error(f"Failed to create audit log: {str(e)}")
+        logger.error(f"Failed to create audit logs: {str(e)}")
+        if not commit:
+            raise
         db.rollback()
 
 
+def audit_write_mode(session: Session) -> str:
+    """AUDIT_WRITE_MODE, unless the session overrides it with session.info["audit_mode"]"""
+    return session.info.get("audit_mode", AUDIT_WRITE_MODE)
+
+
+def stage_audit_rows(session: Session, rows: List[dict]):
+    """
+    Attach audit rows (AuditLog column values) to the session's current
+    transaction.
+
+    In "transaction" mode they are inserted on the session's connection right
+    away, so they commit or roll back with the change they describe. In
+    "queued" mode they are held on the session, stamped with the time of the
+    change, handed to audit_writer when the transaction commits and dropped
+    when it does not. The data commit then carries no audit insert, but the
+    rows appear only after the writer's next batch (up to
+    AUDIT_FLUSH_INTERVAL later), and rows still queued when the process dies
+    without a clean shutdown are lost.
+    """
+    if not rows:
+        return
+    if audit_write_mode(session) == "queued":
+        now = datetime.now(timezone.utc)
+        session.info.setdefault("audit_pending", []).extend({**row, "timestamp": now} for row in rows)
+    else:
+        session.connection().execute(insert(AuditLog), rows)
+
+
+def _enqueue_committed(session: Session):
+    """after_commit hook: queued-mode rows of the committed transaction go to the writer"""
+    rows = session.info.pop("audit_pending", None)
+    if rows:
+        audit_writer.enqueue(rows)
+
+
+def _drop_uncommitted(session: Session, transaction):
+    """after_transaction_end hook: queued-mode rows of a transaction that did not commit are discarded"""
+    if transaction.parent is None:
+        session.info.pop("audit_pending", None)
+
+
+def _audit_row(entry: dict, timestamp: datetime = None) -> dict:
+    """AuditLog column values for a log_operation-style entry"""
+    row = {
+        "table_name": entry["table_name"],
+        "record_id": entry["record_id"],
+        "operation": entry["operation"],
+        "changes": encode_changes(
+            _serialize_data(entry["old_data"]) if entry.get("old_data") else None,
+            _serialize_data(entry["new_data"]) if entry.get("new_data") else None
+        ),
+        "user_id": entry.get("user_id"),
+        "ip_address": entry.get("ip_address")
+    }
+    if timestamp is not None:
+        # Time of the operation, not of the batch insert
+        row["timestamp"] = timestamp
+    return row
+
+
+# ORM changes to these models are audited on flush, in the same transaction
+AUDITED_MODELS = (Category, Quality, Size, Item, Supplier)
+
+
+def _stage_flushed_changes(session: Session, flush_context):
+    """
+    after_flush hook: stage one audit row per new, changed or deleted
+    instance of AUDITED_MODELS in the session's transaction (see
+    stage_audit_rows), so the commit that stores the change also stores, or
+    in queued mode enqueues, its audit trail.
+
+    INSERT rows carry the new column values, DELETE rows the last loaded
+    ones and UPDATE rows the old and new values of the changed columns only.
+    Set session.info["audit"] = False to skip a session.
+    """
+    if session.info.get("audit") is False:
+        return
+    rows = []
+    for instance in session.new:
+        if isinstance(instance, AUDITED_MODELS):
+            rows.append(_change_row(instance, "INSERT", new_data=_column_values(instance)))
+    for instance in session.dirty:
+        if isinstance(instance, AUDITED_MODELS):
+            old_data, new_data = _changed_columns(instance)
+            if new_data:
+                rows.append(_change_row(instance, "UPDATE", old_data=old_data, new_data=new_data))
+    for instance in session.deleted:
+        if isinstance(instance, AUDITED_MODELS):
+            rows.append(_change_row(instance, "DELETE", old_data=_column_values(instance)))
+    stage_audit_rows(session, rows)
+
+
+def _change_row(instance, operation: str, old_data: dict = None, new_data: dict = None) -> dict:
+    return _audit_row({
+        "table_name": instance.__tablename__,
+        "record_id": instance.id,
+        "operation": operation,
+        "old_data": old_data,
+        "new_data": new_data
+    })
+
+
+def _column_values(instance) -> dict:
+    """Loaded column values, without triggering lazy loads during the flush"""
+    state = inspect(instance)
+    return {attr.key: state.dict[attr.key] for attr in state.mapper.column_attrs if attr.key in state.dict}
+
+
+def _changed_columns(instance):
+    """
+    (old record, new record) of the loaded columns, or ({}, {}) when none
+    changed since the last flush
+    """
+    state = inspect(instance)
+    new_data = _column_values(instance)
+    old_data = dict(new_data)
+    changed = False
+    for attr in state.mapper.column_attrs:
+        history = state.attrs[attr.key].history
+        if not history.added:
+            continue
+        old = history.deleted[0] if history.deleted else None
+        if history.added[0] != old:
+            old_data[attr.key] = old
+            changed = True
+    return (old_data, new_data) if changed else ({}, {})
+
+
+event.listen(SessionLocal, "after_flush", _stage_flushed_changes)
+event.listen(SessionLocal, "after_commit", _enqueue_committed)
+event.listen(SessionLocal, "after_transaction_end", _drop_uncommitted)
+
+
 def _serialize_data(data: dict) -> dict:
     """Convert datetime and other non-serializable objects to strings"""
     serialized = {}
     for key, value in data.items():
-        if isinstance(value, datetime):
+        if isinstance(value, (datetime, date)):
             serialized[key] = value.isoformat()
         elif hasattr(value, '__dict__'):
             # Skip SQLAlchemy relationship objects
@@ -71,6 +409,64 @@ def _serialize_data(data: dict) -> dict:
     return serialized
 
 
+# Single-column indexes of older databases, now prefixes of the composite ones
+_SUPERSEDED_INDEXES = ("ix_audit_logs_table_name", "ix_audit_logs_timestamp")
+
+
+def ensure_audit_indexes(engine) -> bool:
+    """
+    Create the audit_logs indexes missing from databases made before they
+    existed, and drop the single-column ones they replace
+    """
+    try:
+        with engine.begin() as conn:
+            for index in AuditLog.__table__.indexes:
+                index.create(conn, checkfirst=True)
+            for name in _SUPERSEDED_INDEXES:
+                conn.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+    except Exception as e:
+        logger.warning(f"Audit log indexes unavailable: {str(e)}")
+        return False
+    return True
+
+
+# Timestamps compared as stored, so a cursor taken from a row matches that
+# row exactly (SQLite keeps rows with and without fractional seconds)
+RAW_TIMESTAMP = type_coerce(AuditLog.timestamp, String)
+
+
+def audit_logs_query(
+    db: Session,
+    table_name: str = None,
+    record_id: int = None,
+    operation: str = None,
+    start_date: datetime = None,
+    end_date: datetime = None
+):
+    query = db.query(AuditLog)
+    
+    if table_name and record_id is None and (start_date or end_date):
+        # Keep the planner on the (timestamp, id) range; the table_name
+        # prefix of the per-record index would mean sorting every row of the table
+        query = query.filter(AuditLog.table_name + "" == table_name)
+    elif table_name:
+        query = query.filter(AuditLog.table_name == table_name)
+    
+    if record_id is not None:
+        query = query.filter(AuditLog.record_id == record_id)
+    
+    if operation:
+        query = query.filter(AuditLog.operation == operation)
+    
+    if start_date:
+        query = query.filter(AuditLog.timestamp >= start_date)
+    
+    if end_date:
+        query = query.filter(AuditLog.timestamp <= end_date)
+    
+    return query
+
+
 def get_audit_logs(
     db: Session,
     table_name: str = None,
@@ -78,10 +474,12 @@ def get_audit_logs(
     start_date: datetime = None,
     end_date: datetime = None,
     limit: int = 100,
-    offset: int = 0
+    offset: int = 0,
+    record_id: int = None,
+    include_archived: bool = False
 ):
     """
-    Retrieve audit logs with optional filters
+    Retrieve audit logs with optional filters, newest first
     
     Args:
         db: Database session
@@ -91,25 +489,88 @@ def get_audit_logs(
         end_date: Filter by end date
         limit: Maximum number of records to return
         offset: Number of records to skip
+        record_id: Filter by record ID (with table_name)
+        include_archived: Also read rows moved to the audit archive
         
     Returns:
         List of audit log records
     """
-    query = db.query(AuditLog)
-    
-    if table_name:
-        query = query.filter(AuditLog.table_name == table_name)
-    
-    if operation:
-        query = query.filter(AuditLog.operation == operation)
-    
-    if start_date:
-        query = query.filter(AuditLog.timestamp >= start_date)
-    
-    if end_date:
-        query = query.filter(AuditLog.timestamp <= end_date)
-    
-    query = query.order_by(AuditLog.timestamp.desc())
+    query = audit_logs_query(db, table_name, record_id, operation, start_date, end_date)
+    query = query.order_by(RAW_TIMESTAMP.desc(), AuditLog.id.desc())
+    if include_archived:
+        filters = dict(table_name=table_name, record_id=record_id, operation=operation,
+                       start_date=start_date, end_date=end_date)
+        rows = query.add_columns(RAW_TIMESTAMP).limit(offset + limit).all()
+        rows = _with_archived(rows, offset + limit, None, True, filters)
+        return [row[0] for row in rows[offset:]]
     query = query.limit(limit).offset(offset)
     
     return query.all()
+
+
+def get_audit_logs_page(
+    db: Session,
+    position: Optional[dict] = None,
+    limit: int = 100,
+    table_name: str = None,
+    record_id: int = None,
+    operation: str = None,
+    start_date: datetime = None,
+    end_date: datetime = None,
+    include_archived: bool = False
+):
+    """
+    Retrieve one keyset page of audit logs, newest first
+
+    Pages continue from the (timestamp, id) of the last row returned, so
+    they cost an index range scan however deep they are.
+
+    Args:
+        db: Database session
+        position: Decoded cursor from a previous page, if any
+        limit: Page size
+        table_name, record_id, operation, start_date, end_date,
+            include_archived: As in get_audit_logs
+
+    Returns:
+        Tuple of (logs, next_cursor, prev_cursor)
+    """
+    backwards = position is not None and position.get("dir") == "prev"
+    query = audit_logs_query(db, table_name, record_id, operation, start_date, end_date)
+    if position is not None:
+        value, last_id = position.get("v"), position["id"]
+        if backwards:
+            query = query.filter(RAW_TIMESTAMP >= value, or_(RAW_TIMESTAMP > value, AuditLog.id > last_id))
+        else:
+            query = query.filter(RAW_TIMESTAMP <= value, or_(RAW_TIMESTAMP < value, AuditLog.id < last_id))
+    if backwards:
+        query = query.order_by(RAW_TIMESTAMP.asc(), AuditLog.id.asc())
+    else:
+        query = query.order_by(RAW_TIMESTAMP.desc(), AuditLog.id.desc())
+
+    rows = query.add_columns(RAW_TIMESTAMP).limit(limit + 1).all()
+    if include_archived:
+        filters = dict(table_name=table_name, record_id=record_id, operation=operation,
+                       start_date=start_date, end_date=end_date)
+        rows = _with_archived(rows, limit + 1, position, not backwards, filters)
+    rows, next_cursor, prev_cursor = page_cursors(
+        rows, limit, position, key=lambda row: (row[1], row[0].id), extra={}
+    )
+    return [row[0] for row in rows], next_cursor, prev_cursor
+
+
+def _with_archived(rows: list, count: int, position: Optional[dict], newest_first: bool, filters: dict) -> list:
+    """
+    Merge (AuditLog, raw timestamp) rows from the database with the archived
+    rows that match the same filters, keeping the first `count` in order
+    """
+    archived = read_archived_logs(count, position, newest_first, **filters)
+    live_ids = {row[0].id for row in rows}
+    rows = list(rows) + [
+        (AuditLog(**{**row, "timestamp": datetime.fromisoformat(row["timestamp"])}), row["timestamp"])
+        for row in archived
+        # A row can be in both while an archive run is deleting its chunk
+        if row["id"] not in live_ids
+    ]
+    rows.sort(key=lambda row: (row[1], row[0].id), reverse=newest_first)
+    return rows[:count]
@@ -0,0 +1,207 @@
+"""
+Cached quality x size matrix of the items in a category.
+
+The matrix behind GET /api/items/category/{id}/table is built once per
+category and then patched in place: item writes from any connection record
+the item in item_changes (see table_versions), and the next read re-fetches
+only the items changed since the matrix was last brought up to date. A
+category's ETag is derived from the shared table versions, so a matching
+If-None-Match is answered without querying the items.
+"""
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models.models import Item
+from app.utils.logger_config import get_logger
+from app.utils.table_versions import get_category_items_version, get_table_versions
+from app.utils.taxonomy_cache import taxonomy_cache
+
+logger = get_logger()
+
+TAXONOMY_TABLES = ("categories", "qualities", "sizes")
+
+_CELL_COLUMNS = (
+    Item.id, Item.quality_id, Item.size_id, Item.sku, Item.stock_quantity, Item.selling_price,
+    Item.unit, Item.gst_percentage, Item.low_stock_threshold, Item.is_low_stock
+)
+
+
+@dataclass
+class _Matrix:
+    taxonomy_versions: Tuple[int, ...]
+    version: int  # item_changes seq the cells are current with
+    qualities: List[dict]
+    sizes: List[dict]
+    quality_index: Dict[int, int]
+    size_index: Dict[int, int]
+    cells: Dict[int, dict] = field(default_factory=dict)  # item id -> cell
+    rendered: Dict[str, dict] = field(default_factory=dict)  # layout -> body, dropped on every change
+
+
+class CategoryMatrixCache:
+    """Per-category item matrices, refreshed incrementally from item_changes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._matrices: Dict[int, _Matrix] = {}
+        self.hits = 0
+        self.patches = 0
+        self.rebuilds = 0
+
+    def current_etag(self, category_id: int, layout: str) -> str:
+        """Validator for the category's current contents; computed from the table versions"""
+        return self._etag(
+            category_id, get_category_items_version(category_id), get_table_versions(*TAXONOMY_TABLES), layout
+        )
+
+    def _etag(self, category_id: int, version: int, taxonomy_versions: Tuple[int, ...], layout: str) -> str:
+        taxonomy = ".".join(str(v) for v in taxonomy_versions)
+        return f'"m{category_id}-{version}-{taxonomy}-{layout}"'
+
+    def render(self, db: Session, category_id: int, layout: str) -> Tuple[dict, str]:
+        """Response body for a category in the given layout ("map" or "columnar") and its ETag"""
+        matrix = self.get(db, category_id)
+        body = matrix.rendered.get(layout)
+        if body is None:
+            body = _columnar(category_id, matrix) if layout == "columnar" else _map(category_id, matrix)
+            matrix.rendered[layout] = body
+        return body, self._etag(category_id, matrix.version, matrix.taxonomy_versions, layout)
+
+    def get(self, db: Session, category_id: int) -> _Matrix:
+        """The up-to-date matrix for a category, rebuilding or patching it as needed"""
+        taxonomy_versions = get_table_versions(*TAXONOMY_TABLES)
+        version = get_category_items_version(category_id)
+        with self._lock:
+            matrix = self._matrices.get(category_id)
+
+            if matrix is None or matrix.taxonomy_versions != taxonomy_versions:
+                matrix = self._build(db, category_id, taxonomy_versions)
+                self.rebuilds += 1
+            elif matrix.version != version:
+                self._patch(db, category_id, matrix, _changed_items(db, category_id, matrix.version))
+                self.patches += 1
+            else:
+                self.hits += 1
+
+            # Versions are read before the items, so a write racing this read
+            # is patched in again next time rather than missed
+            matrix.version = version
+            self._matrices[category_id] = matrix
+            return matrix
+
+    def _build(self, db: Session, category_id: int, taxonomy_versions: Tuple[int, ...]) -> _Matrix:
+        qualities = taxonomy_cache.qualities_for_category(db, category_id)
+        sizes = taxonomy_cache.sizes_for_category(db, category_id)
+        matrix = _Matrix(
+            taxonomy_versions=taxonomy_versions,
+            version=0,
+            qualities=[{"id": q.id, "name": q.name} for q in qualities],
+            sizes=[{"id": s.id, "size_value": s.size_value, "size_display": s.size_display} for s in sizes],
+            quality_index={q.id: position for position, q in enumerate(qualities)},
+            size_index={s.id: position for position, s in enumerate(sizes)},
+        )
+        for row in db.query(*_CELL_COLUMNS).filter(Item.category_id == category_id):
+            matrix.cells[row.id] = _cell(row)
+        logger.debug(f"Built item matrix for category {category_id} ({len(matrix.cells)} items)")
+        return matrix
+
+    def _patch(self, db: Session, category_id: int, matrix: _Matrix, item_ids: Set[int]):
+        rows = db.query(*_CELL_COLUMNS).filter(Item.id.in_(item_ids), Item.category_id == category_id)
+        found = set()
+        for row in rows:
+            matrix.cells[row.id] = _cell(row)
+            found.add(row.id)
+        for item_id in item_ids - found:
+            matrix.cells.pop(item_id, None)
+        matrix.rendered = {}
+
+    def invalidate(self):
+        with self._lock:
+            self._matrices.clear()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "patches": self.patches,
+            "rebuilds": self.rebuilds,
+            "categories": len(self._matrices),
+        }
+
+
+# columnar array name -> cell key
+_COLUMNAR_FIELDS = {
+    "item_ids": "id",
+    "stock": "stock_quantity",
+    "price": "selling_price",
+    "low_stock": "is_low_stock",
+}
+
+
+def _map(category_id: int, matrix: _Matrix) -> dict:
+    """The historical layout: cells keyed by "{quality_id}_{size_id}" """
+    items = {}
+    for cell in matrix.cells.values():
+        items[f"{cell['quality_id']}_{cell['size_id']}"] = {
+            key: value for key, value in cell.items() if key not in ("quality_id", "size_id")
+        }
+    return {
+        "category_id": category_id,
+        "qualities": matrix.qualities,
+        "sizes": matrix.sizes,
+        "items": items
+    }
+
+
+def _columnar(category_id: int, matrix: _Matrix) -> dict:
+    """
+    Dense [quality][size] arrays, null where no item exists.
+
+    Rows follow `qualities` and columns follow `sizes`, so a client can index
+    cells directly instead of building string keys.
+    """
+    rows, columns = len(matrix.qualities), len(matrix.sizes)
+    arrays = {name: [[None] * columns for _ in range(rows)] for name in _COLUMNAR_FIELDS}
+    for cell in matrix.cells.values():
+        row = matrix.quality_index.get(cell["quality_id"])
+        column = matrix.size_index.get(cell["size_id"])
+        if row is None or column is None:
+            continue
+        for name, key in _COLUMNAR_FIELDS.items():
+            arrays[name][row][column] = cell[key]
+    return {
+        "category_id": category_id,
+        "qualities": matrix.qualities,
+        "sizes": matrix.sizes,
+        **arrays
+    }
+
+
+def _changed_items(db: Session, category_id: int, since: int) -> Set[int]:
+    """Ids of the items written in (or moved out of) a category after item_changes seq `since`"""
+    rows = db.execute(
+        text("SELECT item_id FROM item_changes WHERE category_id = :category_id AND seq > :since"),
+        {"category_id": category_id, "since": since}
+    )
+    return {item_id for (item_id,) in rows}
+
+
+def _cell(row) -> dict:
+    return {
+        "id": row.id,
+        "quality_id": row.quality_id,
+        "size_id": row.size_id,
+        "sku": row.sku,
+        "stock_quantity": row.stock_quantity,
+        "selling_price": row.selling_price,
+        "unit": row.unit,
+        "gst_percentage": row.gst_percentage,
+        "low_stock_threshold": row.low_stock_threshold,
+        "is_low_stock": bool(row.is_low_stock)
+    }
+
+
+category_matrix = CategoryMatrixCache()
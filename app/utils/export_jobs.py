@@ -0,0 +1,217 @@
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.utils.item_export import EXPORT_FORMATS, ExportTable, write_export
+from app.utils.logger_config import get_logger
+
+logger = get_logger()
+
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", "2"))
+EXPORT_MAX_PENDING = int(os.getenv("EXPORT_MAX_PENDING", "8"))
+EXPORT_JOB_TTL = int(os.getenv("EXPORT_JOB_TTL", "3600"))  # seconds a finished file is kept
+EXPORT_DIR = os.getenv("EXPORT_DIR", os.path.join(tempfile.gettempdir(), "InventoryPro", "exports"))
+EXPORT_PURGE_INTERVAL = int(os.getenv("EXPORT_PURGE_INTERVAL", "300"))  # seconds, 0 turns it off
+
+# How often (in rows) a running job publishes its progress
+_PROGRESS_EVERY = 500
+
+
+class ExportQueueFullError(Exception):
+    """Raised when EXPORT_MAX_PENDING jobs are already queued or running"""
+
+
+@dataclass
+class ExportJob:
+    id: str
+    format: str
+    filename: str
+    status: str = "queued"  # queued, running, completed, failed
+    phase: str = "queued"  # queued, counting, writing, completed, failed
+    rows_processed: int = 0
+    total_rows: Optional[int] = None
+    path: Optional[str] = None
+    file_size: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+
+    @property
+    def media_type(self) -> str:
+        return EXPORT_FORMATS[self.format][1]
+
+    @property
+    def download_name(self) -> str:
+        return f"{self.filename}{EXPORT_FORMATS[self.format][0]}"
+
+
+class ExportJobManager:
+    """
+    Runs item exports on a bounded thread pool and keeps the finished files
+    on disk for EXPORT_JOB_TTL seconds.
+
+    Job state lives in memory only; files left behind by a previous process
+    are removed once they are older than the TTL.
+    """
+
+    def __init__(self, workers: int, max_pending: int, ttl: int, directory: str):
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.directory = directory
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="export")
+        self._jobs: Dict[str, ExportJob] = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._remove_stale_files()
+
+    def submit(
+        self,
+        format: str,
+        filename: str,
+        build: Callable[[Session], ExportTable],
+        count: Optional[Callable[[Session], int]] = None
+    ) -> ExportJob:
+        """
+        Queue an export and return its job immediately.
+
+        Args:
+            format: One of EXPORT_FORMATS
+            filename: Download name without extension
+            build: Produces the export table from a session owned by the job
+            count: Optional row count used to report total_rows
+        """
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported format: {format}")
+
+        self.purge_expired()
+        with self._lock:
+            active = sum(1 for job in self._jobs.values() if job.status in ("queued", "running"))
+            if active >= self.max_pending:
+                raise ExportQueueFullError(f"{active} export jobs already in progress")
+            job = ExportJob(id=uuid.uuid4().hex, format=format, filename=filename)
+            self._jobs[job.id] = job
+
+        self._executor.submit(self._run, job, build, count)
+        logger.info(f"Queued export job {job.id} ({format})")
+        return job
+
+    def get(self, job_id: str) -> Optional[ExportJob]:
+        self.purge_expired()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job: ExportJob, build, count):
+        job.status = "running"
+        path = os.path.join(self.directory, f"{job.id}{EXPORT_FORMATS[job.format][0]}")
+        db = SessionLocal()
+        try:
+            if count is not None:
+                job.phase = "counting"
+                job.total_rows = count(db)
+
+            job.phase = "writing"
+            table = build(db)
+            table = table._replace(rows=self._track(job, table.rows))
+            job.rows_processed = write_export(job.format, path, table)
+
+            job.path = path
+            job.file_size = os.path.getsize(path)
+            job.status = job.phase = "completed"
+            logger.info(f"Export job {job.id} completed: {job.rows_processed} rows, {job.file_size} bytes")
+        except Exception as e:
+            job.status = job.phase = "failed"
+            job.error = str(e)
+            logger.error(f"Export job {job.id} failed: {str(e)}")
+            if os.path.exists(path):
+                os.remove(path)
+        finally:
+            db.close()
+            job.finished_at = datetime.now(timezone.utc)
+            job.expires_at = job.finished_at + timedelta(seconds=self.ttl)
+
+    @staticmethod
+    def _track(job: ExportJob, rows: Iterable[list]):
+        processed = 0
+        for row in rows:
+            yield row
+            processed += 1
+            if processed % _PROGRESS_EVERY == 0:
+                job.rows_processed = processed
+        job.rows_processed = processed
+
+    def purge_expired(self):
+        """Forget expired jobs and delete their files"""
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            expired = [job for job in self._jobs.values() if job.expires_at and job.expires_at <= now]
+            for job in expired:
+                del self._jobs[job.id]
+        for job in expired:
+            if job.path and os.path.exists(job.path):
+                os.remove(job.path)
+
+    def _remove_stale_files(self):
+        cutoff = time.time() - self.ttl
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if os.path.isfile(path) and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+
+    def shutdown(self):
+        """Stop accepting work and cancel jobs that have not started"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class ExportPurgeScheduler:
+    """
+    Background thread that deletes expired export files every `interval`
+    seconds, so they go away even when no one submits or polls a job
+    """
+
+    def __init__(self, manager: ExportJobManager, interval: int):
+        self.manager = manager
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self.interval <= 0:
+            logger.info("Export purge disabled (EXPORT_PURGE_INTERVAL=0)")
+            return
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="export-purge", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the thread and purge once more"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=30)
+            self._thread = None
+        self._purge()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._purge()
+
+    def _purge(self):
+        try:
+            self.manager.purge_expired()
+        except Exception as e:
+            logger.error(f"Export purge failed: {str(e)}")
+
+
+export_jobs = ExportJobManager(EXPORT_WORKERS, EXPORT_MAX_PENDING, EXPORT_JOB_TTL, EXPORT_DIR)
+export_purger = ExportPurgeScheduler(export_jobs, EXPORT_PURGE_INTERVAL)
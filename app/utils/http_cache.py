@@ -0,0 +1,71 @@
+"""
+Conditional GET support driven by the table version registry.
+
+Read endpoints call conditional_get() before touching the database. The
+ETag is derived from the write versions of the tables the response is built
+from plus the request URL, so it changes whenever one of those tables is
+written, and a client holding the current tag gets 304 without a query.
+"""
+import hashlib
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, Sequence
+
+from fastapi import Request, Response
+
+from app.utils.table_versions import get_last_modified, get_table_versions
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True when the request's If-None-Match names `etag` (or is `*`); weak tags compare equal"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def table_etag(tables: Sequence[str], variant: str = "") -> str:
+    """Strong ETag for a response built from `tables`; `variant` separates different URLs"""
+    versions = ".".join(str(version) for version in get_table_versions(*tables))
+    digest = hashlib.sha1(variant.encode("utf-8")).hexdigest()[:12]
+    return f'"{versions}-{digest}"'
+
+
+def _not_modified_since(request: Request, last_modified: float) -> bool:
+    header = request.headers.get("if-modified-since")
+    if not header:
+        return False
+    try:
+        since = parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+    # HTTP dates have one-second resolution
+    return int(last_modified) <= since
+
+
+def conditional_get(request: Request, response: Response, tables: Sequence[str]) -> Optional[Response]:
+    """
+    Validate a GET against the current versions of `tables`.
+
+    Returns a 304 response when If-None-Match (or, without it,
+    If-Modified-Since) shows the client's copy is current. Otherwise sets
+    ETag and Last-Modified on `response` and returns None so the handler
+    builds the body as usual.
+    """
+    etag = table_etag(tables, str(request.url.path) + "?" + str(request.url.query))
+    last_modified = get_last_modified(*tables)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(last_modified, usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+
+    if "if-none-match" in request.headers:
+        fresh = etag_matches(request, etag)
+    else:
+        fresh = _not_modified_since(request, last_modified)
+    if fresh:
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,263 @@
+import csv
+import io
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter
+from sqlalchemy import func
+from sqlalchemy.orm import Query, Session
+
+from app.database import SessionLocal
+from app.models.models import Item, Size
+from app.utils.logger_config import get_logger
+from app.utils.taxonomy_cache import taxonomy_cache
+
+logger = get_logger()
+
+EXPORT_COLUMNS = [
+    "Item ID", "SKU", "Category", "Quality", "Size", "Stock",
+    "Unit", "Price", "GST %", "Low Stock Threshold"
+]
+
+STOCK_NUMBER_FORMAT = "#,##0.###"
+XLSX_NUMBER_FORMATS = {
+    "Item ID": "0",
+    "Stock": STOCK_NUMBER_FORMAT,
+    "Price": "#,##0.00",
+    "GST %": "0.##",
+    "Low Stock Threshold": STOCK_NUMBER_FORMAT,
+}
+
+_XLSX_HEADER_FONT = Font(bold=True)
+
+# Rows fetched per round trip while streaming, and bytes buffered per chunk sent
+EXPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# format -> (file extension, media type)
+EXPORT_FORMATS = {
+    "csv": (".csv", "text/csv"),
+    "tsv": (".tsv", "text/tab-separated-values"),
+    "excel": (".xlsx", XLSX_MEDIA_TYPE),
+    "pdf": (".pdf", "application/pdf"),
+}
+
+
+class ExportTable(NamedTuple):
+    """Header plus lazily produced rows of one export"""
+    header: List[str]
+    rows: Iterable[list]
+    # 0-based column -> Excel number format; None looks formats up by header name
+    number_formats: Optional[Dict[int, str]] = None
+
+
+def item_rows(db: Session, query: Query) -> ExportTable:
+    """List view: one row per item, names resolved from the taxonomy cache"""
+    def rows():
+        for item in query.yield_per(EXPORT_BATCH_SIZE):
+            category_name, quality_name, size_display = taxonomy_cache.names(
+                db, item.category_id, item.quality_id, item.size_id
+            )
+            yield [
+                item.id,
+                item.sku,
+                category_name,
+                quality_name,
+                size_display,
+                item.stock_quantity,
+                item.unit,
+                item.selling_price,
+                item.gst_percentage,
+                item.low_stock_threshold
+            ]
+
+    return ExportTable(list(EXPORT_COLUMNS), rows())
+
+
+def pivot_rows(db: Session, query: Query) -> ExportTable:
+    """
+    Table view: sizes down, qualities across, stock in the cells.
+
+    `query` is the unordered, filtered items query and must already join
+    sizes. Stock is aggregated per (size, quality) in SQL and the grid is
+    streamed one size row at a time, so only the quality header is held in
+    memory.
+    """
+    quality_ids = [quality_id for (quality_id,) in query.with_entities(Item.quality_id).distinct()]
+    qualities = [taxonomy_cache.quality(db, quality_id) for quality_id in quality_ids]
+    qualities = sorted((q for q in qualities if q), key=lambda q: q.name)
+    column_of = {quality.id: position for position, quality in enumerate(qualities, start=1)}
+    header = ["Size"] + [quality.name for quality in qualities]
+
+    cells = query.with_entities(
+        Item.size_id, Item.quality_id, func.sum(Item.stock_quantity)
+    ).group_by(Item.size_id, Item.quality_id).order_by(Size.sort_order, Item.size_id)
+
+    def rows():
+        current_size = None
+        row = None
+        for size_id, quality_id, stock in cells.yield_per(EXPORT_BATCH_SIZE):
+            if size_id != current_size:
+                if row is not None:
+                    yield row
+                size = taxonomy_cache.size(db, size_id)
+                current_size = size_id
+                row = [size.size_display if size else ""] + [""] * len(qualities)
+            if quality_id in column_of:
+                row[column_of[quality_id]] = stock
+        if row is not None:
+            yield row
+
+    # Every pivot column after Size holds stock
+    number_formats = {position: STOCK_NUMBER_FORMAT for position in range(1, len(header))}
+    return ExportTable(header, rows(), number_formats)
+
+
+def stream_delimited(build: Callable[[Session], ExportTable], delimiter: str = ",") -> Iterator[bytes]:
+    """
+    Encode an export as CSV/TSV chunks for a StreamingResponse.
+
+    The generator runs after the request handler has returned, so it opens
+    its own session instead of borrowing the request's one.
+    """
+    db = SessionLocal()
+    try:
+        table = build(db)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=delimiter, lineterminator="\n")
+        writer.writerow(table.header)
+        row_count = 0
+        for row in table.rows:
+            writer.writerow(row)
+            row_count += 1
+            if buffer.tell() >= EXPORT_CHUNK_SIZE:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+        logger.info(f"Streamed export of {row_count} rows")
+    except Exception as e:
+        logger.error(f"Export stream failed: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+
+def write_delimited(path: str, table: ExportTable, delimiter: str = ",") -> int:
+    """Write an export to a CSV/TSV file row by row; returns the number of data rows"""
+    row_count = 0
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle, delimiter=delimiter, lineterminator="\n")
+        writer.writerow(table.header)
+        for row in table.rows:
+            writer.writerow(row)
+            row_count += 1
+    return row_count
+
+
+def write_xlsx(path: str, table: ExportTable, sheet_title: str = "Inventory") -> int:
+    """
+    Write an export to an .xlsx file with openpyxl's write-only workbook.
+
+    Rows are serialised to the sheet as they arrive, so memory does not grow
+    with the row count. The header row is bold and frozen, and numeric cells
+    get the table's number formats (by default looked up by header name in
+    XLSX_NUMBER_FORMATS). Returns the number of data rows written.
+    """
+    header = table.header
+    number_formats = table.number_formats
+    if number_formats is None:
+        number_formats = {
+            position: XLSX_NUMBER_FORMATS[name]
+            for position, name in enumerate(header)
+            if name in XLSX_NUMBER_FORMATS
+        }
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheet_title)
+    sheet.freeze_panes = "A2"
+    for position, name in enumerate(header, start=1):
+        sheet.column_dimensions[get_column_letter(position)].width = max(12, len(str(name)) + 2)
+
+    header_cells = []
+    for name in header:
+        cell = WriteOnlyCell(sheet, value=name)
+        cell.font = _XLSX_HEADER_FONT
+        header_cells.append(cell)
+    sheet.append(header_cells)
+
+    row_count = 0
+    for row in table.rows:
+        cells = []
+        for position, value in enumerate(row):
+            number_format = number_formats.get(position)
+            if number_format and isinstance(value, (int, float)):
+                cell = WriteOnlyCell(sheet, value=value)
+                cell.number_format = number_format
+                cells.append(cell)
+            else:
+                cells.append(value)
+        sheet.append(cells)
+        row_count += 1
+
+    workbook.save(path)
+    logger.info(f"Wrote xlsx export of {row_count} rows")
+    return row_count
+
+
+def write_pdf(target, table: ExportTable) -> int:
+    """
+    Render an export as a landscape PDF table to a path or binary file object.
+
+    ReportLab lays the whole table out before writing, so this holds every
+    row in memory; large PDFs should go through the export job queue.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter, landscape
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet
+
+    doc = SimpleDocTemplate(target, pagesize=landscape(letter))
+    elements = []
+    styles = getSampleStyleSheet()
+
+    elements.append(Paragraph(f"Inventory Export - {datetime.now().strftime('%Y-%m-%d %H:%M')}", styles['Title']))
+    elements.append(Spacer(1, 12))
+
+    # [Header] + [Rows]
+    data_list = [table.header] + list(table.rows)
+
+    # Create Table (repeat the header row on every page)
+    t = Table(data_list, repeatRows=1)
+    t.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ]))
+    elements.append(t)
+
+    doc.build(elements)
+    return len(data_list) - 1
+
+
+def write_export(format: str, path: str, table: ExportTable) -> int:
+    """Write an export in one of EXPORT_FORMATS to a file; returns the number of data rows"""
+    if format == "csv":
+        return write_delimited(path, table, ",")
+    if format == "tsv":
+        return write_delimited(path, table, "\t")
+    if format == "excel":
+        return write_xlsx(path, table)
+    if format == "pdf":
+        return write_pdf(path, table)
+    raise ValueError(f"Unsupported format: {format}")
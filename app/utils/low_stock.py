@@ -0,0 +1,162 @@
+"""
+Low-stock state kept as data instead of recomputed per query.
+
+`items.is_low_stock` is a generated column (stock_quantity <= low_stock_threshold)
+so every write — sales, purchases, item edits, raw SQL — keeps it correct, and
+the partial index `ix_items_low_stock` holds only the low-stock rows.
+
+`category_stock_counts` keeps the number of items and low-stock items per
+category. Triggers on items adjust it on every insert, delete and relevant
+update, so reading a category's counts is a primary-key lookup.
+"""
+from typing import List, Optional
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from app.models.models import CategoryStockCount, Item
+from app.utils.logger_config import get_logger
+
+logger = get_logger()
+
+_ADD_COLUMN = """
+ALTER TABLE items ADD COLUMN is_low_stock BOOLEAN
+GENERATED ALWAYS AS (stock_quantity <= low_stock_threshold) VIRTUAL
+"""
+
+_CREATE_INDEX = """
+CREATE INDEX IF NOT EXISTS ix_items_low_stock ON items (category_id, id) WHERE is_low_stock = 1
+"""
+
+_LOW = "(new.stock_quantity <= new.low_stock_threshold)"
+_WAS_LOW = "(old.stock_quantity <= old.low_stock_threshold)"
+
+_ADD_NEW = f"""
+    INSERT INTO category_stock_counts (category_id, item_count, low_stock_count)
+    VALUES (new.category_id, 1, {_LOW})
+    ON CONFLICT (category_id) DO UPDATE SET
+        item_count = item_count + 1,
+        low_stock_count = low_stock_count + excluded.low_stock_count;
+"""
+
+_REMOVE_OLD = f"""
+    UPDATE category_stock_counts
+    SET item_count = item_count - 1, low_stock_count = low_stock_count - {_WAS_LOW}
+    WHERE category_id = old.category_id;
+"""
+
+_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS items_stock_counts_ai AFTER INSERT ON items BEGIN
+        {_ADD_NEW}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS items_stock_counts_ad AFTER DELETE ON items BEGIN
+        {_REMOVE_OLD}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS items_stock_counts_au
+    AFTER UPDATE OF stock_quantity, low_stock_threshold, category_id ON items
+    WHEN old.category_id != new.category_id OR {_WAS_LOW} != {_LOW}
+    BEGIN
+        {_REMOVE_OLD}
+        {_ADD_NEW}
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS categories_stock_counts_ad AFTER DELETE ON categories BEGIN
+        DELETE FROM category_stock_counts WHERE category_id = old.id;
+    END
+    """,
+]
+
+_REBUILD = [
+    "DELETE FROM category_stock_counts",
+    """
+    INSERT INTO category_stock_counts (category_id, item_count, low_stock_count)
+    SELECT category_id, count(*), sum(is_low_stock) FROM items GROUP BY category_id
+    """,
+]
+
+_available = False
+
+
+def is_available() -> bool:
+    """True once ensure_low_stock_tracking has installed the count triggers"""
+    return _available
+
+
+def ensure_low_stock_tracking(engine) -> bool:
+    """
+    Bring an existing database up to date with the low-stock schema.
+
+    Adds the generated column and partial index to databases created before
+    they existed (create_all only covers new tables), installs the count
+    triggers and fills category_stock_counts when it is first created.
+    Returns False on non-SQLite databases, where counts fall back to a
+    GROUP BY over the partial index.
+    """
+    global _available
+
+    if engine.dialect.name != "sqlite":
+        logger.info("Low-stock count triggers skipped: they require SQLite")
+        return False
+
+    try:
+        with engine.begin() as conn:
+            columns = {row[1] for row in conn.execute(text("PRAGMA table_xinfo(items)"))}
+            if "is_low_stock" not in columns:
+                conn.execute(text(_ADD_COLUMN))
+                logger.info("Added items.is_low_stock column")
+            conn.execute(text(_CREATE_INDEX))
+
+            triggers_exist = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'items_stock_counts_ai'")
+            ).first()
+            for trigger in _TRIGGERS:
+                conn.execute(text(trigger))
+            if not triggers_exist:
+                for statement in _REBUILD:
+                    conn.execute(text(statement))
+                logger.info("Built per-category stock counts")
+    except Exception as e:
+        logger.warning(f"Low-stock tracking unavailable: {str(e)}")
+        return False
+
+    _available = True
+    return True
+
+
+def rebuild_stock_counts(db: Session) -> int:
+    """Recompute category_stock_counts from the items table; returns the number of categories"""
+    for statement in _REBUILD:
+        db.execute(text(statement))
+    db.commit()
+    count = db.query(func.count(CategoryStockCount.category_id)).scalar()
+    logger.info(f"Rebuilt stock counts ({count} categories)")
+    return count
+
+
+def category_stock_counts(db: Session, category_id: Optional[int] = None) -> List[dict]:
+    """Item and low-stock counts per category, optionally for a single category"""
+    if _available:
+        rows = db.query(
+            CategoryStockCount.category_id, CategoryStockCount.item_count, CategoryStockCount.low_stock_count
+        ).filter(CategoryStockCount.item_count > 0)
+        if category_id is not None:
+            rows = rows.filter(CategoryStockCount.category_id == category_id)
+    else:
+        rows = db.query(
+            Item.category_id,
+            func.count(Item.id),
+            func.count(Item.id).filter(Item.is_low_stock == True)
+        ).group_by(Item.category_id)
+        if category_id is not None:
+            rows = rows.filter(Item.category_id == category_id)
+
+    return [
+        {"category_id": row_category_id, "item_count": item_count, "low_stock_count": low_stock_count or 0}
+        for row_category_id, item_count, low_stock_count in rows
+    ]
@@ -0,0 +1,98 @@
+import base64
+import json
+from typing import Any, Optional
+
+from sqlalchemy import and_, or_
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded or does not match the query"""
+
+
+def encode_cursor(payload: dict) -> str:
+    """Encode a cursor payload as an opaque, URL-safe token"""
+    raw = json.dumps(payload, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """Decode a token produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise InvalidCursorError("Malformed cursor")
+    if not isinstance(payload, dict) or "id" not in payload:
+        raise InvalidCursorError("Malformed cursor")
+    return payload
+
+
+def keyset_filter(sort_column, id_column, sort_value: Any, last_id: int, descending: bool):
+    """
+    Build the WHERE clause that continues a (sort_column, id) ordering after a row.
+
+    SQLite sorts NULLs first in ascending order and last in descending order,
+    so a NULL sort value needs its own branch to keep the walk gap-free.
+
+    Args:
+        sort_column: Column (or expression) the query is ordered by
+        id_column: Unique tie-breaker column, ordered in the same direction
+        sort_value: Sort value of the last row already returned
+        last_id: Tie-breaker value of the last row already returned
+        descending: True when the walk runs in descending order
+    """
+    if descending:
+        if sort_value is None:
+            return and_(sort_column.is_(None), id_column < last_id)
+        return or_(
+            sort_column < sort_value,
+            and_(sort_column == sort_value, id_column < last_id),
+            sort_column.is_(None),
+        )
+
+    if sort_value is None:
+        return or_(
+            and_(sort_column.is_(None), id_column > last_id),
+            sort_column.isnot(None),
+        )
+    return or_(
+        sort_column > sort_value,
+        and_(sort_column == sort_value, id_column > last_id),
+    )
+
+
+def page_cursors(rows: list, limit: int, cursor: Optional[dict], key, extra: dict):
+    """
+    Trim an over-fetched keyset page and build its next/prev cursors.
+
+    The query must have fetched `limit + 1` rows in walk order; the extra row
+    only signals that another page exists in that direction.
+
+    Args:
+        rows: Rows fetched in walk order (reversed for a backwards walk)
+        limit: Page size requested by the client
+        cursor: Decoded cursor the page was fetched with, if any
+        key: Callable returning (sort_value, id) for a row
+        extra: Fields stored in every cursor (e.g. sort_by / sort_order)
+
+    Returns:
+        Tuple of (page_rows, next_cursor, prev_cursor)
+    """
+    backwards = bool(cursor) and cursor.get("dir") == "prev"
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+
+    def _make(row, direction):
+        value, row_id = key(row)
+        return encode_cursor({**extra, "v": value, "id": row_id, "dir": direction})
+
+    next_cursor = None
+    prev_cursor = None
+    if rows:
+        if has_more or backwards:
+            next_cursor = _make(rows[-1], "next")
+        if cursor and (has_more or not backwards):
+            prev_cursor = _make(rows[0], "prev")
+    return rows, next_cursor, prev_cursor
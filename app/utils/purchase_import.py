@@ -0,0 +1,144 @@
+"""
+Reading supplier invoices (CSV or XLSX) for POST /api/purchases/import.
+
+Rows are streamed — csv.reader over the upload, or openpyxl's read-only
+worksheet — and turned into ImportLine tuples plus a row-level error list.
+The header row is located by name, so invoices may carry extra columns or a
+title block above the table.
+"""
+import csv
+import io
+import math
+import os
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from openpyxl import load_workbook
+
+# Invoices longer than this are rejected rather than held in memory
+IMPORT_MAX_ROWS = int(os.getenv("PURCHASE_IMPORT_MAX_ROWS", "50000"))
+# Rows of an invoice searched for the header before giving up
+_HEADER_SEARCH_ROWS = 20
+
+# Accepted header spellings (lower-cased, spaces and underscores ignored) per field
+COLUMN_ALIASES = {
+    "sku": ("sku", "itemsku", "itemcode", "code", "partno", "partnumber"),
+    "quantity": ("quantity", "qty", "units"),
+    "purchase_price": ("purchaseprice", "price", "unitprice", "rate", "cost", "unitcost"),
+}
+
+
+class ImportLine(NamedTuple):
+    row: int  # 1-based row number in the file
+    sku: str
+    quantity: float
+    purchase_price: float
+
+
+class InvoiceFormatError(ValueError):
+    """The file cannot be read as an invoice at all (as opposed to individual bad rows)"""
+
+
+def _normalise(name) -> str:
+    return "".join(ch for ch in str(name or "").lower() if ch.isalnum())
+
+
+def _header_map(cells) -> Optional[Dict[str, int]]:
+    """Column position of each field if this row is a header naming all of them"""
+    positions = {}
+    for position, cell in enumerate(cells):
+        name = _normalise(cell)
+        for field, aliases in COLUMN_ALIASES.items():
+            if name in aliases and field not in positions:
+                positions[field] = position
+    return positions if len(positions) == len(COLUMN_ALIASES) else None
+
+
+def _csv_rows(file: BinaryIO, delimiter: str) -> Iterator[Tuple]:
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        for cells in csv.reader(text, delimiter=delimiter):
+            yield tuple(cells)
+    except UnicodeDecodeError:
+        raise InvoiceFormatError("CSV must be UTF-8 encoded")
+    finally:
+        text.detach()
+
+
+def _xlsx_rows(file: BinaryIO) -> Iterator[Tuple]:
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except Exception as e:
+        raise InvoiceFormatError(f"Not a readable .xlsx file: {str(e)}")
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def iter_invoice_rows(file: BinaryIO, filename: str) -> Iterator[Tuple[int, Tuple]]:
+    """(row number, cells) for every row of a .csv, .tsv or .xlsx invoice"""
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension in (".csv", ".txt"):
+        rows = _csv_rows(file, ",")
+    elif extension == ".tsv":
+        rows = _csv_rows(file, "\t")
+    elif extension in (".xlsx", ".xlsm"):
+        rows = _xlsx_rows(file)
+    else:
+        raise InvoiceFormatError(f"Unsupported invoice file type: {extension or 'unknown'} (use .csv, .tsv or .xlsx)")
+    return enumerate(rows, start=1)
+
+
+def _number(value) -> Optional[float]:
+    """The cell as a finite number, else None ("nan" and "inf" parse as floats but are not amounts)"""
+    try:
+        result = float(value) if isinstance(value, (int, float)) else float(str(value).replace(",", "").strip())
+    except (TypeError, ValueError):
+        return None
+    return result if math.isfinite(result) else None
+
+
+def parse_invoice(file: BinaryIO, filename: str) -> Tuple[List[ImportLine], List[dict], int]:
+    """
+    Read an invoice into (valid lines, row errors, number of data rows).
+
+    Blank rows are skipped. Every other row after the header yields either an
+    ImportLine or an error entry {row, sku, error}; SKUs are not resolved here.
+    """
+    rows = iter_invoice_rows(file, filename)
+
+    header = None
+    for row_number, cells in rows:
+        header = _header_map(cells)
+        if header or row_number >= _HEADER_SEARCH_ROWS:
+            break
+    if not header:
+        raise InvoiceFormatError(
+            "No header row found; the invoice needs SKU, quantity and price columns"
+        )
+
+    lines: List[ImportLine] = []
+    errors: List[dict] = []
+    data_rows = 0
+    for row_number, cells in rows:
+        if not any(cell not in (None, "") for cell in cells):
+            continue
+        data_rows += 1
+        if data_rows > IMPORT_MAX_ROWS:
+            raise InvoiceFormatError(f"Invoice has more than {IMPORT_MAX_ROWS} rows")
+
+        values = {field: cells[position] if position < len(cells) else None for field, position in header.items()}
+        sku = str(values["sku"]).strip() if values["sku"] not in (None, "") else ""
+        quantity = _number(values["quantity"])
+        price = _number(values["purchase_price"])
+
+        if not sku:
+            errors.append({"row": row_number, "sku": None, "error": "Missing SKU"})
+        elif quantity is None or quantity <= 0:
+            errors.append({"row": row_number, "sku": sku, "error": f"Invalid quantity: {values['quantity']!r}"})
+        elif price is None or price < 0:
+            errors.append({"row": row_number, "sku": sku, "error": f"Invalid price: {values['purchase_price']!r}"})
+        else:
+            lines.append(ImportLine(row_number, sku, quantity, price))
+
+    return lines, errors, data_rows
@@ -0,0 +1,113 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Sequence, Tuple
+
+from app.utils.table_versions import get_table_versions
+
+# Counts at or above this size may be served from an entry computed before
+# the latest write (flagged as an estimate) instead of being recounted.
+COUNT_ESTIMATE_THRESHOLD = 50000
+COUNT_ESTIMATE_MAX_AGE = 60  # seconds
+
+
+class VersionedCache:
+    """
+    Bounded LRU cache whose entries are tagged with the write versions of the
+    tables they were computed from. An entry is fresh only while none of those
+    tables has been written to since.
+    """
+
+    def __init__(self, name: str, max_entries: int = 256):
+        self.name = name
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Tuple[int, ...], Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, key: Hashable):
+        """Return (versions, value, computed_at) for a key regardless of freshness, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def store(self, key: Hashable, versions: Tuple[int, ...], value: Any):
+        with self._lock:
+            self._entries[key] = (versions, value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key: Hashable, tables: Sequence[str], compute: Callable[[], Any]) -> Any:
+        """Return the cached value for key if still fresh, otherwise compute and store it"""
+        versions = get_table_versions(*tables)
+        entry = self.lookup(key)
+        if entry is not None and entry[0] == versions:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        value = compute()
+        self.store(key, versions, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+count_cache = VersionedCache("counts", max_entries=512)
+report_cache = VersionedCache("reports", max_entries=128)
+
+
+def filter_signature(scope: str, **filters) -> tuple:
+    """
+    Normalise list filters into a hashable cache key.
+
+    Unset filters are dropped and free text is case-folded with whitespace
+    collapsed, so equivalent requests share one entry.
+    """
+    normalized = []
+    for name, value in sorted(filters.items()):
+        if value is None or value is False or value == "":
+            continue
+        if isinstance(value, str):
+            value = " ".join(value.lower().split())
+        normalized.append((name, value))
+    return (scope, tuple(normalized))
+
+
+def get_cached_count(key: Hashable, tables: Sequence[str], compute: Callable[[], int]) -> Tuple[int, bool]:
+    """
+    Total row count for a filtered list, served from count_cache when possible.
+
+    Returns (total, is_estimate). A large count computed before the latest
+    write is reused for up to COUNT_ESTIMATE_MAX_AGE seconds and reported as
+    an estimate; everything else is exact.
+    """
+    versions = get_table_versions(*tables)
+    entry = count_cache.lookup(key)
+    if entry is not None:
+        cached_versions, total, computed_at = entry
+        if cached_versions == versions:
+            count_cache.hits += 1
+            return total, False
+        if total >= COUNT_ESTIMATE_THRESHOLD and time.monotonic() - computed_at < COUNT_ESTIMATE_MAX_AGE:
+            count_cache.hits += 1
+            return total, True
+
+    count_cache.misses += 1
+    total = compute()
+    count_cache.store(key, versions, total)
+    return total, False
@@ -0,0 +1,201 @@
+"""
+Daily sales rollups, kept in step with the sales tables.
+
+Three small tables summarise sales per day: `sales_daily_totals` (one row per
+day), `sales_daily_rollup` (per day and item) and `sales_daily_gst_rollup`
+(per day and GST rate). Every path that writes or deletes sales calls
+apply_sales() in the same transaction, so a period summary reads one row per
+day (and item or rate) instead of every sale line. rebuild_sales_rollup()
+recomputes all three from the sales tables.
+"""
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models.models import Item, Sale, SaleItem, SalesDailyGstRollup, SalesDailyRollup, SalesDailyTotal
+from app.utils.logger_config import get_logger
+
+logger = get_logger()
+
+_TOTAL_FIELDS = ("sales_count", "subtotal", "gst_amount", "discount", "total_amount")
+_ITEM_FIELDS = ("quantity", "revenue", "gst_amount", "line_count")
+_GST_FIELDS = ("taxable_amount", "gst_amount", "line_count")
+
+
+def apply_sales(db: Session, sales: Iterable[Tuple[datetime, float, Iterable[dict]]], sign: int = 1):
+    """
+    Add (sign=1) or remove (sign=-1) sales from the rollups (not committed).
+
+    Each sale is (sale_date, discount, lines), where lines are dicts with
+    item_id, quantity, unit_price and gst_percentage. Changes are summed per
+    day/item/rate first and written with one upsert per table; rows whose
+    line or sale count drops to zero are removed.
+    """
+    totals: Dict[date, Dict[str, float]] = defaultdict(lambda: dict.fromkeys(_TOTAL_FIELDS, 0))
+    per_item: Dict[Tuple[date, int], Dict[str, float]] = defaultdict(lambda: dict.fromkeys(_ITEM_FIELDS, 0))
+    per_rate: Dict[Tuple[date, float], Dict[str, float]] = defaultdict(lambda: dict.fromkeys(_GST_FIELDS, 0))
+
+    for sale_date, discount, lines in sales:
+        day = sale_date.date()
+        subtotal = gst_amount = 0.0
+        for line in lines:
+            revenue = line["quantity"] * line["unit_price"]
+            gst = revenue * (line["gst_percentage"] / 100)
+            subtotal += revenue
+            gst_amount += gst
+
+            item = per_item[(day, line["item_id"])]
+            item["quantity"] += sign * line["quantity"]
+            item["revenue"] += sign * revenue
+            item["gst_amount"] += sign * gst
+            item["line_count"] += sign
+
+            rate = per_rate[(day, line["gst_percentage"])]
+            rate["taxable_amount"] += sign * revenue
+            rate["gst_amount"] += sign * gst
+            rate["line_count"] += sign
+
+        day_totals = totals[day]
+        day_totals["sales_count"] += sign
+        day_totals["subtotal"] += sign * subtotal
+        day_totals["gst_amount"] += sign * gst_amount
+        day_totals["discount"] += sign * discount
+        day_totals["total_amount"] += sign * (subtotal + gst_amount - discount)
+
+    if not totals:
+        return
+
+    _upsert(db, SalesDailyTotal, ("sale_day",), _TOTAL_FIELDS,
+            [{"sale_day": day, **values} for day, values in totals.items()])
+    _upsert(db, SalesDailyRollup, ("sale_day", "item_id"), _ITEM_FIELDS,
+            [{"sale_day": day, "item_id": item_id, **values} for (day, item_id), values in per_item.items()])
+    _upsert(db, SalesDailyGstRollup, ("sale_day", "gst_percentage"), _GST_FIELDS,
+            [{"sale_day": day, "gst_percentage": rate, **values} for (day, rate), values in per_rate.items()])
+
+    if sign < 0:
+        days = list(totals)
+        db.execute(delete(SalesDailyTotal).where(SalesDailyTotal.sale_day.in_(days), SalesDailyTotal.sales_count <= 0))
+        db.execute(delete(SalesDailyRollup).where(SalesDailyRollup.sale_day.in_(days), SalesDailyRollup.line_count <= 0))
+        db.execute(delete(SalesDailyGstRollup).where(
+            SalesDailyGstRollup.sale_day.in_(days), SalesDailyGstRollup.line_count <= 0
+        ))
+
+
+def _upsert(db: Session, model, keys: Tuple[str, ...], fields: Tuple[str, ...], rows: List[dict]):
+    """INSERT ... ON CONFLICT DO UPDATE adding the given fields onto existing rows"""
+    insert_for_dialect = postgresql_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    statement = insert_for_dialect(model)
+    statement = statement.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={field: getattr(model, field) + statement.excluded[field] for field in fields}
+    )
+    db.execute(statement, rows)
+
+
+def _rebuild_statements():
+    sale_day = func.date(Sale.sale_date)
+    revenue = SaleItem.quantity * SaleItem.unit_price
+    gst = revenue * SaleItem.gst_percentage / 100
+    lines = select().select_from(SaleItem).join(Sale, Sale.id == SaleItem.sale_id)
+    return [
+        delete(SalesDailyTotal),
+        delete(SalesDailyRollup),
+        delete(SalesDailyGstRollup),
+        insert(SalesDailyTotal).from_select(
+            ["sale_day", *_TOTAL_FIELDS],
+            select(
+                sale_day, func.count(Sale.id), func.sum(Sale.subtotal), func.sum(Sale.gst_amount),
+                func.sum(Sale.discount), func.sum(Sale.total_amount)
+            ).group_by(sale_day)
+        ),
+        insert(SalesDailyRollup).from_select(
+            ["sale_day", "item_id", *_ITEM_FIELDS],
+            lines.add_columns(
+                sale_day, SaleItem.item_id, func.sum(SaleItem.quantity), func.sum(revenue), func.sum(gst),
+                func.count(SaleItem.id)
+            ).group_by(sale_day, SaleItem.item_id)
+        ),
+        insert(SalesDailyGstRollup).from_select(
+            ["sale_day", "gst_percentage", *_GST_FIELDS],
+            lines.add_columns(
+                sale_day, SaleItem.gst_percentage, func.sum(revenue), func.sum(gst), func.count(SaleItem.id)
+            ).group_by(sale_day, SaleItem.gst_percentage)
+        ),
+    ]
+
+
+def rebuild_sales_rollup(db: Session) -> int:
+    """Recompute every rollup from the sales tables; returns the number of days"""
+    for statement in _rebuild_statements():
+        db.execute(statement)
+    db.commit()
+    days = db.query(func.count(SalesDailyTotal.sale_day)).scalar()
+    logger.info(f"Rebuilt sales rollup ({days} days)")
+    return days
+
+
+def ensure_sales_rollup(engine) -> bool:
+    """Backfill the rollups when they are empty but sales exist, e.g. on first start after an upgrade"""
+    try:
+        with engine.begin() as conn:
+            if conn.execute(select(SalesDailyTotal.sale_day).limit(1)).first() is not None:
+                return True
+            if conn.execute(select(Sale.id).limit(1)).first() is None:
+                return True
+            for statement in _rebuild_statements():
+                conn.execute(statement)
+            logger.info("Backfilled daily sales rollup")
+    except Exception as e:
+        logger.warning(f"Sales rollup unavailable: {str(e)}")
+        return False
+    return True
+
+
+def sales_summary(db: Session, start: Optional[date] = None, end: Optional[date] = None, top_items: int = 10) -> dict:
+    """Totals, per-day totals, per-GST-rate totals and best-selling items for a period of days"""
+    def in_period(column):
+        conditions = []
+        if start:
+            conditions.append(column >= start)
+        if end:
+            conditions.append(column <= end)
+        return conditions
+
+    days = db.query(SalesDailyTotal).filter(*in_period(SalesDailyTotal.sale_day)).order_by(SalesDailyTotal.sale_day).all()
+    rates = db.query(
+        SalesDailyGstRollup.gst_percentage,
+        func.sum(SalesDailyGstRollup.taxable_amount),
+        func.sum(SalesDailyGstRollup.gst_amount)
+    ).filter(*in_period(SalesDailyGstRollup.sale_day)).group_by(
+        SalesDailyGstRollup.gst_percentage
+    ).order_by(SalesDailyGstRollup.gst_percentage).all()
+    revenue = func.sum(SalesDailyRollup.revenue)
+    items = db.query(
+        SalesDailyRollup.item_id,
+        Item.sku,
+        func.sum(SalesDailyRollup.quantity),
+        revenue,
+        func.sum(SalesDailyRollup.gst_amount)
+    ).outerjoin(Item, Item.id == SalesDailyRollup.item_id).filter(*in_period(SalesDailyRollup.sale_day)).group_by(
+        SalesDailyRollup.item_id, Item.sku
+    ).order_by(revenue.desc()).limit(top_items).all()
+
+    return {
+        "start_date": start,
+        "end_date": end,
+        **{field: sum(getattr(day, field) for day in days) for field in _TOTAL_FIELDS},
+        "days": days,
+        "gst_rates": [
+            {"gst_percentage": rate, "taxable_amount": taxable, "gst_amount": gst}
+            for rate, taxable, gst in rates
+        ],
+        "top_items": [
+            {"item_id": item_id, "sku": sku, "quantity": quantity, "revenue": item_revenue, "gst_amount": gst}
+            for item_id, sku, quantity, item_revenue, gst in items
+        ]
+    }
@@ -0,0 +1,190 @@
+"""
+SQLite FTS5 index over the searchable item fields.
+
+`items_fts` holds one row per item (rowid = items.id) with the SKU and the
+category / quality / size names denormalised into it. Triggers on items and
+on the three taxonomy tables keep it in step with every write, including bulk
+deletes and cascades, so routers never have to touch it directly.
+"""
+import re
+
+from sqlalchemy import column, select, table, text
+from sqlalchemy.orm import Session
+
+from app.utils.logger_config import get_logger
+
+logger = get_logger()
+
+# Column weights for bm25(): SKU hits rank above name hits
+RANK_FUNCTION = "bm25(10.0, 2.0, 2.0, 1.0, 1.0)"
+
+items_fts = table(
+    "items_fts",
+    column("rowid"),
+    column("sku"),
+    column("category_name"),
+    column("quality_name"),
+    column("size_display"),
+    column("size_value"),
+    column("rank"),
+)
+
+_ITEM_ROW_VALUES = """
+    new.id,
+    new.sku,
+    (SELECT name FROM categories WHERE id = new.category_id),
+    (SELECT name FROM qualities WHERE id = new.quality_id),
+    (SELECT size_display FROM sizes WHERE id = new.size_id),
+    (SELECT size_value FROM sizes WHERE id = new.size_id)
+"""
+
+_CREATE_TABLE = """
+CREATE VIRTUAL TABLE items_fts USING fts5(
+    sku, category_name, quality_name, size_display, size_value,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS items_fts_ai AFTER INSERT ON items BEGIN
+        INSERT INTO items_fts(rowid, sku, category_name, quality_name, size_display, size_value)
+        VALUES ({_ITEM_ROW_VALUES});
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS items_fts_ad AFTER DELETE ON items BEGIN
+        DELETE FROM items_fts WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS items_fts_au AFTER UPDATE OF sku, category_id, quality_id, size_id ON items BEGIN
+        DELETE FROM items_fts WHERE rowid = old.id;
+        INSERT INTO items_fts(rowid, sku, category_name, quality_name, size_display, size_value)
+        VALUES ({_ITEM_ROW_VALUES});
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS categories_fts_au AFTER UPDATE OF name ON categories BEGIN
+        UPDATE items_fts SET category_name = new.name
+        WHERE rowid IN (SELECT id FROM items WHERE category_id = new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS categories_fts_ad AFTER DELETE ON categories BEGIN
+        DELETE FROM items_fts WHERE rowid IN (SELECT id FROM items WHERE category_id = old.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS qualities_fts_au AFTER UPDATE OF name ON qualities BEGIN
+        UPDATE items_fts SET quality_name = new.name
+        WHERE rowid IN (SELECT id FROM items WHERE quality_id = new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS qualities_fts_ad AFTER DELETE ON qualities BEGIN
+        DELETE FROM items_fts WHERE rowid IN (SELECT id FROM items WHERE quality_id = old.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS sizes_fts_au AFTER UPDATE OF size_display, size_value ON sizes BEGIN
+        UPDATE items_fts SET size_display = new.size_display, size_value = new.size_value
+        WHERE rowid IN (SELECT id FROM items WHERE size_id = new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS sizes_fts_ad AFTER DELETE ON sizes BEGIN
+        DELETE FROM items_fts WHERE rowid IN (SELECT id FROM items WHERE size_id = old.id);
+    END
+    """,
+]
+
+_REBUILD = [
+    "DELETE FROM items_fts",
+    """
+    INSERT INTO items_fts(rowid, sku, category_name, quality_name, size_display, size_value)
+    SELECT i.id, i.sku, c.name, q.name, s.size_display, s.size_value
+    FROM items i
+    LEFT JOIN categories c ON c.id = i.category_id
+    LEFT JOIN qualities q ON q.id = i.quality_id
+    LEFT JOIN sizes s ON s.id = i.size_id
+    """,
+    "INSERT INTO items_fts(items_fts) VALUES ('optimize')",
+]
+
+_available = False
+
+
+def is_available() -> bool:
+    """True once ensure_search_index has set up the FTS5 table on this database"""
+    return _available
+
+
+def ensure_search_index(engine) -> bool:
+    """
+    Create the FTS5 table and its sync triggers if they are missing.
+
+    A freshly created index is populated from the existing rows. Returns False
+    (and leaves search on the LIKE fallback) when the database is not SQLite or
+    the SQLite build lacks FTS5.
+    """
+    global _available
+
+    if engine.dialect.name != "sqlite":
+        logger.info("Search index skipped: FTS5 requires SQLite")
+        return False
+
+    try:
+        with engine.begin() as conn:
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'items_fts'")
+            ).first()
+            if not exists:
+                conn.execute(text(_CREATE_TABLE))
+                conn.execute(text(f"INSERT INTO items_fts(items_fts, rank) VALUES ('rank', '{RANK_FUNCTION}')"))
+            for trigger in _TRIGGERS:
+                conn.execute(text(trigger))
+            if not exists:
+                for statement in _REBUILD:
+                    conn.execute(text(statement))
+                logger.info("Created items search index")
+    except Exception as e:
+        logger.warning(f"Search index unavailable, falling back to LIKE search: {str(e)}")
+        return False
+
+    _available = True
+    return True
+
+
+def rebuild_search_index(db: Session) -> int:
+    """Repopulate items_fts from the base tables; returns the number of indexed items"""
+    for statement in _REBUILD:
+        db.execute(text(statement))
+    db.commit()
+    count = db.execute(text("SELECT count(*) FROM items_fts")).scalar()
+    logger.info(f"Rebuilt items search index ({count} items)")
+    return count
+
+
+def build_match_query(search: str):
+    """
+    Turn free text into an FTS5 MATCH expression.
+
+    Every word becomes a quoted prefix term and all terms must match, so
+    "gi 10" finds "GI (Galvanized Iron)" items of size "10mm". Returns None
+    when the text has no searchable words.
+    """
+    terms = re.findall(r"\w+", search.lower())
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def match_subquery(match: str):
+    """Subquery of (item_id, rank) for items matching an FTS5 expression; lower rank is better"""
+    return (
+        select(items_fts.c.rowid.label("item_id"), items_fts.c.rank.label("rank"))
+        .where(text("items_fts MATCH :fts_match").bindparams(fts_match=match))
+        .subquery("fts")
+    )
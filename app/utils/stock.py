@@ -0,0 +1,96 @@
+"""
+Set-based helpers for stock movements.
+
+Sales and purchases touch many items at once. These helpers load the
+referenced items with one IN query and apply all quantity changes with one
+UPDATE, so the number of statements per document does not grow with its
+line count.
+"""
+from typing import Dict, Iterable, Tuple
+
+from sqlalchemy import case, update
+from sqlalchemy.orm import Session
+
+from app.models.models import Item
+
+
+class StockConflictError(Exception):
+    """Raised when a conditional deduction finds less stock than was validated"""
+
+
+# Keeps IN lists under SQLite's bound-parameter limit on older builds
+_LOOKUP_CHUNK = 500
+
+
+def load_items(db: Session, item_ids: Iterable[int]) -> Dict[int, Item]:
+    """Items by id for every id that exists, fetched with one query per 500 ids"""
+    wanted = list(set(item_ids))
+    found: Dict[int, Item] = {}
+    for start in range(0, len(wanted), _LOOKUP_CHUNK):
+        for item in db.query(Item).filter(Item.id.in_(wanted[start:start + _LOOKUP_CHUNK])):
+            found[item.id] = item
+    return found
+
+
+def items_by_sku(db: Session, skus: Iterable[str]) -> Dict[str, Item]:
+    """Items by SKU for every SKU that exists, fetched with one query per 500 SKUs"""
+    wanted = list(set(skus))
+    found: Dict[str, Item] = {}
+    for start in range(0, len(wanted), _LOOKUP_CHUNK):
+        for item in db.query(Item).filter(Item.sku.in_(wanted[start:start + _LOOKUP_CHUNK])):
+            found[item.sku] = item
+    return found
+
+
+def quantities_by_item(lines: Iterable[Tuple[int, float]]) -> Dict[int, float]:
+    """Sum (item_id, quantity) pairs per item, so repeated lines are validated together"""
+    totals: Dict[int, float] = {}
+    for item_id, quantity in lines:
+        totals[item_id] = totals.get(item_id, 0.0) + quantity
+    return totals
+
+
+def apply_stock_deltas(db: Session, deltas: Dict[int, float]) -> int:
+    """
+    Add each delta to its item's stock_quantity in one UPDATE statement.
+
+    Items already loaded in the session are not refreshed; commit (which
+    expires them) or re-query before reading their stock again. Returns the
+    number of rows updated.
+    """
+    if not deltas:
+        return 0
+    result = db.execute(
+        update(Item)
+        .where(Item.id.in_(deltas.keys()))
+        .values(stock_quantity=Item.stock_quantity + case(deltas, value=Item.id, else_=0.0))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def deduct_stock(db: Session, quantities: Dict[int, float]):
+    """
+    Subtract each quantity from its item's stock, atomically and only if enough is left.
+
+    Runs a single conditional UPDATE
+    (`... SET stock_quantity = stock_quantity - q WHERE id = :id AND stock_quantity >= q`
+    for every item at once). The check and the write happen in the database,
+    so a concurrent sale cannot slip in between them. If any item no longer
+    has enough stock the statement matches fewer rows than requested and
+    StockConflictError is raised; the caller must roll back and may retry
+    with freshly loaded items.
+    """
+    if not quantities:
+        return
+    required = case(quantities, value=Item.id)
+    result = db.execute(
+        update(Item)
+        .where(Item.id.in_(quantities.keys()), Item.stock_quantity >= required)
+        .values(stock_quantity=Item.stock_quantity - required)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != len(quantities):
+        raise StockConflictError(
+            f"Stock changed for {len(quantities) - result.rowcount} of {len(quantities)} items"
+        )
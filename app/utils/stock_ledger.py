@@ -0,0 +1,273 @@
+"""
+Stock movement ledger and daily stock snapshots.
+
+Every write path that changes items.stock_quantity records the change in
+`stock_movements` in the same transaction, as one typed row per item, dated
+by its document: sales and purchases (and their reversals) by the sale or
+purchase date, adjustments by the time they were made. Once a
+day is over, the end-of-day stock of every item that moved that day is copied
+into `stock_snapshots`. The stock of an item at any moment is then its latest
+snapshot before that day plus the few movements since: a primary-key lookup
+and a short range scan on ix_stock_movements_item_ts, instead of parsing JSON
+across audit_logs.
+
+A movement dated into a day that was already snapshotted drops the moved
+items' snapshots from that day on; their stock is then derived from the
+snapshot before it.
+
+The ledger starts when it is first installed, with one "opening" movement per
+stocked item; earlier history is not reconstructed.
+"""
+import os
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import Date, DateTime, delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.models import Item, StockMovement, StockSnapshot
+from app.utils.logger_config import get_logger
+
+logger = get_logger()
+
+# Movement types
+OPENING = "opening"
+SALE = "sale"
+SALE_REVERSAL = "sale_reversal"
+PURCHASE = "purchase"
+PURCHASE_REVERSAL = "purchase_reversal"
+ADJUSTMENT = "adjustment"
+
+# Seconds between checks for completed days without a snapshot; 0 disables the scheduler
+SNAPSHOT_INTERVAL = int(os.getenv("STOCK_SNAPSHOT_INTERVAL", "3600"))
+
+
+def _local(at: datetime) -> datetime:
+    """Ledger timestamps are naive local time; convert aware datetimes to match"""
+    return at.astimezone().replace(tzinfo=None) if at.tzinfo else at
+
+
+def movement_rows(
+    movement_type: str,
+    deltas: Dict[int, float],
+    reference_id: Optional[int] = None,
+    ts: Optional[datetime] = None
+) -> List[dict]:
+    """
+    Ledger rows for signed stock changes keyed by item id, dated `ts` (the
+    document date; now when not given). Zero changes are left out.
+    """
+    ts = _local(ts) if ts else datetime.now()
+    return [
+        {
+            "item_id": item_id,
+            "ts": ts,
+            "quantity": quantity,
+            "movement_type": movement_type,
+            "reference_id": reference_id
+        }
+        for item_id, quantity in deltas.items()
+        if quantity
+    ]
+
+
+def record_movements(db: Session, rows: List[dict]):
+    """Append ledger rows with one executemany INSERT (not committed)"""
+    if not rows:
+        return
+    db.execute(insert(StockMovement), rows)
+    first_day = min(row["ts"] for row in rows).date()
+    if first_day < date.today():
+        db.execute(delete(StockSnapshot).where(
+            StockSnapshot.item_id.in_({row["item_id"] for row in rows}),
+            StockSnapshot.snapshot_date >= first_day
+        ))
+
+
+def ensure_stock_ledger(engine) -> bool:
+    """
+    Open the ledger on a database that has none yet.
+
+    When stock_movements is empty, every item with stock gets an "opening"
+    movement for its current quantity, so the movements of each item add up
+    to its stock from then on.
+    """
+    try:
+        with engine.begin() as conn:
+            if conn.execute(select(StockMovement.id).limit(1)).first() is not None:
+                return True
+            result = conn.execute(
+                insert(StockMovement).from_select(
+                    ["item_id", "ts", "quantity", "movement_type"],
+                    select(
+                        Item.id,
+                        literal(datetime.now(), DateTime),
+                        Item.stock_quantity,
+                        literal(OPENING)
+                    ).where(Item.stock_quantity != 0)
+                )
+            )
+            if result.rowcount:
+                logger.info(f"Opened stock ledger ({result.rowcount} opening balances)")
+    except Exception as e:
+        logger.warning(f"Stock ledger unavailable: {str(e)}")
+        return False
+    return True
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min)
+
+
+def take_snapshot(db: Session, day: date) -> int:
+    """
+    Store the end-of-day stock of every item that moved on `day`; returns the row count.
+
+    The value is derived from the current stock minus everything recorded
+    after the day ended, so a day can be (re)snapshotted at any later time.
+    """
+    start, end = _day_start(day), _day_start(day + timedelta(days=1))
+    moved = select(StockMovement.item_id).where(StockMovement.ts >= start, StockMovement.ts < end)
+    later = select(func.coalesce(func.sum(StockMovement.quantity), 0.0)).where(
+        StockMovement.item_id == Item.id, StockMovement.ts >= end
+    ).scalar_subquery()
+
+    db.execute(delete(StockSnapshot).where(StockSnapshot.snapshot_date == day))
+    result = db.execute(
+        insert(StockSnapshot).from_select(
+            ["item_id", "snapshot_date", "stock_quantity"],
+            select(Item.id, literal(day, Date), Item.stock_quantity - later).where(Item.id.in_(moved))
+        )
+    )
+    db.commit()
+    return result.rowcount
+
+
+def snapshot_missing_days(db: Session, today: Optional[date] = None) -> List[date]:
+    """
+    Snapshot every completed day since the latest snapshot that had movements.
+
+    Days without movements are skipped with one index lookup each gap.
+    Returns the days that were snapshotted.
+    """
+    last_day = (today or date.today()) - timedelta(days=1)
+    latest = db.query(func.max(StockSnapshot.snapshot_date)).scalar()
+    if latest is not None:
+        day = latest + timedelta(days=1)
+    else:
+        first = db.query(func.min(StockMovement.ts)).scalar()
+        if first is None:
+            return []
+        day = first.date()
+
+    taken = []
+    while day <= last_day:
+        if take_snapshot(db, day):
+            taken.append(day)
+        following = db.query(func.min(StockMovement.ts)).filter(
+            StockMovement.ts >= _day_start(day + timedelta(days=1))
+        ).scalar()
+        if following is None:
+            break
+        day = max(day + timedelta(days=1), following.date())
+
+    if taken:
+        logger.info(f"Stock snapshots taken for {len(taken)} day(s), last {taken[-1].isoformat()}")
+    return taken
+
+
+def stock_at(db: Session, item_id: int, at: datetime) -> dict:
+    """
+    Stock of an item at a moment: its latest snapshot from an earlier day
+    plus the movements recorded between that day's end and `at`.
+    """
+    at = _local(at)
+    snapshot = db.query(StockSnapshot).filter(
+        StockSnapshot.item_id == item_id,
+        StockSnapshot.snapshot_date < at.date()
+    ).order_by(StockSnapshot.snapshot_date.desc()).first()
+
+    movements = db.query(
+        func.coalesce(func.sum(StockMovement.quantity), 0.0), func.count(StockMovement.id)
+    ).filter(StockMovement.item_id == item_id, StockMovement.ts <= at)
+    if snapshot:
+        movements = movements.filter(StockMovement.ts >= _day_start(snapshot.snapshot_date + timedelta(days=1)))
+    moved, scanned = movements.one()
+
+    return {
+        "item_id": item_id,
+        "at": at,
+        "stock_quantity": (snapshot.stock_quantity if snapshot else 0.0) + moved,
+        "snapshot_date": snapshot.snapshot_date if snapshot else None,
+        "movements_scanned": scanned
+    }
+
+
+def stock_history(
+    db: Session,
+    item_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = 500
+) -> dict:
+    """Movements of an item in (start, end] with the stock before and after them"""
+    start = _local(start) if start else None
+    end = _local(end) if end else datetime.now()
+
+    query = db.query(StockMovement).filter(StockMovement.item_id == item_id, StockMovement.ts <= end)
+    if start:
+        query = query.filter(StockMovement.ts > start)
+    movements = query.order_by(StockMovement.ts, StockMovement.id).limit(limit + 1).all()
+
+    return {
+        "item_id": item_id,
+        "start": start,
+        "end": end,
+        "opening_stock": stock_at(db, item_id, start)["stock_quantity"] if start else 0.0,
+        "closing_stock": stock_at(db, item_id, end)["stock_quantity"],
+        "movements": movements[:limit],
+        "has_more": len(movements) > limit
+    }
+
+
+class StockSnapshotScheduler:
+    """Background thread that snapshots completed days every `interval` seconds"""
+
+    def __init__(self, interval: int):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self.interval <= 0:
+            logger.info("Stock snapshot scheduler disabled (STOCK_SNAPSHOT_INTERVAL=0)")
+            return
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stock-snapshots", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def _run(self):
+        while True:
+            db = SessionLocal()
+            try:
+                snapshot_missing_days(db)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Stock snapshot failed: {str(e)}")
+            finally:
+                db.close()
+            if self._stop.wait(self.interval):
+                return
+
+
+stock_snapshots = StockSnapshotScheduler(SNAPSHOT_INTERVAL)
@@ -0,0 +1,204 @@
+"""
+Write versions of the tables, shared by every connection to the database.
+
+ensure_table_versions() installs triggers that bump a row of the
+table_versions table on every insert, update or delete, inside the
+transaction of the write. Routers, manage.py commands, background threads
+and other server processes therefore all move the same counters, and a
+rolled back write moves none. Item writes also record the item and its
+category in item_changes, so category_matrix can patch just those cells.
+
+Readers go through one long-lived connection and check PRAGMA data_version
+first. It only changes when another connection commits, so while nothing is
+written the versions are answered from memory without reading a table.
+Without the triggers (non-SQLite databases) every read reports new versions,
+which turns the caches keyed on them off rather than serving stale data.
+"""
+import itertools
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import inspect, text
+
+from app.database import engine
+from app.utils.logger_config import get_logger
+
+logger = get_logger()
+
+# Triggers fire once per row, so tables only ever written together with
+# another one are versioned through it: sale_items with sales, purchase_items
+# with purchases, and the per-item and per-rate sales rollups with
+# sales_daily_totals (also when manage.py rebuilds them).
+VERSIONED_TABLES = (
+    "categories", "qualities", "sizes", "items", "suppliers",
+    "sales", "purchases", "settings", "sales_daily_totals",
+)
+
+_NOW = "((julianday('now') - 2440587.5) * 86400.0)"  # unix time
+
+
+def _bump(table_name: str) -> str:
+    return (
+        f"UPDATE table_versions SET version = version + 1, modified = {_NOW} "
+        f"WHERE table_name = '{table_name}';"
+    )
+
+
+def _record_item(alias: str, condition: str = "1") -> str:
+    return (
+        "INSERT INTO item_changes (item_id, category_id, seq) "
+        f"SELECT {alias}.id, {alias}.category_id, version FROM table_versions "
+        f"WHERE table_name = 'items' AND {condition} "
+        "ON CONFLICT (item_id, category_id) DO UPDATE SET seq = excluded.seq;"
+    )
+
+
+def ensure_table_versions(engine) -> bool:
+    """
+    Create table_versions, item_changes and the triggers that maintain them
+    on the VERSIONED_TABLES that exist. Returns False on non-SQLite databases.
+    """
+    if engine.dialect.name != "sqlite":
+        logger.info("Table version triggers skipped: they require SQLite")
+        return False
+
+    try:
+        with engine.begin() as conn:
+            conn.exec_driver_sql("""
+                CREATE TABLE IF NOT EXISTS table_versions (
+                    table_name TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL DEFAULT 0,
+                    modified REAL NOT NULL
+                )
+            """)
+            conn.exec_driver_sql("""
+                CREATE TABLE IF NOT EXISTS item_changes (
+                    item_id INTEGER NOT NULL,
+                    category_id INTEGER NOT NULL,
+                    seq INTEGER NOT NULL,
+                    PRIMARY KEY (item_id, category_id)
+                )
+            """)
+            conn.exec_driver_sql(
+                "CREATE INDEX IF NOT EXISTS ix_item_changes_category_seq ON item_changes (category_id, seq)"
+            )
+            existing = {
+                name for (name,) in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'table'")
+            }
+            for table_name in VERSIONED_TABLES:
+                if table_name not in existing:
+                    continue
+                conn.exec_driver_sql(
+                    f"INSERT OR IGNORE INTO table_versions (table_name, version, modified) "
+                    f"VALUES ('{table_name}', 0, {_NOW})"
+                )
+                extra = {"ai": "", "au": "", "ad": ""}
+                if table_name == "items":
+                    extra = {
+                        "ai": _record_item("new"),
+                        # an item moved to another category also leaves the old one
+                        "au": _record_item("new") + _record_item("old", "old.category_id != new.category_id"),
+                        "ad": _record_item("old"),
+                    }
+                for suffix, event in (("ai", "INSERT"), ("au", "UPDATE"), ("ad", "DELETE")):
+                    conn.exec_driver_sql(f"""
+                        CREATE TRIGGER IF NOT EXISTS {table_name}_version_{suffix}
+                        AFTER {event} ON {table_name} BEGIN
+                            {_bump(table_name)}
+                            {extra[suffix]}
+                        END
+                    """)
+    except Exception as e:
+        logger.warning(f"Table version triggers unavailable: {str(e)}")
+        return False
+    return True
+
+
+class _Registry:
+    """Versions as of the last PRAGMA data_version change seen on the probe connection"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._conn = None
+        self._shared: Optional[bool] = None
+        self._uncached = itertools.count(1)
+        self._data_version: Optional[int] = None
+        self._versions: Dict[str, int] = {}
+        self._modified: Dict[str, float] = {}
+        self._category_versions: Dict[int, int] = {}
+        self._started = time.time()
+
+    def _refresh(self) -> bool:
+        """
+        Re-read the versions if another connection has committed since the
+        last read; False when the database has no table_versions
+        """
+        if self._shared is None:
+            self._shared = engine.dialect.name == "sqlite" and inspect(engine).has_table("table_versions")
+            if not self._shared:
+                logger.warning("No table_versions table: caches keyed on table versions are disabled")
+        if not self._shared:
+            return False
+        if self._conn is None:
+            self._conn = engine.connect()
+        try:
+            data_version = self._conn.exec_driver_sql("PRAGMA data_version").scalar()
+            if data_version != self._data_version:
+                rows = self._conn.exec_driver_sql(
+                    "SELECT table_name, version, modified FROM table_versions"
+                ).all()
+                self._versions = {name: version for name, version, _ in rows}
+                self._modified = {name: modified for name, _, modified in rows}
+                self._category_versions = {}
+                self._data_version = data_version
+        finally:
+            self._conn.rollback()
+        return True
+
+    def versions(self, table_names) -> Tuple[int, ...]:
+        with self._lock:
+            if not self._refresh():
+                return tuple(next(self._uncached) for _ in table_names)
+            return tuple(self._versions.get(table_name, 0) for table_name in table_names)
+
+    def last_modified(self, table_names) -> float:
+        with self._lock:
+            if not self._refresh():
+                return time.time()
+            return max(
+                (self._modified.get(table_name, self._started) for table_name in table_names),
+                default=self._started
+            )
+
+    def category_version(self, category_id: int) -> int:
+        with self._lock:
+            if not self._refresh():
+                return next(self._uncached)
+            version = self._category_versions.get(category_id)
+            if version is None:
+                version = self._conn.execute(
+                    text("SELECT COALESCE(MAX(seq), 0) FROM item_changes WHERE category_id = :category_id"),
+                    {"category_id": category_id}
+                ).scalar()
+                self._conn.rollback()
+                self._category_versions[category_id] = version
+            return version
+
+
+_registry = _Registry()
+
+
+def get_table_versions(*table_names: str) -> Tuple[int, ...]:
+    """Current write counters for the given tables, in the order requested"""
+    return _registry.versions(table_names)
+
+
+def get_last_modified(*table_names: str) -> float:
+    """Unix time of the most recent write to any of the given tables"""
+    return _registry.last_modified(table_names)
+
+
+def get_category_items_version(category_id: int) -> int:
+    """Write counter of the items in one category (the latest item_changes seq)"""
+    return _registry.category_version(category_id)
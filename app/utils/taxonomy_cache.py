@@ -0,0 +1,153 @@
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.models import Category, Quality, Size
+from app.utils.logger_config import get_logger
+from app.utils.table_versions import get_table_versions
+
+logger = get_logger()
+
+
+@dataclass(frozen=True)
+class CategoryEntry:
+    id: int
+    name: str
+
+
+@dataclass(frozen=True)
+class QualityEntry:
+    id: int
+    category_id: int
+    name: str
+
+
+@dataclass(frozen=True)
+class SizeEntry:
+    id: int
+    category_id: int
+    size_value: str
+    size_display: str
+    sort_order: int
+
+
+@dataclass
+class _Snapshot:
+    versions: Tuple[int, ...]
+    categories: Dict[int, CategoryEntry]
+    qualities: Dict[int, QualityEntry]
+    sizes: Dict[int, SizeEntry]
+    qualities_by_category: Dict[int, List[QualityEntry]]
+    sizes_by_category: Dict[int, List[SizeEntry]]
+
+
+class TaxonomyCache:
+    """
+    In-process copy of the categories, qualities and sizes tables.
+
+    The three tables are small and change rarely, so they are loaded whole and
+    served from memory. The CRUD handlers bump the table write versions after
+    every commit; the next lookup sees the new version and reloads.
+    """
+
+    TABLES = ("categories", "qualities", "sizes")
+
+    def __init__(self):
+        self._snapshot: Optional[_Snapshot] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def _current(self, db: Session) -> _Snapshot:
+        versions = get_table_versions(*self.TABLES)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.versions == versions:
+            self.hits += 1
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.versions != versions:
+                snapshot = self._load(db, versions)
+                self._snapshot = snapshot
+                self.reloads += 1
+            self.misses += 1
+            return snapshot
+
+    def _load(self, db: Session, versions: Tuple[int, ...]) -> _Snapshot:
+        categories = {
+            row.id: CategoryEntry(row.id, row.name)
+            for row in db.query(Category.id, Category.name)
+        }
+        qualities = {
+            row.id: QualityEntry(row.id, row.category_id, row.name)
+            for row in db.query(Quality.id, Quality.category_id, Quality.name).order_by(Quality.id)
+        }
+        sizes = {
+            row.id: SizeEntry(row.id, row.category_id, row.size_value, row.size_display, row.sort_order or 0)
+            for row in db.query(
+                Size.id, Size.category_id, Size.size_value, Size.size_display, Size.sort_order
+            ).order_by(Size.sort_order, Size.id)
+        }
+
+        qualities_by_category: Dict[int, List[QualityEntry]] = {}
+        for quality in qualities.values():
+            qualities_by_category.setdefault(quality.category_id, []).append(quality)
+        sizes_by_category: Dict[int, List[SizeEntry]] = {}
+        for size in sizes.values():
+            sizes_by_category.setdefault(size.category_id, []).append(size)
+
+        logger.debug(
+            f"Loaded taxonomy cache: {len(categories)} categories, "
+            f"{len(qualities)} qualities, {len(sizes)} sizes"
+        )
+        return _Snapshot(versions, categories, qualities, sizes, qualities_by_category, sizes_by_category)
+
+    def category(self, db: Session, category_id: int) -> Optional[CategoryEntry]:
+        return self._current(db).categories.get(category_id)
+
+    def quality(self, db: Session, quality_id: int) -> Optional[QualityEntry]:
+        return self._current(db).qualities.get(quality_id)
+
+    def size(self, db: Session, size_id: int) -> Optional[SizeEntry]:
+        return self._current(db).sizes.get(size_id)
+
+    def categories(self, db: Session) -> List[CategoryEntry]:
+        return list(self._current(db).categories.values())
+
+    def qualities_for_category(self, db: Session, category_id: int) -> List[QualityEntry]:
+        """Qualities of a category in id order"""
+        return list(self._current(db).qualities_by_category.get(category_id, []))
+
+    def sizes_for_category(self, db: Session, category_id: int) -> List[SizeEntry]:
+        """Sizes of a category in display (sort_order) order"""
+        return list(self._current(db).sizes_by_category.get(category_id, []))
+
+    def names(self, db: Session, category_id: int, quality_id: int, size_id: int) -> Tuple[str, str, str]:
+        """(category name, quality name, size display) for an item's ids; missing entries are empty"""
+        snapshot = self._current(db)
+        category = snapshot.categories.get(category_id)
+        quality = snapshot.qualities.get(quality_id)
+        size = snapshot.sizes.get(size_id)
+        return (
+            category.name if category else "",
+            quality.name if quality else "",
+            size.size_display if size else "",
+        )
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "reloads": self.reloads,
+            "categories": len(snapshot.categories) if snapshot else 0,
+            "qualities": len(snapshot.qualities) if snapshot else 0,
+            "sizes": len(snapshot.sizes) if snapshot else 0,
+        }
+
+
+taxonomy_cache = TaxonomyCache()
@@ -0,0 +1,105 @@
+"""
+Shared setup for the benchmark and stress scripts
+
+Every script points the app at its own throwaway SQLite database before it
+imports anything from `app` (the engine is created on import):
+
+    from _common import use_database
+
+    use_database("bench_reports_")
+
+    from app.database import engine  # noqa: E402
+
+and then fills it with the seed_* helpers below.
+"""
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+_AUDIT_TABLES = ("items", "categories", "suppliers", "sizes")
+_AUDIT_CHUNK = 50000
+
+
+def use_database(prefix: str) -> str:
+    """
+    Create a temp directory named after `prefix` and use a fresh database in
+    it; returns the directory. The audit archiver is kept off (and out of
+    the working directory) so seeded audit rows stay in the database.
+    """
+    workdir = tempfile.mkdtemp(prefix=prefix)
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault("APPDATA", workdir)
+    os.environ.setdefault("AUDIT_ARCHIVE_DIR", os.path.join(workdir, "audit_archive"))
+    os.environ.setdefault("AUDIT_ARCHIVE_INTERVAL", "0")
+    return workdir
+
+
+def seed_items(item_count: int, stock: float = 1_000_000.0, low_stock_threshold: float = 10.0) -> List[int]:
+    """
+    Create the schema and one category with `item_count` items (SKUs
+    BENCH-0, BENCH-1, ...), each holding `stock`. Returns the item ids.
+    """
+    from app.database import SessionLocal, engine, Base
+    from app.models.models import Category, Quality, Size, Item
+    from app.utils.low_stock import ensure_low_stock_tracking
+    from app.utils.search_index import ensure_search_index
+    from app.utils.table_versions import ensure_table_versions
+
+    Base.metadata.create_all(bind=engine)
+    ensure_search_index(engine)
+    ensure_low_stock_tracking(engine)
+    ensure_table_versions(engine)
+
+    db = SessionLocal()
+    try:
+        category = Category(name="Bench")
+        db.add(category)
+        db.flush()
+        quality = Quality(category_id=category.id, name="Standard")
+        db.add(quality)
+        db.flush()
+        for index in range(item_count):
+            size = Size(category_id=category.id, size_value=str(index), size_display=f"{index}mm", sort_order=index)
+            db.add(size)
+            db.flush()
+            db.add(Item(
+                category_id=category.id, quality_id=quality.id, size_id=size.id,
+                sku=f"BENCH-{index}", selling_price=10.0, gst_percentage=18.0,
+                stock_quantity=stock, low_stock_threshold=low_stock_threshold
+            ))
+        db.commit()
+        return [item_id for (item_id,) in db.query(Item.id).order_by(Item.id)]
+    finally:
+        db.close()
+
+
+def seed_audit_logs(rows: int):
+    """Audit rows in timestamp order, spread evenly over 730 days from 2024-01-01, 5000 records per table"""
+    from sqlalchemy import insert
+
+    from app.database import engine
+    from app.models.models import AuditLog
+
+    rng = random.Random(11)
+    first = datetime(2024, 1, 1)
+    step = timedelta(days=730) / rows
+    with engine.begin() as conn:
+        for start in range(0, rows, _AUDIT_CHUNK):
+            conn.execute(insert(AuditLog), [
+                {
+                    "table_name": rng.choice(_AUDIT_TABLES),
+                    "record_id": rng.randint(1, 5000),
+                    "operation": "UPDATE",
+                    "old_data": {"stock_quantity": index},
+                    "new_data": {"stock_quantity": index + 1},
+                    "timestamp": first + step * index
+                }
+                for index in range(start, min(start + _AUDIT_CHUNK, rows))
+            ])
+            print(f"  seeded {min(start + _AUDIT_CHUNK, rows)}/{rows} audit rows", end="\r", flush=True)
+    print()
@@ -0,0 +1,120 @@
+"""
+Benchmark commits per write with each way of writing the audit trail
+
+Runs a create / update / delete cycle on categories --cycles times for each
+mode and reports commits and latency per operation:
+
+  commit per log   data commit, then log_operation adds and commits the
+                   AuditLog row (its default)
+  queued writer    AUDIT_WRITE_MODE=queued: the after_flush hook holds the
+                   audit row until the data commit, then hands it to the
+                   background audit writer, whose batch commits are
+                   counted too
+  staged (hook)    the after_flush hook adds the audit row to the same
+                   transaction, one commit for data and audit
+
+Every mode must leave exactly one audit row per operation (for the queued
+writer, once it has been flushed); the script exits 1 otherwise. It then
+replays the cycle through the HTTP API and counts commits per request.
+
+Usage:
+    python benchmarks/bench_audit_commits.py [--cycles 500]
+"""
+import argparse
+import os
+import sys
+import time
+
+from _common import seed_items, use_database
+
+use_database("bench_audit_commits_")
+
+from sqlalchemy import event, func, select  # noqa: E402
+
+from app.database import SessionLocal, engine  # noqa: E402
+from app.models.models import AuditLog, Category  # noqa: E402
+from app.utils.audit_logger import audit_writer, log_operation  # noqa: E402
+
+commits = []
+event.listen(engine, "commit", lambda conn: commits.append(1))
+
+
+def commit_per_log(db, category):
+    db.commit()
+    log_operation(db, "categories", category.id, "UPDATE", new_data={"name": category.name})
+
+
+def staged(db, category):
+    db.commit()
+
+
+# name, write, session.info
+MODES = [
+    ("commit per log", commit_per_log, {"audit": False}),
+    ("queued writer", staged, {"audit_mode": "queued"}),
+    ("staged (hook)", staged, {"audit_mode": "transaction"}),
+]
+
+
+def run_mode(name, write, info: dict, cycles: int):
+    db = SessionLocal()
+    db.info.update(info)
+    before = db.scalar(select(func.count(AuditLog.id)))
+    commits.clear()
+    started = time.perf_counter()
+    try:
+        for index in range(cycles):
+            category = Category(name=f"{name} {index}")
+            db.add(category)
+            db.flush()
+            write(db, category)
+            category.description = "changed"
+            db.flush()
+            write(db, category)
+            db.delete(category)
+            db.flush()
+            write(db, category)
+        audit_writer.flush()
+        elapsed = time.perf_counter() - started
+        rows = db.scalar(select(func.count(AuditLog.id))) - before
+    finally:
+        db.close()
+    operations = cycles * 3
+    print(f"{name:<16} {len(commits) / operations:>12.2f} {elapsed * 1000 / operations:>8.2f} {rows:>11}")
+    if rows != operations:
+        print(f"✗ {name}: expected {operations} audit rows, found {rows}")
+        return False
+    return True
+
+
+def run_http(cycles: int):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        requests = 0
+        commits.clear()
+        for index in range(cycles):
+            category_id = client.post("/api/categories/", json={"name": f"HTTP {index}"}).json()["id"]
+            client.put(f"/api/categories/{category_id}", json={"description": "changed"})
+            client.delete(f"/api/categories/{category_id}")
+            requests += 3
+        print(f"\nHTTP create/update/delete: {len(commits) / requests:.2f} commits per request")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Commits per audited write")
+    parser.add_argument("--cycles", type=int, default=500, help="Create/update/delete cycles per mode")
+    args = parser.parse_args()
+
+    print(f"Benchmark database: {os.environ['DATABASE_URL']}")
+    seed_items(1)
+    print(f"{'mode':<16} {'commits/op':>12} {'ms/op':>8} {'audit rows':>11}")
+    ok = all([run_mode(name, write, info, args.cycles) for name, write, info in MODES])
+    run_http(args.cycles)
+    audit_writer.stop()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""
+Benchmark the streaming audit log export on a large seeded audit_logs table
+
+Seeds --rows audit rows over two years, then streams exports of the first
+tenth of that range (by end_date) and of the whole table as NDJSON, CSV and
+gzip-compressed NDJSON. Reports rows/s and output size per run, and the
+peak Python memory (tracemalloc) of an NDJSON pass at both sizes: it should
+be the same for ten times the rows.
+
+Usage:
+    python benchmarks/bench_audit_export.py [--rows 1000000]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from _common import seed_audit_logs, seed_items, use_database
+
+use_database("bench_audit_export_")
+
+from app.utils.audit_export import stream_audit_export  # noqa: E402
+
+
+def consume(**options):
+    started = time.perf_counter()
+    size = sum(len(chunk) for chunk in stream_audit_export(**options))
+    return time.perf_counter() - started, size
+
+
+def peak_memory(**options) -> int:
+    tracemalloc.start()
+    for _ in stream_audit_export(**options):
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming audit log export")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Audit rows to seed")
+    args = parser.parse_args()
+
+    print(f"Benchmark database: {os.environ['DATABASE_URL']}")
+    seed_items(1)
+    seed_audit_logs(args.rows)
+    from app.main import app  # noqa: F401  creates the audit indexes
+
+    # seed_audit_logs spreads rows evenly over 730 days from 2024-01-01
+    tenth = {"end_date": datetime(2024, 1, 1) + timedelta(days=73)}
+    runs = [
+        ("ndjson, 10%", args.rows // 10, {"format": "ndjson", **tenth}),
+        ("ndjson", args.rows, {"format": "ndjson"}),
+        ("csv", args.rows, {"format": "csv"}),
+        ("ndjson + gzip", args.rows, {"format": "ndjson", "gzip": True}),
+    ]
+    print(f"\n{'export':<16} {'rows':>9} {'seconds':>8} {'rows/s':>9} {'MB out':>8}")
+    for name, rows, options in runs:
+        elapsed, size = consume(**options)
+        print(f"{name:<16} {rows:>9} {elapsed:>8.2f} {rows / elapsed:>9.0f} {size / 1e6:>8.1f}")
+
+    print(f"\n{'export':<16} {'rows':>9} {'peak MB':>8}")
+    for name, rows, options in runs[:2]:
+        print(f"{name:<16} {rows:>9} {peak_memory(**options) / 1e6:>8.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
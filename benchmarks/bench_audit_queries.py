@@ -0,0 +1,86 @@
+"""
+Benchmark the audit log query API on a large seeded audit_logs table
+
+Seeds --rows audit rows over two years for a few thousand records, then
+times through the HTTP API: one record's history, the first page of the
+log, a deep page by offset and by cursor, and a one-week date range.
+
+Usage:
+    python benchmarks/bench_audit_queries.py [--rows 1000000] [--repeat 20]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from _common import seed_audit_logs, seed_items, use_database
+
+use_database("bench_audit_queries_")
+
+from sqlalchemy import String, select, type_coerce  # noqa: E402
+
+from app.database import engine  # noqa: E402
+from app.models.models import AuditLog  # noqa: E402
+from app.utils.pagination import encode_cursor  # noqa: E402
+
+
+def timed(callable_, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        callable_()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audit log queries on a large table")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Audit rows to seed")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per query")
+    args = parser.parse_args()
+
+    print(f"Benchmark database: {os.environ['DATABASE_URL']}")
+    seed_items(1)
+    seed_audit_logs(args.rows)
+
+    from fastapi.testclient import TestClient
+    from app.main import app  # creates the audit indexes
+
+    with engine.connect() as conn:
+        plan = conn.exec_driver_sql(
+            "EXPLAIN QUERY PLAN SELECT id FROM audit_logs WHERE table_name = 'items' AND record_id = 123 "
+            "ORDER BY timestamp DESC, id DESC LIMIT 51"
+        ).all()
+        deep_row = conn.execute(
+            select(AuditLog.id, type_coerce(AuditLog.timestamp, String)).order_by(
+                AuditLog.timestamp.desc(), AuditLog.id.desc()
+            ).offset(args.rows * 9 // 10)
+        ).first()
+    deep_cursor = encode_cursor({"v": deep_row[1], "id": deep_row[0], "dir": "next"})
+    print("history plan: " + "; ".join(row[-1] for row in plan))
+
+    with TestClient(app) as client:
+        queries = [
+            ("record history", "/api/audit-logs/items/123", {"limit": 50}),
+            ("first page (offset)", "/api/audit-logs/", {"limit": 50}),
+            ("first page (cursor)", "/api/audit-logs/", {"limit": 50, "pagination": "cursor"}),
+            ("90% deep (offset)", "/api/audit-logs/", {"limit": 50, "offset": args.rows * 9 // 10}),
+            ("90% deep (cursor)", "/api/audit-logs/", {"limit": 50, "cursor": deep_cursor}),
+            ("one week, items", "/api/audit-logs/", {
+                "limit": 50, "pagination": "cursor", "table_name": "items",
+                "start_date": "2025-03-01T00:00:00", "end_date": "2025-03-08T00:00:00"
+            }),
+        ]
+        print(f"\n{'query':<24} {'median ms':>10} {'rows':>6}")
+        for name, path, params in queries:
+            response = client.get(path, params=params)
+            assert response.status_code == 200, response.text
+            body = response.json()
+            count = len(body["items"] if isinstance(body, dict) else body)
+            print(f"{name:<24} {timed(lambda: client.get(path, params=params), args.repeat):>10.2f} {count:>6}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
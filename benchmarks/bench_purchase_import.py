@@ -0,0 +1,113 @@
+"""
+Benchmark POST /api/purchases/import with large supplier invoices
+
+Generates a CSV and an XLSX invoice with the requested number of lines over
+seeded items, uploads each to a throwaway SQLite database and reports the
+time spent parsing the file and the end-to-end request time. It also checks
+that bad input is answered with a 4xx and imports nothing: a purchase without
+lines, NaN/infinite quantities and prices in an invoice, and a CSV that is
+not UTF-8.
+
+Usage:
+    python benchmarks/bench_purchase_import.py [--lines 1000,5000,20000] [--items 2000]
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import time
+
+from _common import seed_items, use_database
+
+use_database("bench_purchase_import_")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from openpyxl import Workbook  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.utils.purchase_import import parse_invoice  # noqa: E402
+
+
+def make_invoice(skus, lines: int, extension: str) -> bytes:
+    rng = random.Random(lines)
+    rows = [(rng.choice(skus), rng.randint(1, 50), round(rng.uniform(5, 500), 2)) for _ in range(lines)]
+    if extension == ".csv":
+        text = "SKU,Qty,Rate\n" + "".join(f"{sku},{quantity},{price}\n" for sku, quantity, price in rows)
+        return text.encode()
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(["SKU", "Qty", "Rate"])
+    for row in rows:
+        sheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def rejects_bad_input(client, sku: str) -> int:
+    """Number of bad requests that were not refused with the expected status"""
+    cases = [
+        ("purchase without lines", 422, lambda: client.post(
+            "/api/purchases/", json={"purchase_date": "2024-01-01T10:00:00", "items": []}
+        )),
+        ("NaN quantity", 422, lambda: client.post(
+            "/api/purchases/import", files={"file": ("nan.csv", f"SKU,Qty,Rate\n{sku},nan,10\n".encode())}
+        )),
+        ("infinite quantity", 422, lambda: client.post(
+            "/api/purchases/import", files={"file": ("inf.csv", f"SKU,Qty,Rate\n{sku},inf,10\n".encode())}
+        )),
+        ("NaN price", 422, lambda: client.post(
+            "/api/purchases/import", files={"file": ("nan.csv", f"SKU,Qty,Rate\n{sku},5,NaN\n".encode())}
+        )),
+        ("Windows-1252 CSV", 400, lambda: client.post(
+            "/api/purchases/import",
+            files={"file": ("latin.csv", f"SKU,Qty,Rate\n{sku},5,10\n{sku},5,10 \u20ac\n".encode("cp1252"))}
+        )),
+    ]
+    failed = 0
+    for name, expected, send in cases:
+        response = send()
+        if response.status_code != expected:
+            failed += 1
+            print(f"✗ {name}: expected {expected}, got {response.status_code} {response.text[:200]}")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Purchase invoice import throughput")
+    parser.add_argument("--lines", default="1000,5000,20000", help="Comma-separated invoice sizes")
+    parser.add_argument("--items", type=int, default=2000, help="Distinct items in the catalogue")
+    args = parser.parse_args()
+
+    seed_items(args.items)
+    skus = [f"BENCH-{index}" for index in range(args.items)]
+    print(f"Benchmark database: {os.environ['DATABASE_URL']}")
+
+    failed = 0
+    with TestClient(app) as client:
+        failed += rejects_bad_input(client, skus[0])
+        print(f"{'format':<6} {'lines':>7} {'parse s':>8} {'total s':>8} {'lines/s':>9}")
+        for lines in (int(value) for value in args.lines.split(",")):
+            for extension in (".csv", ".xlsx"):
+                content = make_invoice(skus, lines, extension)
+                filename = f"invoice{extension}"
+
+                started = time.perf_counter()
+                parse_invoice(io.BytesIO(content), filename)
+                parsed = time.perf_counter() - started
+
+                started = time.perf_counter()
+                response = client.post("/api/purchases/import", files={"file": (filename, content)})
+                total = time.perf_counter() - started
+
+                if response.status_code != 201 or response.json()["rows_imported"] != lines:
+                    failed += 1
+                    print(f"✗ {filename} with {lines} lines: {response.status_code} {response.text[:200]}")
+                    continue
+                print(f"{extension[1:]:<6} {lines:>7} {parsed:>8.2f} {total:>8.2f} {lines / total:>9.0f}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""
+Benchmark the /api/reports endpoints on a large seeded database
+
+Seeds a throwaway SQLite database with --lines sale lines spread over two
+years (four lines per sale) plus some purchases, builds the daily sales
+rollups, then times every report cold (cache cleared) and warm (served from
+report_cache). For comparison it also times sales-by-month computed straight
+from the raw sales tables.
+
+Usage:
+    python benchmarks/bench_reports.py [--lines 1000000] [--items 500] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+from _common import seed_items, use_database
+
+use_database("bench_reports_")
+
+from sqlalchemy import func, insert, select  # noqa: E402
+
+from app.database import SessionLocal, engine  # noqa: E402
+from app.models.models import Purchase, PurchaseItem, Sale, SaleItem, Supplier  # noqa: E402
+from app.utils.sales_rollup import rebuild_sales_rollup  # noqa: E402
+
+LINES_PER_SALE = 4
+_CHUNK = 20000
+
+
+def seed_sales(item_ids, lines: int):
+    """Sales with LINES_PER_SALE lines each, dated over the last two years"""
+    rng = random.Random(7)
+    first_day = datetime(2024, 1, 1, 9, 0)
+    sales = lines // LINES_PER_SALE
+    with engine.begin() as conn:
+        for start in range(0, sales, _CHUNK):
+            count = min(_CHUNK, sales - start)
+            sale_rows, line_rows = [], []
+            for _ in range(count):
+                sale_lines = []
+                for item_id in rng.sample(item_ids, LINES_PER_SALE):
+                    quantity, unit_price, gst = rng.randint(1, 5), rng.choice((10.0, 25.0, 40.0)), rng.choice((5.0, 12.0, 18.0))
+                    sale_lines.append((item_id, quantity, unit_price, gst))
+                subtotal = sum(q * p for _, q, p, _ in sale_lines)
+                gst_amount = sum(q * p * g / 100 for _, q, p, g in sale_lines)
+                discount = rng.choice((0.0, 0.0, 5.0))
+                sale_rows.append({
+                    "sale_date": first_day + timedelta(minutes=rng.randrange(730 * 24 * 60)),
+                    "subtotal": subtotal,
+                    "gst_amount": gst_amount,
+                    "discount": discount,
+                    "total_amount": subtotal + gst_amount - discount
+                })
+                line_rows.append(sale_lines)
+            sale_ids = conn.scalars(insert(Sale).returning(Sale.id, sort_by_parameter_order=True), sale_rows).all()
+            conn.execute(insert(SaleItem), [
+                {
+                    "sale_id": sale_id, "item_id": item_id, "quantity": quantity, "unit_price": unit_price,
+                    "gst_percentage": gst, "line_total": quantity * unit_price * (1 + gst / 100)
+                }
+                for sale_id, sale_lines in zip(sale_ids, line_rows)
+                for item_id, quantity, unit_price, gst in sale_lines
+            ])
+            print(f"  seeded {start + count}/{sales} sales", end="\r", flush=True)
+    print()
+
+
+def seed_purchases(item_ids, purchases: int):
+    """Purchases of three lines each from 20 suppliers"""
+    rng = random.Random(8)
+    with engine.begin() as conn:
+        supplier_ids = conn.scalars(
+            insert(Supplier).returning(Supplier.id, sort_by_parameter_order=True),
+            [{"name": f"Supplier {index}"} for index in range(20)]
+        ).all()
+        lines = [
+            [(item_id, rng.randint(10, 100), round(rng.uniform(5, 30), 2)) for item_id in rng.sample(item_ids, 3)]
+            for _ in range(purchases)
+        ]
+        purchase_ids = conn.scalars(
+            insert(Purchase).returning(Purchase.id, sort_by_parameter_order=True),
+            [
+                {
+                    "supplier_id": rng.choice(supplier_ids),
+                    "purchase_date": datetime(2024, 1, 1) + timedelta(days=rng.randrange(730)),
+                    "total_amount": sum(quantity * price for _, quantity, price in purchase_lines)
+                }
+                for purchase_lines in lines
+            ]
+        ).all()
+        conn.execute(insert(PurchaseItem), [
+            {"purchase_id": purchase_id, "item_id": item_id, "quantity": quantity, "purchase_price": price}
+            for purchase_id, purchase_lines in zip(purchase_ids, lines)
+            for item_id, quantity, price in purchase_lines
+        ])
+
+
+def timed(callable_, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        callable_()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reports on a large seeded database")
+    parser.add_argument("--lines", type=int, default=1_000_000, help="Sale lines to seed")
+    parser.add_argument("--items", type=int, default=500, help="Items in the catalogue")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per report")
+    args = parser.parse_args()
+
+    print(f"Benchmark database: {os.environ['DATABASE_URL']}")
+    started = time.perf_counter()
+    item_ids = seed_items(args.items)
+    seed_sales(item_ids, args.lines)
+    seed_purchases(item_ids, 5000)
+    print(f"Seeded {args.lines} sale lines in {time.perf_counter() - started:.1f}s")
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        days = rebuild_sales_rollup(db)
+        print(f"Rollup rebuilt ({days} days) in {time.perf_counter() - started:.1f}s")
+
+        month = func.strftime("%Y-%m", Sale.sale_date)
+        raw_monthly = select(month, func.count(Sale.id), func.sum(Sale.total_amount)).group_by(month)
+        raw_ms = timed(lambda: db.execute(raw_monthly).all(), args.repeat)
+    finally:
+        db.close()
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.utils.query_cache import report_cache
+
+    client = TestClient(app)
+    reports = [
+        ("sales by day (2y)", "/api/reports/sales", {"period": "day"}),
+        ("sales by week (2y)", "/api/reports/sales", {"period": "week"}),
+        ("sales by month (2y)", "/api/reports/sales", {"period": "month"}),
+        ("sales by day (1 month)", "/api/reports/sales", {"start_date": "2025-06-01", "end_date": "2025-06-30"}),
+        ("top 10 items by revenue", "/api/reports/top-items", {}),
+        ("top 10 items by quantity", "/api/reports/top-items", {"by": "quantity"}),
+        ("GST per rate", "/api/reports/gst", {}),
+        ("purchases per supplier", "/api/reports/purchases-by-supplier", {}),
+        ("stock valuation", "/api/reports/stock-valuation", {}),
+    ]
+
+    def cold(path, params):
+        report_cache.clear()
+        assert client.get(path, params=params).status_code == 200
+
+    def warm(path, params):
+        assert client.get(path, params=params).status_code == 200
+
+    print(f"\n{'report':<28} {'cold ms':>9} {'warm ms':>9}")
+    print(f"{'raw GROUP BY month':<28} {raw_ms:>9.1f} {'-':>9}")
+    for name, path, params in reports:
+        cold_ms = timed(lambda: cold(path, params), args.repeat)
+        warm_ms = timed(lambda: warm(path, params), args.repeat)
+        print(f"{name:<28} {cold_ms:>9.1f} {warm_ms:>9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
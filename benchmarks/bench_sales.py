@@ -0,0 +1,94 @@
+"""
+Benchmark create_sale latency against the number of sale lines
+
+Runs the sale handler directly (no HTTP) against a throwaway SQLite database
+with the production triggers installed, and reports latency percentiles and
+SQL statements per sale for each line count. Before timing, it checks that
+a sale without lines is rejected with 400 and writes nothing.
+
+Usage:
+    python benchmarks/bench_sales.py [--lines 1,5,10,20,40,80,160] [--repeat 30]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from _common import seed_items, use_database
+
+use_database("bench_sales_")
+
+from fastapi import HTTPException  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app.database import SessionLocal, engine  # noqa: E402
+from app.schemas.sale import SaleCreate  # noqa: E402
+from app.routers.sales import create_sale  # noqa: E402
+
+
+def rejects_empty_sale() -> bool:
+    """A sale without lines must be refused up front, not fail inside the bulk insert"""
+    db = SessionLocal()
+    try:
+        create_sale(SaleCreate(sale_date="2024-01-01T10:00:00", items=[]), db)
+        outcome = "created"
+    except HTTPException as e:
+        outcome = e.status_code
+    finally:
+        db.close()
+    if outcome != 400:
+        print(f"✗ empty sale: expected 400, got {outcome}")
+        return False
+    return True
+
+
+def run(line_counts, repeat: int):
+    item_ids = seed_items(max(line_counts))
+    if not rejects_empty_sale():
+        return 1
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    print(f"{'lines':>6} {'median ms':>10} {'p95 ms':>8} {'max ms':>8} {'stmts/sale':>11}")
+    for line_count in line_counts:
+        sale = SaleCreate(
+            sale_date="2024-01-01T10:00:00",
+            items=[
+                {"item_id": item_id, "quantity": 1, "unit_price": 10.0, "gst_percentage": 18.0}
+                for item_id in item_ids[:line_count]
+            ]
+        )
+        timings = []
+        statements.clear()
+        for _ in range(repeat):
+            db = SessionLocal()
+            try:
+                started = time.perf_counter()
+                create_sale(sale, db)
+                timings.append((time.perf_counter() - started) * 1000)
+            finally:
+                db.close()
+
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        print(
+            f"{line_count:>6} {statistics.median(timings):>10.2f} {p95:>8.2f} "
+            f"{timings[-1]:>8.2f} {len(statements) / repeat:>11.1f}"
+        )
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="create_sale latency vs line count")
+    parser.add_argument("--lines", default="1,5,10,20,40,80,160", help="Comma separated line counts")
+    parser.add_argument("--repeat", type=int, default=30, help="Sales per line count")
+    args = parser.parse_args()
+
+    line_counts = [int(value) for value in args.lines.split(",")]
+    print(f"Benchmark database: {os.environ['DATABASE_URL']}")
+    return run(line_counts, args.repeat)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
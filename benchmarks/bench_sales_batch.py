@@ -0,0 +1,97 @@
+"""
+Benchmark POST /api/sales/batch against replaying the same sales one by one
+
+Replays a day's worth of queued counter sales twice on a throwaway SQLite
+database: once through create_sale per sale, once as a single
+create_sales_batch call, and reports sales per second for both. It then
+checks that sales without lines are reported as failed one by one, also when
+the whole batch consists of them, instead of failing the request.
+
+Usage:
+    python benchmarks/bench_sales_batch.py [--sales 300] [--lines 3]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+from _common import seed_items, use_database
+
+use_database("bench_sales_batch_")
+
+from app.database import SessionLocal  # noqa: E402
+from app.schemas.sale import SaleBatchCreate, SaleCreate  # noqa: E402
+from app.routers.sales import create_sale, create_sales_batch  # noqa: E402
+
+
+def make_sales(item_ids, count: int, lines: int):
+    rng = random.Random(42)
+    return [
+        SaleCreate(
+            sale_date="2024-01-01T10:00:00",
+            items=[
+                {"item_id": item_id, "quantity": rng.randint(1, 5), "unit_price": 10.0, "gst_percentage": 18.0}
+                for item_id in rng.sample(item_ids, lines)
+            ]
+        )
+        for _ in range(count)
+    ]
+
+
+def reports_empty_sales(item_ids) -> bool:
+    """Per-sale results for a batch mixing empty and valid sales, and for an all-empty batch"""
+    empty = SaleCreate(sale_date="2024-01-01T10:00:00", items=[])
+    valid = make_sales(item_ids, 1, 1)[0]
+    ok = True
+    for sales, expected in (([empty, valid, empty], ["failed", "created", "failed"]), ([empty, empty], ["failed", "failed"])):
+        db = SessionLocal()
+        try:
+            results = create_sales_batch(SaleBatchCreate(sales=sales), db)["results"]
+        finally:
+            db.close()
+        statuses = [result["status"] for result in results]
+        codes = {result["status_code"] for result in results if result["status"] == "failed"}
+        if statuses != expected or codes != {400}:
+            print(f"✗ batch with empty sales: expected {expected}, got {results}")
+            ok = False
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch vs sequential sale ingest")
+    parser.add_argument("--sales", type=int, default=300, help="Sales to replay")
+    parser.add_argument("--lines", type=int, default=3, help="Lines per sale")
+    args = parser.parse_args()
+
+    item_ids = seed_items(max(50, args.lines))
+    sales = make_sales(item_ids, args.sales, args.lines)
+    print(f"Benchmark database: {os.environ['DATABASE_URL']}")
+
+    started = time.perf_counter()
+    for sale in sales:
+        db = SessionLocal()
+        try:
+            create_sale(sale, db)
+        finally:
+            db.close()
+    sequential = time.perf_counter() - started
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        response = create_sales_batch(SaleBatchCreate(sales=sales), db)
+        batched = time.perf_counter() - started
+    finally:
+        db.close()
+
+    print(f"{'mode':<12} {'seconds':>8} {'sales/s':>9}")
+    print(f"{'sequential':<12} {sequential:>8.2f} {args.sales / sequential:>9.0f}")
+    print(f"{'batch':<12} {batched:>8.2f} {args.sales / batched:>9.0f}")
+    print(f"speedup: {sequential / batched:.1f}x ({response['created']} created, {response['failed']} failed)")
+    empty_ok = reports_empty_sales(item_ids)
+    return 0 if response["failed"] == 0 and empty_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
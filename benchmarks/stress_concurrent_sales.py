@@ -0,0 +1,110 @@
+"""
+Concurrency stress test for create_sale
+
+Several threads (the billing counters) fire sales at the same few items on a
+throwaway SQLite database until the stock runs out. Afterwards the script
+checks that no item went negative and that, for every item, the starting
+stock equals the final stock plus everything recorded as sold. Exits with
+status 1 if either invariant is broken.
+
+Usage:
+    python benchmarks/stress_concurrent_sales.py [--counters 3] [--sales 200] [--items 5] [--stock 150]
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from _common import seed_items, use_database
+
+use_database("stress_sales_")
+
+from fastapi import HTTPException  # noqa: E402
+from sqlalchemy import func  # noqa: E402
+
+from app.database import SessionLocal  # noqa: E402
+from app.models.models import Item, SaleItem  # noqa: E402
+from app.schemas.sale import SaleCreate  # noqa: E402
+from app.routers.sales import create_sale  # noqa: E402
+
+
+def counter(item_ids, sales: int, seed_value: int, outcomes: Counter, lock: threading.Lock, start: threading.Event):
+    """One billing counter: random 1-3 line sales of 1-5 units each"""
+    rng = random.Random(seed_value)
+    start.wait()
+    for _ in range(sales):
+        lines = [
+            {"item_id": item_id, "quantity": rng.randint(1, 5), "unit_price": 10.0, "gst_percentage": 0.0}
+            for item_id in rng.sample(item_ids, rng.randint(1, min(3, len(item_ids))))
+        ]
+        db = SessionLocal()
+        try:
+            create_sale(SaleCreate(sale_date="2024-01-01T10:00:00", items=lines), db)
+            outcome = "created"
+        except HTTPException as e:
+            outcome = f"http {e.status_code}"
+        finally:
+            db.close()
+        with lock:
+            outcomes[outcome] += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel create_sale stress test")
+    parser.add_argument("--counters", type=int, default=3, help="Concurrent billing counters (threads)")
+    parser.add_argument("--sales", type=int, default=200, help="Sales attempted per counter")
+    parser.add_argument("--items", type=int, default=5, help="Items competed for")
+    parser.add_argument("--stock", type=float, default=150.0, help="Starting stock per item")
+    args = parser.parse_args()
+
+    item_ids = seed_items(args.items, stock=args.stock, low_stock_threshold=0)
+    outcomes: Counter = Counter()
+    lock = threading.Lock()
+    start = threading.Event()
+    threads = [
+        threading.Thread(target=counter, args=(item_ids, args.sales, number, outcomes, lock, start))
+        for number in range(args.counters)
+    ]
+    for thread in threads:
+        thread.start()
+    started = time.perf_counter()
+    start.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    db = SessionLocal()
+    try:
+        final = dict(db.query(Item.id, Item.stock_quantity))
+        sold = dict(db.query(SaleItem.item_id, func.sum(SaleItem.quantity)).group_by(SaleItem.item_id))
+    finally:
+        db.close()
+
+    attempts = args.counters * args.sales
+    print(f"{attempts} sales from {args.counters} counters in {elapsed:.2f}s ({attempts / elapsed:.0f}/s)")
+    for outcome, count in sorted(outcomes.items()):
+        print(f"  {outcome:<12} {count}")
+
+    failures = []
+    for item_id in item_ids:
+        stock = final[item_id]
+        sold_quantity = sold.get(item_id, 0.0)
+        print(f"  item {item_id}: final stock {stock:g}, sold {sold_quantity:g}")
+        if stock < 0:
+            failures.append(f"item {item_id} went negative ({stock:g})")
+        if abs(args.stock - sold_quantity - stock) > 1e-9:
+            failures.append(f"item {item_id}: {args.stock:g} - {sold_quantity:g} sold != {stock:g} left")
+
+    if failures:
+        print("✗ FAILED")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    print("✓ Stock never went negative and every unit sold is accounted for")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""
+Maintenance commands for the inventory database
+
+Usage:
+    python manage.py rebuild-search-index
+    python manage.py rebuild-stock-counts
+    python manage.py snapshot-stock [--date YYYY-MM-DD]
+    python manage.py rebuild-sales-rollup
+    python manage.py archive-audit-logs [--days N] [--vacuum]
+    python manage.py reencode-audit-logs
+"""
+import argparse
+import sys
+from datetime import date
+sys.path.insert(0, '.')
+
+from app.database import SessionLocal, engine, Base
+from app.models import models
+from app.utils.audit_archive import RETENTION_DAYS
+from app.utils.table_versions import ensure_table_versions
+
+
+def rebuild_search_index(args):
+    """Recreate the item search index from the current items and taxonomy"""
+    from app.utils.search_index import ensure_search_index, rebuild_search_index as rebuild
+
+    if not ensure_search_index(engine):
+        print("✗ Search index is not supported on this database (needs SQLite with FTS5)")
+        return 1
+
+    db = SessionLocal()
+    try:
+        count = rebuild(db)
+        print(f"✓ Search index rebuilt ({count} items)")
+        return 0
+    finally:
+        db.close()
+
+
+def rebuild_stock_counts(args):
+    """Recompute the per-category item and low-stock counts"""
+    from app.utils.low_stock import ensure_low_stock_tracking, rebuild_stock_counts as rebuild
+
+    if not ensure_low_stock_tracking(engine):
+        print("✗ Stock counts are not maintained on this database (needs SQLite)")
+        return 1
+
+    db = SessionLocal()
+    try:
+        count = rebuild(db)
+        print(f"✓ Stock counts rebuilt ({count} categories)")
+        return 0
+    finally:
+        db.close()
+
+
+def snapshot_stock(args):
+    """Take the daily stock snapshots that are missing, or redo the one for --date"""
+    from app.utils.stock_ledger import ensure_stock_ledger, snapshot_missing_days, take_snapshot
+
+    if not ensure_stock_ledger(engine):
+        print("✗ Stock ledger is not available on this database")
+        return 1
+
+    db = SessionLocal()
+    try:
+        if args.date:
+            count = take_snapshot(db, args.date)
+            print(f"✓ Stock snapshot for {args.date.isoformat()} taken ({count} items)")
+        else:
+            days = snapshot_missing_days(db)
+            print(f"✓ Stock snapshots taken for {len(days)} day(s)")
+        return 0
+    finally:
+        db.close()
+
+
+def rebuild_sales_rollup(args):
+    """Recompute the daily sales rollups from the sales tables"""
+    from app.utils.sales_rollup import rebuild_sales_rollup as rebuild
+
+    db = SessionLocal()
+    try:
+        days = rebuild(db)
+        print(f"✓ Sales rollup rebuilt ({days} days)")
+        return 0
+    finally:
+        db.close()
+
+
+def archive_audit_logs(args):
+    """Move audit logs older than --days into the monthly archive segments"""
+    from app.utils.audit_archive import ARCHIVE_DIR, archive_audit_logs as archive
+    from app.utils.audit_encoding import ensure_audit_changes_column
+
+    ensure_audit_changes_column(engine)
+    count = archive(engine, args.days)
+    print(f"✓ Archived {count} audit logs older than {args.days} days to {ARCHIVE_DIR}")
+    if args.vacuum and engine.dialect.name == "sqlite":
+        with engine.connect() as conn:
+            conn.exec_driver_sql("VACUUM")
+        print("✓ Database vacuumed")
+    return 0
+
+
+def reencode_audit_logs(args):
+    """Store older audit rows in the encoded changes column instead of JSON"""
+    from app.utils.audit_encoding import ensure_audit_changes_column, reencode_audit_logs as reencode
+
+    if not ensure_audit_changes_column(engine):
+        print("✗ Could not add the audit_logs.changes column")
+        return 1
+    stats = reencode(engine)
+    saved = stats["json_bytes"] - stats["encoded_bytes"]
+    percent = 100 * saved / stats["json_bytes"] if stats["json_bytes"] else 0
+    print(
+        f"✓ Re-encoded {stats['rows']} audit logs: {stats['json_bytes']} -> {stats['encoded_bytes']} bytes "
+        f"({percent:.0f}% smaller)"
+    )
+    if stats["skipped"]:
+        print(f"  {stats['skipped']} audit logs kept as JSON (not a JSON object or not reproducible)")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inventory database maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser(
+        "rebuild-search-index", help="Rebuild the FTS5 item search index"
+    ).set_defaults(func=rebuild_search_index)
+    subparsers.add_parser(
+        "rebuild-stock-counts", help="Recompute per-category item and low-stock counts"
+    ).set_defaults(func=rebuild_stock_counts)
+    snapshot_parser = subparsers.add_parser(
+        "snapshot-stock", help="Take missing daily stock snapshots (or redo one day)"
+    )
+    snapshot_parser.add_argument("--date", type=date.fromisoformat, help="Day to snapshot (YYYY-MM-DD)")
+    snapshot_parser.set_defaults(func=snapshot_stock)
+    subparsers.add_parser(
+        "rebuild-sales-rollup", help="Recompute the daily sales rollups (backfill)"
+    ).set_defaults(func=rebuild_sales_rollup)
+    archive_parser = subparsers.add_parser(
+        "archive-audit-logs", help="Move old audit logs to compressed monthly archive files"
+    )
+    archive_parser.add_argument("--days", type=int, default=RETENTION_DAYS, help="Keep this many days in the database")
+    archive_parser.add_argument("--vacuum", action="store_true", help="VACUUM the database afterwards (SQLite)")
+    archive_parser.set_defaults(func=archive_audit_logs)
+    subparsers.add_parser(
+        "reencode-audit-logs", help="Re-encode older audit logs in the compact changes encoding"
+    ).set_defaults(func=reencode_audit_logs)
+
+    args = parser.parse_args()
+    Base.metadata.create_all(bind=engine)
+    # Writes below bump the table versions the server's caches are keyed on
+    ensure_table_versions(engine)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
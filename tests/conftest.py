@@ -0,0 +1,61 @@
+"""
+Shared fixtures for the test suite
+
+The app creates its engine on import, so the environment is pointed at a
+throwaway database (and the background jobs are kept off) before anything
+from `app` is imported.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+_workdir = tempfile.mkdtemp(prefix="inventory_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_workdir, 'test.db')}"
+os.environ["APPDATA"] = _workdir
+os.environ["AUDIT_ARCHIVE_DIR"] = os.path.join(_workdir, "audit_archive")
+os.environ["AUDIT_ARCHIVE_INTERVAL"] = "0"
+os.environ["STOCK_SNAPSHOT_INTERVAL"] = "0"
+os.environ["EXPORT_DIR"] = os.path.join(_workdir, "exports")
+
+from app.main import app  # noqa: E402  (creates the schema)
+from app.database import SessionLocal, engine  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def clean_database():
+    """Every test starts from empty tables and caches"""
+    yield
+    from app.utils.category_matrix import category_matrix
+
+    with engine.begin() as conn:
+        tables = [
+            name for (name,) in conn.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' "
+                "AND name NOT LIKE 'items_fts%' AND name NOT IN ('table_versions', 'item_changes')"
+            )
+        ]
+        # The delete triggers bump the table versions, so the caches go stale too
+        for table in tables:
+            conn.exec_driver_sql(f"DELETE FROM {table}")
+    category_matrix.invalidate()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client():
+    """TestClient without the startup/shutdown events (no background threads)"""
+    from fastapi.testclient import TestClient
+
+    return TestClient(app)
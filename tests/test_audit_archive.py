@@ -0,0 +1,139 @@
+import os
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import func, insert, select
+
+from app.database import engine
+from app.models.models import AuditLog
+from app.utils import audit_archive
+from app.utils.audit_archive import archive_audit_logs, load_index, read_archived_logs
+from app.utils.audit_encoding import encode_changes
+
+TODAY = date(2026, 6, 15)
+
+
+@pytest.fixture(autouse=True)
+def archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(audit_archive, "ARCHIVE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _seed(first: datetime, count: int, step=timedelta(hours=1)):
+    with engine.begin() as conn:
+        conn.execute(insert(AuditLog), [
+            {
+                "table_name": "items" if index % 2 else "categories",
+                "record_id": index,
+                "operation": "UPDATE",
+                "changes": encode_changes({"stock_quantity": index}, {"stock_quantity": index + 1}),
+                "timestamp": first + step * index
+            }
+            for index in range(count)
+        ])
+
+
+def _live_rows(db) -> int:
+    return db.scalar(select(func.count(AuditLog.id)))
+
+
+def test_default_directory_sits_next_to_the_database():
+    database_dir = os.path.dirname(os.path.abspath(engine.url.database))
+
+    assert audit_archive._default_archive_dir() == os.path.join(database_dir, "audit_archive")
+
+
+def test_old_rows_move_to_monthly_segments(db):
+    _seed(datetime(2025, 1, 1), 48)
+    _seed(datetime(2026, 6, 1), 5)
+
+    archived = archive_audit_logs(engine, retention_days=365, today=TODAY)
+
+    assert archived == 48
+    assert _live_rows(db) == 5
+    index = load_index("2025-01")
+    assert index["rows"] == 48
+    assert index["max_id"] == max(member["max_id"] for member in index["members"])
+
+
+def test_interrupted_run_does_not_archive_twice(db, monkeypatch):
+    _seed(datetime(2025, 1, 1), 30)
+    monkeypatch.setattr(audit_archive, "ARCHIVE_CHUNK", 10)
+    real_append = audit_archive._append_member
+    calls = []
+
+    def append_then_crash(month, index, rows):
+        real_append(month, index, rows)
+        calls.append(len(rows))
+        if len(calls) == 2:
+            raise RuntimeError("power cut")
+
+    monkeypatch.setattr(audit_archive, "_append_member", append_then_crash)
+    with pytest.raises(RuntimeError):
+        archive_audit_logs(engine, retention_days=365, today=TODAY)
+    monkeypatch.setattr(audit_archive, "_append_member", real_append)
+    assert _live_rows(db) == 20
+
+    reads = []
+    real_read = audit_archive._read_member
+    monkeypatch.setattr(audit_archive, "_read_member", lambda month, member: reads.append(member) or real_read(month, member))
+    archive_audit_logs(engine, retention_days=365, today=TODAY)
+
+    assert _live_rows(db) == 0
+    assert load_index("2025-01")["rows"] == 30
+    # Only the member written just before the crash is read back
+    assert len(reads) == 1
+    ids = [row["id"] for row in read_archived_logs(limit=100, newest_first=False)]
+    assert len(ids) == len(set(ids)) == 30
+
+
+def test_rerun_without_leftovers_reads_no_segment(db, monkeypatch):
+    _seed(datetime(2025, 1, 1), 10)
+    _seed(datetime(2026, 6, 1), 1)  # keeps the ids growing
+    archive_audit_logs(engine, retention_days=365, today=TODAY)
+    _seed(datetime(2025, 1, 20), 10)
+
+    reads = []
+    real_read = audit_archive._read_member
+    monkeypatch.setattr(audit_archive, "_read_member", lambda month, member: reads.append(member) or real_read(month, member))
+    archived = archive_audit_logs(engine, retention_days=365, today=TODAY)
+
+    assert archived == 10
+    assert reads == []
+    assert load_index("2025-01")["rows"] == 20
+
+
+def test_reused_ids_are_still_archived(db):
+    _seed(datetime(2025, 1, 1), 10)
+    archive_audit_logs(engine, retention_days=365, today=TODAY)
+    # The table is empty now, so SQLite starts the ids over
+    _seed(datetime(2025, 1, 20), 10)
+
+    archived = archive_audit_logs(engine, retention_days=365, today=TODAY)
+
+    assert archived == 10
+    assert _live_rows(db) == 0
+    assert len(read_archived_logs(limit=100)) == 20
+
+
+def test_queries_read_through_to_the_archive(client):
+    _seed(datetime(2025, 1, 1), 20)
+    _seed(datetime(2026, 6, 1), 4)
+    archive_audit_logs(engine, retention_days=365, today=TODAY)
+
+    live = client.get("/api/audit-logs/", params={"limit": 100}).json()
+    both = client.get("/api/audit-logs/", params={"limit": 100, "include_archived": True}).json()
+
+    assert len(live) == 4
+    assert len(both) == 24
+    timestamps = [row["timestamp"] for row in both]
+    assert timestamps == sorted(timestamps, reverse=True)
+    archived = both[-1]
+    assert archived["old_data"] == {"stock_quantity": 0}
+    assert archived["new_data"] == {"stock_quantity": 1}
+
+    only_items = client.get(
+        "/api/audit-logs/", params={"limit": 100, "include_archived": True, "table_name": "items"}
+    ).json()
+    assert {row["table_name"] for row in only_items} == {"items"}
+    assert len(only_items) == 12
@@ -0,0 +1,101 @@
+from sqlalchemy import insert, select
+
+from app.database import engine
+from app.models.models import AuditLog
+from app.utils import audit_encoding
+from app.utils.audit_encoding import audit_view, decode_changes, encode_changes, reencode_audit_logs
+
+
+def _view(db, log_id):
+    return audit_view(db.get(AuditLog, log_id))
+
+
+def test_update_round_trip_keeps_both_records():
+    old = {"id": 1, "name": "Bolts", "description": "M6", "stock_quantity": 10.0}
+    new = {"id": 1, "name": "Bolts", "description": "M8", "stock_quantity": 7.5}
+
+    assert decode_changes(encode_changes(old, new)) == (old, new)
+
+
+def test_update_round_trip_with_dropped_and_added_fields():
+    old = {"name": "Bolts", "description": "M6"}
+    new = {"name": "Bolts", "sku": "B-1"}
+
+    assert decode_changes(encode_changes(old, new)) == (old, new)
+
+
+def test_unchanged_update_still_has_a_new_record():
+    old = {"name": "Bolts"}
+
+    assert decode_changes(encode_changes(old, dict(old))) == (old, old)
+    assert decode_changes(encode_changes(old, {})) == (old, {})
+
+
+def test_insert_and_delete_keep_their_one_side():
+    record = {"name": "Bolts", "stock_quantity": 3}
+
+    assert decode_changes(encode_changes(None, record)) == (None, record)
+    assert decode_changes(encode_changes(record, None)) == (record, None)
+    assert encode_changes(None, None) is None
+
+
+def test_large_changes_are_compressed(monkeypatch):
+    monkeypatch.setattr(audit_encoding, "COMPRESS_THRESHOLD", 16)
+    old = {"description": "x" * 500}
+    new = {"description": "y" * 500}
+
+    encoded = encode_changes(old, new)
+
+    assert encoded[:1] == b"\x01"
+    assert len(encoded) < 200
+    assert decode_changes(encoded) == (old, new)
+
+
+def test_first_version_diffs_still_decode():
+    import msgpack
+
+    encoded = b"\x00" + msgpack.packb({"o": {"name": "a"}, "n": {"name": "b"}})
+
+    assert decode_changes(encoded) == ({"name": "a"}, {"name": "b"})
+
+
+def test_flushed_update_is_logged_with_full_records(client, db):
+    category_id = client.post("/api/categories/", json={"name": "Fasteners", "description": "nuts"}).json()["id"]
+    client.put(f"/api/categories/{category_id}", json={"description": "nuts and bolts"})
+
+    log = db.scalars(
+        select(AuditLog).where(AuditLog.table_name == "categories", AuditLog.operation == "UPDATE")
+    ).one()
+    view = audit_view(log)
+
+    assert view["old_data"]["description"] == "nuts"
+    assert view["new_data"]["description"] == "nuts and bolts"
+    assert view["old_data"]["name"] == view["new_data"]["name"] == "Fasteners"
+    assert view["old_data"]["id"] == view["new_data"]["id"] == category_id
+
+
+def test_reencode_moves_json_rows_and_keeps_the_rest(db):
+    old = {"name": "Bolts", "stock_quantity": 10}
+    new = {"name": "Bolts", "stock_quantity": 4}
+    with engine.begin() as conn:
+        encodable = conn.execute(insert(AuditLog).returning(AuditLog.id), {
+            "table_name": "items", "record_id": 1, "operation": "UPDATE",
+            "old_data": old, "new_data": new
+        }).scalar_one()
+        not_an_object = conn.execute(insert(AuditLog).returning(AuditLog.id), {
+            "table_name": "items", "record_id": 2, "operation": "UPDATE",
+            "old_data": [1, 2], "new_data": {"name": "Nuts"}
+        }).scalar_one()
+
+    stats = reencode_audit_logs(engine)
+
+    assert stats["rows"] == 1
+    assert stats["skipped"] == 1
+    moved = db.get(AuditLog, encodable)
+    assert moved.old_data is None and moved.new_data is None
+    assert _view(db, encodable)["old_data"] == old
+    assert _view(db, encodable)["new_data"] == new
+    kept = db.get(AuditLog, not_an_object)
+    assert kept.changes is None
+    assert kept.old_data == [1, 2]
+    assert kept.new_data == {"name": "Nuts"}
@@ -0,0 +1,47 @@
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.utils.export_jobs import ExportJob, ExportJobManager, ExportPurgeScheduler
+
+
+def _finished_job(manager, expires_in: float) -> ExportJob:
+    job = ExportJob(id=f"job{len(manager._jobs)}", format="csv", filename="items", status="completed")
+    job.path = os.path.join(manager.directory, f"{job.id}.csv")
+    with open(job.path, "w") as f:
+        f.write("sku\n")
+    job.expires_at = datetime.now(timezone.utc) + timedelta(seconds=expires_in)
+    manager._jobs[job.id] = job
+    return job
+
+
+def test_scheduler_purges_expired_files_without_requests(tmp_path):
+    manager = ExportJobManager(1, 2, 60, str(tmp_path))
+    expired = _finished_job(manager, -1)
+    current = _finished_job(manager, 60)
+    purger = ExportPurgeScheduler(manager, interval=0.05)
+    purger.start()
+    try:
+        deadline = time.time() + 5
+        while os.path.exists(expired.path) and time.time() < deadline:
+            time.sleep(0.02)
+    finally:
+        purger.stop()
+        manager.shutdown()
+
+    assert not os.path.exists(expired.path)
+    assert os.path.exists(current.path)
+    assert set(manager._jobs) == {current.id}
+
+
+def test_stop_purges_even_when_the_timer_is_off(tmp_path):
+    manager = ExportJobManager(1, 2, 60, str(tmp_path))
+    expired = _finished_job(manager, -1)
+    purger = ExportPurgeScheduler(manager, interval=0)
+    purger.start()
+
+    purger.stop()
+    manager.shutdown()
+
+    assert not os.path.exists(expired.path)
+    assert manager._jobs == {}
@@ -0,0 +1,68 @@
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.utils.http_ranges import _parse_range, ranged_file_response
+
+BODY = bytes(range(256)) * 4  # 1024 bytes
+ETAG = '"export-v1"'
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=1000-", (1000, 1023)),
+    ("bytes=1000-5000", (1000, 1023)),
+    ("bytes=-24", (1000, 1023)),
+    ("bytes=-5000", (0, 1023)),
+    (" bytes=5-5 ", (5, 5)),
+])
+def test_satisfiable_ranges(header, expected):
+    assert _parse_range(header, len(BODY)) == expected
+
+
+@pytest.mark.parametrize("header", [
+    "bytes=1024-", "bytes=50-10", "bytes=-0", "bytes=-", "bytes=0-1,5-6", "items=0-1", "bytes=a-b",
+])
+def test_unsatisfiable_ranges(header):
+    assert _parse_range(header, len(BODY)) is None
+
+
+@pytest.fixture
+def download(tmp_path):
+    path = tmp_path / "export.csv"
+    path.write_bytes(BODY)
+    app = FastAPI()
+
+    @app.get("/download")
+    def get_download(request: Request):
+        return ranged_file_response(request, str(path), "text/csv", "export.csv", ETAG)
+
+    client = TestClient(app)
+    return lambda **headers: client.get("/download", headers=headers)
+
+
+def test_range_gets_206_with_just_those_bytes(download):
+    response = download(range="bytes=100-199")
+
+    assert response.status_code == 206
+    assert response.content == BODY[100:200]
+    assert response.headers["content-range"] == "bytes 100-199/1024"
+    assert response.headers["content-length"] == "100"
+
+
+def test_unsatisfiable_range_gets_416_with_the_size(download):
+    response = download(range="bytes=2000-")
+
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */1024"
+
+
+def test_no_range_or_a_stale_if_range_gets_the_whole_file(download):
+    for response in (download(), download(range="bytes=0-9", **{"if-range": '"export-v0"'})):
+        assert response.status_code == 200
+        assert response.content == BODY
+        assert response.headers["accept-ranges"] == "bytes"
+
+    resumed = download(range="bytes=1000-", **{"if-range": ETAG})
+    assert resumed.status_code == 206
+    assert resumed.content == BODY[1000:]
@@ -0,0 +1,82 @@
+import pytest
+
+from app.models.models import Category, Item, Quality, Size
+from app.utils.pagination import InvalidCursorError, decode_cursor, encode_cursor
+
+
+def _items(db, stocks):
+    category = Category(name="Bolts")
+    db.add(category)
+    db.flush()
+    quality = Quality(category_id=category.id, name="Steel")
+    db.add(quality)
+    db.flush()
+    for index, stock in enumerate(stocks):
+        size = Size(category_id=category.id, size_value=str(index), size_display=f"{index}mm", sort_order=index)
+        db.add(size)
+        db.flush()
+        db.add(Item(
+            category_id=category.id, quality_id=quality.id, size_id=size.id, sku=f"B-{index:02d}",
+            selling_price=2.0, gst_percentage=18.0, stock_quantity=stock, low_stock_threshold=1.0
+        ))
+    db.commit()
+
+
+def _walk(client, params, direction="next_cursor", cursor=None):
+    pages = []
+    while True:
+        body = client.get("/api/items/", params={**params, "pagination": "cursor", "cursor": cursor}).json()
+        pages.append([item["sku"] for item in body["items"]])
+        cursor = body[direction]
+        if cursor is None:
+            return pages, body
+
+
+def test_cursor_round_trip():
+    payload = {"s": "stock", "o": "desc", "v": 2.5, "id": 17, "dir": "next"}
+
+    token = encode_cursor(payload)
+
+    assert "=" not in token
+    assert decode_cursor(token) == payload
+
+
+@pytest.mark.parametrize("token", ["not base64!", encode_cursor({"v": 1}), "W10"])
+def test_malformed_cursors_are_rejected(token):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(token)
+
+
+@pytest.mark.parametrize("sort_order", ["asc", "desc"])
+def test_ties_on_the_sort_value_are_broken_by_id(client, db, sort_order):
+    # Eleven items over three stock values: every page boundary falls inside a tie
+    _items(db, [5, 1, 5, 3, 1, 5, 3, 1, 5, 3, 1])
+    params = {"sort_by": "stock", "sort_order": sort_order, "limit": 3}
+
+    pages, _ = _walk(client, params)
+    forward = [sku for page in pages for sku in page]
+
+    offset = client.get("/api/items/", params={**params, "limit": 100}).json()
+    assert forward == [item["sku"] for item in offset["items"]]
+    assert len(set(forward)) == 11
+    assert [len(page) for page in pages] == [3, 3, 3, 2]
+
+
+def test_prev_cursor_walks_back_over_the_same_pages(client, db):
+    _items(db, [2, 2, 2, 1, 1, 1, 3])
+    params = {"sort_by": "stock", "sort_order": "asc", "limit": 2}
+    forward, last = _walk(client, params)
+
+    backward, _ = _walk(client, params, "prev_cursor", last["prev_cursor"])
+
+    assert backward == forward[-2::-1]
+
+
+def test_cursor_from_another_ordering_is_rejected(client, db):
+    _items(db, [1, 2, 3])
+    first = client.get("/api/items/", params={"pagination": "cursor", "sort_by": "stock", "limit": 1}).json()
+
+    response = client.get("/api/items/", params={"sort_by": "price", "cursor": first["next_cursor"]})
+
+    assert response.status_code == 400
+    assert client.get("/api/items/", params={"cursor": "garbage!"}).status_code == 400
@@ -0,0 +1,134 @@
+import io
+
+import pytest
+from openpyxl import Workbook
+
+from app.models.models import Category, Item, Purchase, Quality, Size
+from app.utils.purchase_import import InvoiceFormatError, parse_invoice
+
+INVOICE = """Acme Fasteners - Invoice 42
+,,,
+Item Code,Description,Qty,Rate
+B-1,Bolt,10,2.50
+,No SKU,1,1
+B-2,Bolt,zero,1
+B-2,Bolt,-3,1
+B-3,Bolt,4,nan
+,,,
+B-9,Unknown,1,"1,200.00"
+B-2,Bolt,5,3
+"""
+
+
+def _csv(text: str) -> io.BytesIO:
+    return io.BytesIO(text.encode())
+
+
+def test_rows_are_read_below_a_title_block():
+    lines, errors, rows_total = parse_invoice(_csv(INVOICE), "invoice.csv")
+
+    assert rows_total == 7
+    assert [(line.row, line.sku, line.quantity, line.purchase_price) for line in lines] == [
+        (4, "B-1", 10.0, 2.5), (10, "B-9", 1.0, 1200.0), (11, "B-2", 5.0, 3.0)
+    ]
+    assert errors == [
+        {"row": 5, "sku": None, "error": "Missing SKU"},
+        {"row": 6, "sku": "B-2", "error": "Invalid quantity: 'zero'"},
+        {"row": 7, "sku": "B-2", "error": "Invalid quantity: '-3'"},
+        {"row": 8, "sku": "B-3", "error": "Invalid price: 'nan'"},
+    ]
+
+
+def test_xlsx_invoices_read_like_csv():
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["SKU", "Quantity", "Unit Price"])
+    sheet.append(["B-1", 2, 1.5])
+    sheet.append(["B-2", None, 1.5])
+    data = io.BytesIO()
+    workbook.save(data)
+    data.seek(0)
+
+    lines, errors, rows_total = parse_invoice(data, "invoice.xlsx")
+
+    assert rows_total == 2
+    assert [(line.sku, line.quantity, line.purchase_price) for line in lines] == [("B-1", 2.0, 1.5)]
+    assert errors == [{"row": 3, "sku": "B-2", "error": "Invalid quantity: None"}]
+
+
+@pytest.mark.parametrize("filename, content", [
+    ("invoice.pdf", b"%PDF"),
+    ("invoice.csv", b"just,some,columns\n1,2,3\n"),
+    ("invoice.xlsx", b"not a zip file"),
+    ("invoice.csv", "sku,qty,price\nB-1,1,1\n".encode("utf-16")),
+])
+def test_unreadable_invoices_are_format_errors(filename, content):
+    with pytest.raises(InvoiceFormatError):
+        parse_invoice(io.BytesIO(content), filename)
+
+
+@pytest.fixture
+def stocked_items(db):
+    category = Category(name="Bolts")
+    db.add(category)
+    db.flush()
+    quality = Quality(category_id=category.id, name="Steel")
+    db.add(quality)
+    db.flush()
+    items = {}
+    for index, sku in enumerate(("B-1", "B-2", "B-3")):
+        size = Size(category_id=category.id, size_value=str(index), size_display=f"{index}mm", sort_order=index)
+        db.add(size)
+        db.flush()
+        items[sku] = Item(
+            category_id=category.id, quality_id=quality.id, size_id=size.id, sku=sku,
+            selling_price=5.0, gst_percentage=18.0, stock_quantity=1.0, low_stock_threshold=0.0
+        )
+        db.add(items[sku])
+    db.commit()
+    return items
+
+
+def _import(client, text, **form):
+    return client.post(
+        "/api/purchases/import",
+        files={"file": ("invoice.csv", text.encode(), "text/csv")},
+        data={"purchase_date": "2026-03-01T09:00:00", **form}
+    )
+
+
+def test_bad_rows_reject_the_whole_invoice(client, db, stocked_items):
+    response = _import(client, INVOICE)
+
+    assert response.status_code == 422
+    detail = response.json()["detail"]
+    assert detail["rows_total"] == 7
+    assert detail["rows_imported"] == 0
+    assert detail["rows_failed"] == 5
+    assert [error["row"] for error in detail["errors"]] == [5, 6, 7, 8, 10]
+    assert detail["errors"][-1] == {"row": 10, "sku": "B-9", "error": "Unknown SKU"}
+    assert db.query(Purchase).count() == 0
+    db.expire_all()
+    assert stocked_items["B-1"].stock_quantity == 1.0
+
+
+def test_skip_invalid_imports_the_good_rows(client, db, stocked_items):
+    response = _import(client, INVOICE, skip_invalid="true")
+
+    assert response.status_code == 201, response.text
+    body = response.json()
+    assert body["rows_imported"] == 2
+    assert body["rows_failed"] == 5
+    assert body["total_amount"] == pytest.approx(10 * 2.5 + 5 * 3)
+    db.expire_all()
+    assert stocked_items["B-1"].stock_quantity == 11.0
+    assert stocked_items["B-2"].stock_quantity == 6.0
+    assert stocked_items["B-3"].stock_quantity == 1.0
+
+
+def test_invoice_without_importable_rows_is_rejected(client, db, stocked_items):
+    response = _import(client, "sku,qty,price\nB-9,1,1\n", skip_invalid="true")
+
+    assert response.status_code == 422
+    assert response.json()["detail"]["message"] == "Invoice has no importable rows"
+    assert db.query(Purchase).count() == 0
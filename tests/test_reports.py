@@ -0,0 +1,14 @@
+import pytest
+
+
+@pytest.mark.parametrize("limit", [0, -1, 101])
+def test_top_items_rejects_out_of_range_limits(client, limit):
+    response = client.get("/api/reports/top-items", params={"limit": limit})
+
+    assert response.status_code == 422
+
+
+def test_top_items_accepts_the_bounds(client):
+    for limit in (1, 100):
+        response = client.get("/api/reports/top-items", params={"limit": limit})
+        assert response.status_code == 200, response.text
@@ -0,0 +1,96 @@
+from datetime import date, datetime
+
+import pytest
+
+from app.models.models import (
+    Category, Item, Quality, SalesDailyGstRollup, SalesDailyRollup, SalesDailyTotal, Size
+)
+from app.utils.sales_rollup import apply_sales, rebuild_sales_rollup
+
+
+def _line(item_id, quantity, unit_price=10.0, gst_percentage=18.0):
+    return {"item_id": item_id, "quantity": quantity, "unit_price": unit_price, "gst_percentage": gst_percentage}
+
+
+def _snapshot(db):
+    """Every rollup row, keyed and rounded so incremental and rebuilt rows compare equal"""
+    def rows(model, keys, fields):
+        return {
+            tuple(getattr(row, key) for key in keys): tuple(round(getattr(row, field), 6) for field in fields)
+            for row in db.query(model)
+        }
+
+    db.expire_all()
+    return (
+        rows(SalesDailyTotal, ("sale_day",), ("sales_count", "subtotal", "gst_amount", "discount", "total_amount")),
+        rows(SalesDailyRollup, ("sale_day", "item_id"), ("quantity", "revenue", "gst_amount", "line_count")),
+        rows(SalesDailyGstRollup, ("sale_day", "gst_percentage"), ("taxable_amount", "gst_amount", "line_count")),
+    )
+
+
+def test_sales_on_the_same_day_add_onto_one_row(db):
+    apply_sales(db, [(datetime(2026, 3, 1, 9), 0.0, [_line(1, 2)])])
+    apply_sales(db, [
+        (datetime(2026, 3, 1, 17), 1.0, [_line(1, 1), _line(2, 3, gst_percentage=5.0)]),
+        (datetime(2026, 3, 2, 10), 0.0, [_line(2, 1, gst_percentage=5.0)]),
+    ])
+    db.commit()
+
+    day = db.get(SalesDailyTotal, date(2026, 3, 1))
+    assert day.sales_count == 2
+    assert day.subtotal == pytest.approx(60.0)
+    assert day.gst_amount == pytest.approx(30 * 0.18 + 30 * 0.05)
+    assert day.discount == pytest.approx(1.0)
+    assert db.get(SalesDailyRollup, (date(2026, 3, 1), 1)).quantity == 3
+    assert db.get(SalesDailyGstRollup, (date(2026, 3, 1), 18.0)).line_count == 2
+    assert db.query(SalesDailyTotal).count() == 2
+
+
+def test_removing_the_last_sale_of_a_day_drops_its_rows(db):
+    sale = (datetime(2026, 3, 1, 9), 0.0, [_line(1, 2)])
+    apply_sales(db, [sale, (datetime(2026, 3, 1, 10), 0.0, [_line(2, 1, gst_percentage=5.0)])])
+    db.commit()
+
+    apply_sales(db, [sale], sign=-1)
+    db.commit()
+
+    assert db.get(SalesDailyTotal, date(2026, 3, 1)).sales_count == 1
+    assert db.get(SalesDailyRollup, (date(2026, 3, 1), 1)) is None
+    assert db.get(SalesDailyGstRollup, (date(2026, 3, 1), 18.0)) is None
+    assert db.get(SalesDailyRollup, (date(2026, 3, 1), 2)) is not None
+
+
+def test_incremental_rollup_matches_a_rebuild(client, db):
+    category = Category(name="Bolts")
+    db.add(category)
+    db.flush()
+    quality = Quality(category_id=category.id, name="Steel")
+    size = Size(category_id=category.id, size_value="6", size_display="6mm", sort_order=1)
+    db.add_all([quality, size])
+    db.flush()
+    item = Item(
+        category_id=category.id, quality_id=quality.id, size_id=size.id, sku="B-6",
+        selling_price=2.0, gst_percentage=18.0, stock_quantity=100.0, low_stock_threshold=1.0
+    )
+    db.add(item)
+    db.commit()
+
+    sale_ids = []
+    for day, quantity, discount in [(1, 2, 0.0), (1, 3, 0.5), (2, 1, 0.0), (3, 4, 1.0)]:
+        response = client.post("/api/sales/", json={
+            "sale_date": f"2026-03-0{day}T12:00:00",
+            "discount": discount,
+            "items": [
+                {"item_id": item.id, "quantity": quantity, "unit_price": 2.5, "gst_percentage": 18.0},
+                {"item_id": item.id, "quantity": 1, "unit_price": 2.5, "gst_percentage": 12.0},
+            ]
+        })
+        assert response.status_code == 201, response.text
+        sale_ids.append(response.json()["id"])
+    assert client.delete(f"/api/sales/{sale_ids[2]}").status_code == 204
+
+    incremental = _snapshot(db)
+    rebuild_sales_rollup(db)
+
+    assert _snapshot(db) == incremental
+    assert date(2026, 3, 2) not in incremental[0]
@@ -0,0 +1,52 @@
+import pytest
+
+from app.models.models import Category, Item, Quality, Size
+from app.utils import search_index
+from app.utils.search_index import build_match_query
+
+
+@pytest.mark.parametrize("search, expected", [
+    ("gi 10", '"gi"* "10"*'),
+    ("  Bolt  ", '"bolt"*'),
+    ('M6 "hex" (zinc)', '"m6"* "hex"* "zinc"*'),
+    ("NOT or*", '"not"* "or"*'),
+    ("ß-Stahl", '"ß"* "stahl"*'),
+])
+def test_words_become_quoted_prefix_terms(search, expected):
+    assert build_match_query(search) == expected
+
+
+@pytest.mark.parametrize("search", ["", "   ", '"*()-:^'])
+def test_text_without_words_has_no_query(search):
+    assert build_match_query(search) is None
+
+
+def _item(db, category, quality, size_display, sku):
+    category = db.query(Category).filter_by(name=category).first() or Category(name=category)
+    db.add(category)
+    db.flush()
+    quality_row = Quality(category_id=category.id, name=quality)
+    size = Size(category_id=category.id, size_value=size_display.rstrip("m"), size_display=size_display, sort_order=1)
+    db.add_all([quality_row, size])
+    db.flush()
+    db.add(Item(
+        category_id=category.id, quality_id=quality_row.id, size_id=size.id, sku=sku,
+        selling_price=1.0, gst_percentage=18.0, stock_quantity=1.0, low_stock_threshold=0.0
+    ))
+    db.commit()
+
+
+def test_search_matches_every_word_across_fields(client, db):
+    assert search_index.is_available()
+    _item(db, "Pipes", "GI (Galvanized Iron)", "10mm", "P-GI-10")
+    _item(db, "Pipes", "GI (Galvanized Iron)", "20mm", "P-GI-20")
+    _item(db, "Pipes", "PVC", "10mm", "P-PVC-10")
+
+    def skus(search):
+        body = client.get("/api/items/", params={"search": search, "sort_by": "sku"}).json()
+        return [item["sku"] for item in body["items"]]
+
+    assert skus("gi 10") == ["P-GI-10"]
+    assert skus("galv") == ["P-GI-10", "P-GI-20"]
+    assert skus("pipes") == ["P-GI-10", "P-GI-20", "P-PVC-10"]
+    assert skus('"NOT" (') == []
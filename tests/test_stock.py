@@ -0,0 +1,115 @@
+import sqlite3
+
+import pytest
+
+from app.database import engine
+from app.models.models import Category, Item, Quality, Sale, Size
+from app.routers import sales
+from app.utils.stock import StockConflictError, deduct_stock
+
+
+def _items(db, *stocks):
+    category = Category(name="Bolts")
+    db.add(category)
+    db.flush()
+    quality = Quality(category_id=category.id, name="Steel")
+    db.add(quality)
+    db.flush()
+    ids = []
+    for index, stock in enumerate(stocks):
+        size = Size(category_id=category.id, size_value=str(index), size_display=f"{index}mm", sort_order=index)
+        db.add(size)
+        db.flush()
+        item = Item(
+            category_id=category.id, quality_id=quality.id, size_id=size.id, sku=f"B-{index}",
+            selling_price=2.0, gst_percentage=18.0, stock_quantity=stock, low_stock_threshold=1.0
+        )
+        db.add(item)
+        db.flush()
+        ids.append(item.id)
+    db.commit()
+    return ids
+
+
+def _stock(item_id):
+    with engine.connect() as conn:
+        return conn.exec_driver_sql("SELECT stock_quantity FROM items WHERE id = ?", (item_id,)).scalar()
+
+
+def _sell(client, item_id, quantity):
+    return client.post("/api/sales/", json={
+        "sale_date": "2026-03-01T10:00:00",
+        "items": [{"item_id": item_id, "quantity": quantity, "unit_price": 2.0, "gst_percentage": 18.0}]
+    })
+
+
+def test_deduction_takes_every_item_in_one_statement(db):
+    first, second = _items(db, 10, 4)
+
+    deduct_stock(db, {first: 3, second: 4})
+    db.commit()
+
+    assert (_stock(first), _stock(second)) == (7, 0)
+
+
+def test_deduction_refuses_to_go_below_zero(db):
+    first, second = _items(db, 10, 4)
+
+    with pytest.raises(StockConflictError):
+        deduct_stock(db, {first: 3, second: 5})
+    db.rollback()
+
+    assert (_stock(first), _stock(second)) == (10, 4)
+
+
+def test_sale_that_lost_a_race_is_retried(client, db, monkeypatch):
+    (item_id,) = _items(db, 10)
+    real_deduct = sales.deduct_stock
+    calls = []
+
+    def lose_once(session, quantities):
+        calls.append(quantities)
+        if len(calls) == 1:
+            raise StockConflictError("taken by another counter")
+        real_deduct(session, quantities)
+
+    monkeypatch.setattr(sales, "deduct_stock", lose_once)
+    response = _sell(client, item_id, 4)
+
+    assert response.status_code == 201, response.text
+    assert len(calls) == 2
+    assert _stock(item_id) == 6
+    assert db.query(Sale).count() == 1
+
+
+def test_sale_gives_up_with_409_after_the_last_attempt(client, db, monkeypatch):
+    (item_id,) = _items(db, 10)
+
+    def always_lose(session, quantities):
+        raise StockConflictError("taken by another counter")
+
+    monkeypatch.setattr(sales, "deduct_stock", always_lose)
+    response = _sell(client, item_id, 4)
+
+    assert response.status_code == 409
+    assert _stock(item_id) == 10
+    assert db.query(Sale).count() == 0
+
+
+def test_retry_revalidates_against_the_stock_left(client, db, monkeypatch):
+    (item_id,) = _items(db, 10)
+    real_deduct = sales.deduct_stock
+
+    def other_counter_sells_first(session, quantities):
+        if _stock(item_id) == 10:
+            with sqlite3.connect(engine.url.database) as conn:
+                conn.execute("UPDATE items SET stock_quantity = 2 WHERE id = ?", (item_id,))
+        real_deduct(session, quantities)
+
+    monkeypatch.setattr(sales, "deduct_stock", other_counter_sells_first)
+    response = _sell(client, item_id, 5)
+
+    assert response.status_code == 400
+    assert "Available: 2.0" in response.json()["detail"]
+    assert _stock(item_id) == 2
+    assert db.query(Sale).count() == 0
@@ -0,0 +1,105 @@
+from datetime import date, datetime
+
+from app.models.models import Category, Item, Quality, Size, StockMovement, StockSnapshot
+from app.utils import stock_ledger
+
+
+def _item(db) -> int:
+    category = Category(name="Bolts")
+    db.add(category)
+    db.flush()
+    quality = Quality(category_id=category.id, name="Steel")
+    size = Size(category_id=category.id, size_value="6", size_display="6mm", sort_order=1)
+    db.add_all([quality, size])
+    db.flush()
+    item = Item(
+        category_id=category.id, quality_id=quality.id, size_id=size.id, sku="B-6",
+        selling_price=2.0, gst_percentage=18.0, stock_quantity=0.0, low_stock_threshold=1.0
+    )
+    db.add(item)
+    db.commit()
+    return item.id
+
+
+def _purchase(client, item_id, quantity, when: datetime) -> int:
+    response = client.post("/api/purchases/", json={
+        "purchase_date": when.isoformat(),
+        "items": [{"item_id": item_id, "quantity": quantity, "purchase_price": 1.0}]
+    })
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def _sale(client, item_id, quantity, when: datetime) -> int:
+    response = client.post("/api/sales/", json={
+        "sale_date": when.isoformat(),
+        "items": [{"item_id": item_id, "quantity": quantity, "unit_price": 2.0, "gst_percentage": 18.0}]
+    })
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def _movements(db, item_id):
+    return [
+        (movement.movement_type, movement.quantity, movement.ts)
+        for movement in db.query(StockMovement).filter(StockMovement.item_id == item_id).order_by(StockMovement.id)
+    ]
+
+
+def test_movements_are_dated_by_their_document(client, db):
+    item_id = _item(db)
+    _purchase(client, item_id, 10, datetime(2026, 1, 5, 9, 0))
+    _sale(client, item_id, 3, datetime(2026, 2, 1, 15, 30))
+
+    assert _movements(db, item_id) == [
+        (stock_ledger.PURCHASE, 10.0, datetime(2026, 1, 5, 9, 0)),
+        (stock_ledger.SALE, -3.0, datetime(2026, 2, 1, 15, 30)),
+    ]
+    assert stock_ledger.stock_at(db, item_id, datetime(2026, 1, 1))["stock_quantity"] == 0.0
+    assert stock_ledger.stock_at(db, item_id, datetime(2026, 1, 20))["stock_quantity"] == 10.0
+    assert stock_ledger.stock_at(db, item_id, datetime(2026, 2, 2))["stock_quantity"] == 7.0
+
+
+def test_batch_sales_keep_their_own_dates(client, db):
+    item_id = _item(db)
+    _purchase(client, item_id, 10, datetime(2026, 1, 1))
+    response = client.post("/api/sales/batch", json={"sales": [
+        {"sale_date": "2026-01-10T10:00:00", "items": [
+            {"item_id": item_id, "quantity": 1, "unit_price": 2.0, "gst_percentage": 18.0}
+        ]},
+        {"sale_date": "2026-01-20T10:00:00", "items": [
+            {"item_id": item_id, "quantity": 2, "unit_price": 2.0, "gst_percentage": 18.0}
+        ]},
+    ]})
+    assert response.status_code == 200, response.text
+
+    sales = [row for row in _movements(db, item_id) if row[0] == stock_ledger.SALE]
+    assert [ts for _, _, ts in sales] == [datetime(2026, 1, 10, 10), datetime(2026, 1, 20, 10)]
+
+
+def test_reversals_take_the_date_of_the_reversed_document(client, db):
+    item_id = _item(db)
+    purchase_id = _purchase(client, item_id, 10, datetime(2026, 1, 5))
+    sale_id = _sale(client, item_id, 4, datetime(2026, 1, 8))
+
+    assert client.delete(f"/api/sales/{sale_id}").status_code == 204
+    assert client.delete(f"/api/purchases/{purchase_id}").status_code == 204
+
+    movements = _movements(db, item_id)
+    assert movements[2] == (stock_ledger.SALE_REVERSAL, 4.0, datetime(2026, 1, 8))
+    assert movements[3] == (stock_ledger.PURCHASE_REVERSAL, -10.0, datetime(2026, 1, 5))
+    assert stock_ledger.stock_at(db, item_id, datetime(2026, 1, 10))["stock_quantity"] == 0.0
+
+
+def test_backdated_sale_drops_the_stale_snapshots(client, db):
+    item_id = _item(db)
+    _purchase(client, item_id, 10, datetime(2026, 1, 5, 9, 0))
+    stock_ledger.snapshot_missing_days(db, today=date(2026, 1, 10))
+    assert db.query(StockSnapshot).filter(StockSnapshot.item_id == item_id).count() == 1
+
+    # Entered today, but sold on a day that already has a snapshot
+    _sale(client, item_id, 3, datetime(2026, 1, 5, 17, 0))
+
+    assert db.query(StockSnapshot).filter(StockSnapshot.item_id == item_id).count() == 0
+    assert stock_ledger.stock_at(db, item_id, datetime(2026, 1, 5, 12, 0))["stock_quantity"] == 10.0
+    assert stock_ledger.stock_at(db, item_id, datetime(2026, 1, 6))["stock_quantity"] == 7.0
@@ -0,0 +1,110 @@
+import sqlite3
+
+from app.database import engine
+from app.models.models import Category, Item, Quality, Size
+from app.utils.category_matrix import category_matrix
+from app.utils.table_versions import get_category_items_version, get_last_modified, get_table_versions
+
+
+def _other_process():
+    """A connection of its own, like manage.py or a second worker would have"""
+    return sqlite3.connect(engine.url.database)
+
+
+def _category_with_item(db, stock=5.0):
+    category = Category(name="Bolts")
+    db.add(category)
+    db.flush()
+    quality = Quality(category_id=category.id, name="Steel")
+    size = Size(category_id=category.id, size_value="6", size_display="6mm", sort_order=1)
+    db.add_all([quality, size])
+    db.flush()
+    item = Item(
+        category_id=category.id, quality_id=quality.id, size_id=size.id, sku="B-6",
+        selling_price=2.0, gst_percentage=18.0, stock_quantity=stock, low_stock_threshold=1.0
+    )
+    db.add(item)
+    db.commit()
+    return category.id, item.id
+
+
+def test_write_on_another_connection_bumps_versions(db):
+    before = get_table_versions("categories", "suppliers")
+
+    with _other_process() as conn:
+        conn.execute("INSERT INTO categories (name) VALUES ('Nails')")
+
+    categories, suppliers = get_table_versions("categories", "suppliers")
+    assert categories == before[0] + 1
+    assert suppliers == before[1]
+
+
+def test_rolled_back_write_leaves_versions_alone(db):
+    before = get_table_versions("categories")
+
+    db.add(Category(name="Never"))
+    db.flush()
+    db.rollback()
+
+    assert get_table_versions("categories") == before
+
+
+def test_last_modified_follows_writes(db):
+    before = get_last_modified("suppliers")
+
+    with _other_process() as conn:
+        conn.execute("INSERT INTO suppliers (name) VALUES ('Acme')")
+
+    assert get_last_modified("suppliers") >= before
+
+
+def test_category_version_moves_with_its_items_only(db):
+    category_id, item_id = _category_with_item(db)
+    other = Category(name="Screws")
+    db.add(other)
+    db.commit()
+    before, other_before = get_category_items_version(category_id), get_category_items_version(other.id)
+
+    with _other_process() as conn:
+        conn.execute("UPDATE items SET stock_quantity = 1 WHERE id = ?", (item_id,))
+
+    assert get_category_items_version(category_id) > before
+    assert get_category_items_version(other.id) == other_before
+
+
+def test_matrix_picks_up_stock_changed_elsewhere(db):
+    category_id, item_id = _category_with_item(db, stock=5.0)
+    body, etag = category_matrix.render(db, category_id, "map")
+    assert body["items"]
+    assert next(iter(body["items"].values()))["stock_quantity"] == 5.0
+
+    with _other_process() as conn:
+        conn.execute("UPDATE items SET stock_quantity = 2 WHERE id = ?", (item_id,))
+
+    assert category_matrix.current_etag(category_id, "map") != etag
+    patches = category_matrix.patches
+    body, new_etag = category_matrix.render(db, category_id, "map")
+    assert next(iter(body["items"].values()))["stock_quantity"] == 2.0
+    assert category_matrix.patches == patches + 1
+    assert new_etag == category_matrix.current_etag(category_id, "map")
+
+
+def test_matrix_drops_deleted_items(db):
+    category_id, item_id = _category_with_item(db)
+    category_matrix.render(db, category_id, "map")
+
+    with _other_process() as conn:
+        conn.execute("DELETE FROM items WHERE id = ?", (item_id,))
+
+    body, _ = category_matrix.render(db, category_id, "map")
+    assert body["items"] == {}
+
+
+def test_etag_survives_a_restart_of_the_cache(client, db):
+    category_id, _ = _category_with_item(db)
+    etag = client.get(f"/api/items/category/{category_id}/table").headers["etag"]
+
+    category_matrix.invalidate()
+
+    response = client.get(f"/api/items/category/{category_id}/table", headers={"If-None-Match": etag})
+    assert response.status_code == 304
@@ -5,7 +5,8 @@ import sys
 sys.path.insert(0, '.')
 
 from app.database import SessionLocal
-from app.models.models import Category, Quality, Size, Item, Supplier
+from app.models.models import Category, Item, Supplier
+from app.utils.taxonomy_cache import taxonomy_cache
 
 def view_data():
     db = SessionLocal()
@@ -22,11 +23,11 @@ def view_data():
             print(f"   [{cat.id}] {cat.name}")
             
             # Qualities for this category
-            qualities = db.query(Quality).filter(Quality.category_id == cat.id).all()
+            qualities = taxonomy_cache.qualities_for_category(db, cat.id)
             print(f"       Qualities: {', '.join([q.name for q in qualities])}")
             
             # Sizes for this category
-            sizes = db.query(Size).filter(Size.category_id == cat.id).order_by(Size.sort_order).all()
+            sizes = taxonomy_cache.sizes_for_category(db, cat.id)
             print(f"       Sizes: {', '.join([s.size_display for s in sizes])}")
             
             # Item count
@@ -44,12 +45,12 @@ def view_data():
         print(f"\n📊 SAMPLE ITEMS (first 10):")
         items = db.query(Item).limit(10).all()
         for item in items:
-            category = db.query(Category).filter(Category.id == item.category_id).first()
-            quality = db.query(Quality).filter(Quality.id == item.quality_id).first()
-            size = db.query(Size).filter(Size.id == item.size_id).first()
+            category_name, quality_name, size_display = taxonomy_cache.names(
+                db, item.category_id, item.quality_id, item.size_id
+            )
             
             print(f"   [{item.id}] {item.sku}")
-            print(f"       {category.name} > {quality.name} > {size.size_display}")
+            print(f"       {category_name} > {quality_name} > {size_display}")
             print(f"       Price: ₹{item.selling_price} | Stock: {item.stock_quantity} {item.unit} | GST: {item.gst_percentage}%")
         
         # Totals